@@ -1,13 +1,63 @@
+import threading
+
+import requests
 from airtable import Airtable
 
+from .config import get_settings
+from .rate_limiter import AIRTABLE_HOST, THROTTLE_STATUS_CODES, get_rate_limiter
+
+# Airtable asks clients to wait 30 seconds after a 429 when no Retry-After is given
+DEFAULT_THROTTLE_BACKOFF_SECONDS = 30
+
 class AirtableClient:
-    def __init__(self, api_key, base_id, table_name):
+    def __init__(self, api_key, base_id, table_name, rate_limiter=None, max_retries=3, request_budget=None):
         if not api_key or not base_id or not table_name:
             raise ValueError("Airtable API Key, Base ID, or Table Name was not provided during initialization.")
         
         self.airtable = Airtable(base_id, table_name, api_key)
+        # Pacing is done by the shared adaptive limiter, not the wrapper's fixed sleeps
+        self.airtable.API_LIMIT = 0
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.max_retries = max_retries
+        # Optional budget shared with other processes (work_queue.SharedRateBudget)
+        self.request_budget = request_budget
+
+    def _call(self, func, *args, **kwargs):
+        """
+        Runs one Airtable API request through the rate limiter, retrying throttled
+        (429/503) requests after the limiter's backoff.
+        """
+        for attempt in range(self.max_retries + 1):
+            if self.request_budget is not None:
+                self.request_budget.acquire(AIRTABLE_HOST)
+            with self.rate_limiter.request(AIRTABLE_HOST) as ticket:
+                try:
+                    return func(*args, **kwargs)
+                except requests.exceptions.HTTPError as e:
+                    response = getattr(e, 'response', None)
+                    status_code = response.status_code if response is not None else None
+                    retry_after = response.headers.get('Retry-After') if response is not None else None
+                    if status_code == 429 and retry_after is None:
+                        retry_after = DEFAULT_THROTTLE_BACKOFF_SECONDS
+                    ticket.record(status_code, retry_after)
+                    if status_code not in THROTTLE_STATUS_CODES or attempt == self.max_retries:
+                        raise
+            print(f"Airtable throttled the request ({status_code}), retrying ({attempt + 1}/{self.max_retries})...")
 
-    def get_all_records(self, view=None, max_records=0, fields=None, sort=None, formula=None):
+    def iter_record_pages(self, **params):
+        """
+        Yields records page by page (up to 100 per page); each page is one rate-limited request.
+        Accepts the same keyword parameters as the airtable wrapper's get_iter.
+        """
+        offset = None
+        while True:
+            data = self._call(self.airtable._get, self.airtable.url_table, offset=offset, **params)
+            yield data.get("records", [])
+            offset = data.get("offset")
+            if not offset:
+                break
+
+    def get_all_records(self, view=None, max_records=0, fields=None, sort=None, formula=None, raise_errors=False):
         """
         Retrieves all records from the table.
         Args:
@@ -16,6 +66,8 @@ class AirtableClient:
             fields (list, optional): A list of field names to retrieve.
             sort (list, optional): A list of tuples for sorting, e.g., [('FieldName', 'asc')].
             formula (str, optional): A formula used to filter records.
+            raise_errors (bool, optional): Re-raise API errors instead of returning an empty list,
+                so callers can tell "no records" apart from "request failed".
         Returns:
             list: A list of records.
         """
@@ -32,9 +84,41 @@ class AirtableClient:
             if formula:
                 params['filterByFormula'] = formula
             
-            return self.airtable.get_all(**params)
+            records = []
+            for page in self.iter_record_pages(**params):
+                records.extend(page)
+            return records
         except Exception as e:
             print(f"Error getting records from Airtable: {e}")
+            if raise_errors:
+                raise
+            return []
+
+    def iter_query_pages(self, query):
+        """
+        Yields the records matching a query.Query page by page; its filter, fields, sort and
+        limit are all sent with the request.
+        """
+        return self.iter_record_pages(**query.params())
+
+    def query(self, query, raise_errors=False):
+        """
+        Retrieves the records matching a query.Query.
+        Args:
+            query (Query): The filter, fields, sort and limit; compiled to filterByFormula once.
+            raise_errors (bool, optional): Re-raise API errors instead of returning an empty list.
+        Returns:
+            list: A list of records, each holding only the queried fields.
+        """
+        try:
+            records = []
+            for page in self.iter_query_pages(query):
+                records.extend(page)
+            return records
+        except Exception as e:
+            print(f"Error querying Airtable ({query.formula}): {e}")
+            if raise_errors:
+                raise
             return []
 
     def add_record(self, data):
@@ -46,12 +130,32 @@ class AirtableClient:
             dict: The created record, or None if an error occurred.
         """
         try:
-            return self.airtable.insert(data)
+            return self._call(self.airtable.insert, data)
         except Exception as e:
             print(f"Error adding record to Airtable: {e}")
             # You might want to implement more sophisticated error handling or logging here
             return None
 
+    def batch_add_records(self, records):
+        """
+        Adds many records, 10 per request (the Airtable maximum).
+        Args:
+            records (list): The data for each new record.
+        Returns:
+            list: The created record for each input, in order, or None for records
+                  in a chunk that failed.
+        """
+        created = []
+        chunk_size = self.airtable.MAX_RECORDS_PER_REQUEST
+        for start in range(0, len(records), chunk_size):
+            chunk = records[start:start + chunk_size]
+            try:
+                created.extend(self._call(self.airtable.batch_insert, chunk))
+            except Exception as e:
+                print(f"Error adding {len(chunk)} records to Airtable: {e}")
+                created.extend([None] * len(chunk))
+        return created
+
     def update_record(self, record_id, data):
         """
         Updates an existing record in the table.
@@ -62,11 +166,43 @@ class AirtableClient:
             dict: The updated record, or None if an error occurred.
         """
         try:
-            return self.airtable.update(record_id, data)
+            return self._call(self.airtable.update, record_id, data)
         except Exception as e:
             print(f"Error updating record in Airtable: {e}")
             return None
 
+    def get_record(self, record_id):
+        """
+        Retrieves a single record by its ID.
+        Args:
+            record_id (str): The ID of the record.
+        Returns:
+            dict: The record, or None if an error occurred.
+        """
+        try:
+            return self._call(self.airtable.get, record_id)
+        except Exception as e:
+            print(f"Error getting record {record_id} from Airtable: {e}")
+            return None
+
+    def batch_update_records(self, updates):
+        """
+        Updates many records, 10 per request (the Airtable maximum).
+        Args:
+            updates (list): Dicts of the form {"id": record_id, "fields": {...}}.
+        Returns:
+            list: The updated records. Records in a chunk that failed are left out.
+        """
+        updated = []
+        chunk_size = self.airtable.MAX_RECORDS_PER_REQUEST
+        for start in range(0, len(updates), chunk_size):
+            chunk = updates[start:start + chunk_size]
+            try:
+                updated.extend(self._call(self.airtable.batch_update, chunk))
+            except Exception as e:
+                print(f"Error updating {len(chunk)} records in Airtable: {e}")
+        return updated
+
     def delete_record(self, record_id):
         """
         Deletes a record from the table.
@@ -76,11 +212,36 @@ class AirtableClient:
             dict: The deletion confirmation, or None if an error occurred.
         """
         try:
-            return self.airtable.delete(record_id)
+            return self._call(self.airtable.delete, record_id)
         except Exception as e:
             print(f"Error deleting record from Airtable: {e}")
             return None
 
+# --- Shared clients ---
+# One client (and so one HTTP session) per table, created on first use and shared by
+# every module, instead of each module building its own at import time.
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_airtable_client(table_name=None):
+    """
+    Returns the shared AirtableClient for `table_name` (default: AIRTABLE_TABLE_NAME from
+    the settings), creating it on first use.
+    """
+    settings = get_settings()
+    table_name = table_name or settings.airtable_table_name
+    with _clients_lock:
+        client = _clients.get(table_name)
+        if client is None:
+            client = AirtableClient(settings.airtable_api_key, settings.airtable_base_id, table_name)
+            _clients[table_name] = client
+        return client
+
+def reset_airtable_clients():
+    """Drops all shared clients, e.g. after the settings have changed."""
+    with _clients_lock:
+        _clients.clear()
+
 # Example Usage (optional - for testing this client directly)
 # if __name__ == '__main__':
 #     client = AirtableClient('your_api_key', 'your_base_id', 'your_table_name')
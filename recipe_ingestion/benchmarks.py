@@ -0,0 +1,223 @@
+"""
+Micro-benchmarks for the hot paths of the ingestion pipeline.
+
+Run with: python -m recipe_ingestion.benchmarks <benchmark> [options]
+"""
+import argparse
+import time
+
+from bs4 import BeautifulSoup
+
+
+def _best_of(func, repeat):
+    """Runs `func` `repeat` times and returns (best seconds per run, last result)."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench_link_discovery(html_content, base_url, site, repeat=20):
+    """
+    Compares index-page link discovery through a full soup against the raw-HTML href
+    scanner, and checks that both return the same links and next-page URL.
+    """
+    from . import scraper
+
+    rules, find_links, find_next = {
+        "smittenkitchen.com": (scraper.SK_LINK_RULES, scraper.find_sk_links, scraper.find_sk_next_page),
+        "justinesnacks.com": (scraper.JS_LINK_RULES, scraper.find_js_links, scraper.find_js_next_page),
+    }[site]
+
+    def soup_path():
+        soup = BeautifulSoup(html_content, "html.parser")
+        try:
+            return find_links(soup), find_next(soup, base_url)
+        finally:
+            soup.decompose()
+
+    soup_time, soup_result = _best_of(soup_path, repeat)
+    scan_time, scan_result = _best_of(lambda: scraper.scan_index_page(html_content, base_url, rules), repeat)
+
+    print(f"Page: {base_url} ({len(html_content) / 1024:.0f} KiB)")
+    print(f"  soup path:    {soup_time * 1000:8.2f} ms  ({len(soup_result[0])} links)")
+    print(f"  href scanner: {scan_time * 1000:8.2f} ms  ({len(scan_result[0])} links)")
+    print(f"  speedup:      {soup_time / scan_time:8.1f}x")
+    if soup_result != scan_result:
+        print("  WARNING: results differ!")
+        print(f"    only in soup:    {sorted(soup_result[0] - scan_result[0])[:5]} next={soup_result[1]}")
+        print(f"    only in scanner: {sorted(scan_result[0] - soup_result[0])[:5]} next={scan_result[1]}")
+    return soup_time, scan_time
+
+
+def _synthetic_airtable_records(count):
+    """Airtable-shaped tagged recipe records with realistic field sizes."""
+    courses = ["Starter", "Main Course", "Side Dish", "Dessert", "Snack"]
+    seasons = [["Spring"], ["Summer"], ["Fall"], ["Winter"], ["Year-Round"]]
+    diets = [["Vegan", "Gluten-Free Potential"], ["Vegetarian"], ["Gluten-Free Potential"], ["Unknown"]]
+    return [
+        {
+            "id": f"rec{i:014d}",
+            "fields": {
+                "Title": f"Recipe number {i}",
+                "Source URL": f"https://{['smittenkitchen.com', 'justinesnacks.com'][i % 2]}/recipes/recipe-{i}/",
+                "Image URL": [{"url": f"https://images.example.com/{i}.jpg"}],
+                "Ingredients (raw)": "\n".join(f"{j + 1} cups ingredient {(i * 7 + j) % 500}" for j in range(10)),
+                "Course": courses[i % len(courses)],
+                "Season": list(seasons[i % len(seasons)]),
+                "Diet Tags": list(diets[i % len(diets)]),
+                "Tagging Status": "Tagged",
+            },
+        }
+        for i in range(count)
+    ]
+
+
+def bench_records(count=10000):
+    """
+    Compares holding a corpus as Airtable fields dicts (ingredients split into lists,
+    host parsed) against Recipe objects: retained memory and time to load from JSON.
+    """
+    import json
+    import tracemalloc
+    from urllib.parse import urlparse
+
+    from .records import Recipe
+
+    # Decode from JSON each time so neither side shares strings with the other
+    payload = json.dumps(_synthetic_airtable_records(count))
+
+    def as_dicts():
+        # What the pipeline did per record before: split ingredients, parse the host
+        records = json.loads(payload)
+        for record in records:
+            fields = record["fields"]
+            fields["Ingredients (raw)"] = fields["Ingredients (raw)"].split("\n")
+            fields["host"] = urlparse(fields["Source URL"]).netloc
+        return records
+
+    def as_recipes():
+        return Recipe.from_airtable_records(json.loads(payload))
+
+    results = {}
+    for name, build in (("fields dicts", as_dicts), ("Recipe objects", as_recipes)):
+        tracemalloc.start()
+        corpus = build()
+        retained = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del corpus
+        seconds, _ = _best_of(build, 3)
+        results[name] = (retained, seconds)
+
+    print(f"Corpus of {count} recipes:")
+    for name, (retained, seconds) in results.items():
+        print(f"  {name:<15} {retained / count:8.0f} bytes/recipe  {seconds * 1000:8.1f} ms to load")
+    return results
+
+
+def bench_ingredient_parsing(count=10000):
+    """Parses the ingredient lines of a synthetic corpus in batch, cold and then warm."""
+    from . import ingredient_parser
+    from .records import Recipe
+
+    recipes = Recipe.from_airtable_records(_synthetic_airtable_records(count))
+    ingredient_lists = [recipe.ingredients for recipe in recipes]
+    lines = sum(len(ingredients) for ingredients in ingredient_lists)
+
+    ingredient_parser._parse_normalized.cache_clear()
+    start = time.perf_counter()
+    ingredient_parser.parse_corpus(ingredient_lists)
+    cold = time.perf_counter() - start
+    warm, _ = _best_of(lambda: ingredient_parser.parse_corpus(ingredient_lists), 3)
+
+    info = ingredient_parser.cache_info()
+    print(f"Corpus of {count} recipes, {lines} ingredient lines ({info.currsize} distinct):")
+    print(f"  cold cache: {cold * 1000:8.1f} ms")
+    print(f"  warm cache: {warm * 1000:8.1f} ms")
+    return cold, warm
+
+
+def bench_corpus(count=100000, batch_rows=5000):
+    """
+    Loading a corpus from a columnar snapshot (corpus_export.py) against decoding the
+    same records from JSON, as they arrive from Airtable. Export is streamed in pages
+    of 100 records, like iter_record_pages.
+    """
+    import json
+    import os
+    import tempfile
+
+    from . import corpus_export
+    from .records import Recipe
+
+    records = _synthetic_airtable_records(count)
+    pages = [records[start:start + 100] for start in range(0, count, 100)]
+    payload = json.dumps(records)
+    formats = ["arrow", "parquet", "jsonl"] if corpus_export.pa is not None else ["jsonl"]
+
+    print(f"Corpus of {count} recipes:")
+    json_time, _ = _best_of(lambda: Recipe.from_airtable_records(json.loads(payload)), 3)
+    print(f"  {'Airtable JSON':<14} load {json_time * 1000:8.1f} ms")
+    with tempfile.TemporaryDirectory() as directory:
+        for file_format in formats:
+            path = os.path.join(directory, f"{corpus_export.RECIPES_NAME}.{file_format}")
+            start = time.perf_counter()
+            corpus_export.write_snapshot(pages, path, file_format=file_format, batch_rows=batch_rows)
+            export_time = time.perf_counter() - start
+            size = os.path.getsize(path)
+            load_time, recipes = _best_of(lambda: corpus_export.load_recipes(directory), 3)
+            line = (f"  {file_format:<14} load {load_time * 1000:8.1f} ms  export {export_time:6.2f} s  "
+                    f"{size / 1e6:7.1f} MB")
+            if file_format != "jsonl":
+                table_time, _ = _best_of(lambda: corpus_export.read_table(path), 3)
+                line += f"  (table only {table_time * 1000:.1f} ms)"
+            print(line)
+            if len(recipes) != count:
+                print(f"  WARNING: loaded {len(recipes)} recipes")
+            os.remove(path)
+
+
+def _read_page(source):
+    """Reads an HTML page from a local file, or fetches it if `source` is a URL."""
+    if source.startswith(("http://", "https://")):
+        from .scraper import EnhancedScraper
+        return EnhancedScraper().fetch_html_for_links(source)
+    with open(source, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingestion pipeline micro-benchmarks.")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    links_parser = subparsers.add_parser("links", help="Soup vs. href scanner on an index page.")
+    links_parser.add_argument("source", help="Saved index page (HTML file) or its URL.")
+    links_parser.add_argument("--site", choices=["smittenkitchen.com", "justinesnacks.com"], required=True)
+    links_parser.add_argument("--base-url", help="URL the saved page came from (defaults to source).")
+    links_parser.add_argument("--repeat", type=int, default=20)
+
+    records_parser = subparsers.add_parser("records", help="Fields dicts vs. Recipe objects for a corpus.")
+    records_parser.add_argument("--count", type=int, default=10000)
+
+    ingredients_parser = subparsers.add_parser("ingredients", help="Batch ingredient parsing over a corpus.")
+    ingredients_parser.add_argument("--count", type=int, default=10000)
+
+    corpus_parser = subparsers.add_parser("corpus", help="Columnar snapshot vs. JSON for loading a corpus.")
+    corpus_parser.add_argument("--count", type=int, default=100000)
+    corpus_parser.add_argument("--batch-rows", type=int, default=5000)
+
+    args = parser.parse_args()
+    if args.benchmark == "corpus":
+        bench_corpus(args.count, args.batch_rows)
+    elif args.benchmark == "records":
+        bench_records(args.count)
+    elif args.benchmark == "ingredients":
+        bench_ingredient_parsing(args.count)
+    elif args.benchmark == "links":
+        page = _read_page(args.source)
+        if not page:
+            raise SystemExit(f"Could not read {args.source}")
+        bench_link_discovery(page, args.base_url or args.source, args.site, repeat=args.repeat)
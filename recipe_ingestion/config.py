@@ -1,22 +1,84 @@
 import os
+import threading
+from typing import NamedTuple, Optional
+
 from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv() # This reads your .env file and makes the variables available to os.getenv()
+# The .env file lives next to this module (recipe_ingestion/.env)
+ENV_FILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")
+
+
+class Settings(NamedTuple):
+    airtable_api_key: str
+    airtable_base_id: str
+    airtable_table_name: str
+
+
+_settings: Optional[Settings] = None
+_settings_lock = threading.Lock()
+
+
+def get_settings() -> Settings:
+    """
+    Loads the .env file and reads the configuration on first use, then returns the same
+    Settings on every later call. Nothing is read at import time, so modules can be
+    imported by batch jobs and tests without a configured environment.
+    """
+    global _settings
+    if _settings is None:
+        with _settings_lock:
+            if _settings is None:
+                load_dotenv(ENV_FILE_PATH) # Makes the .env variables available to os.getenv()
+
+                # Airtable Configuration
+                # Use the NAMES of the environment variables from your .env file
+                settings = Settings(
+                    airtable_api_key=os.getenv("AIRTABLE_API_KEY"),
+                    airtable_base_id=os.getenv("AIRTABLE_BASE_ID"),
+                    airtable_table_name=os.getenv("AIRTABLE_TABLE_NAME"),
+                )
+
+                # Basic validation
+                if not all(settings):
+                    raise ValueError(
+                        "Missing one or more Airtable configuration values. "
+                        "Please ensure AIRTABLE_API_KEY, AIRTABLE_BASE_ID, and AIRTABLE_TABLE_NAME are defined in your .env file and that the .env file is in the same directory as config.py (recipe_ingestion)."
+                    )
+                _settings = settings
+    return _settings
+
+
+def reset_settings() -> None:
+    """Forgets the loaded settings so the next get_settings() re-reads the environment."""
+    global _settings
+    with _settings_lock:
+        _settings = None
+
+
+def get_data_dir(*parts: str) -> str:
+    """
+    Returns (and creates) a directory for local state such as indexes and snapshots:
+    RECIPE_DATA_DIR if set, otherwise recipe_ingestion/.data. Extra `parts` are joined on.
+    """
+    base = os.getenv("RECIPE_DATA_DIR") or os.path.join(os.path.dirname(ENV_FILE_PATH), ".data")
+    path = os.path.join(base, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+# Old-style constants (config.AIRTABLE_API_KEY, ...) still work but are resolved lazily
+_LEGACY_NAMES = {
+    "AIRTABLE_API_KEY": "airtable_api_key",
+    "AIRTABLE_BASE_ID": "airtable_base_id",
+    "AIRTABLE_TABLE_NAME": "airtable_table_name",
+}
 
-# Airtable Configuration
-# Use the NAMES of the environment variables from your .env file
-AIRTABLE_API_KEY = os.getenv("AIRTABLE_API_KEY")
-AIRTABLE_BASE_ID = os.getenv("AIRTABLE_BASE_ID")
-AIRTABLE_TABLE_NAME = os.getenv("AIRTABLE_TABLE_NAME")
 
-# Basic validation
-if not all([AIRTABLE_API_KEY, AIRTABLE_BASE_ID, AIRTABLE_TABLE_NAME]):
-    raise ValueError(
-        "Missing one or more Airtable configuration values. "
-        "Please ensure AIRTABLE_API_KEY, AIRTABLE_BASE_ID, and AIRTABLE_TABLE_NAME are defined in your .env file and that the .env file is in the same directory as config.py (recipe_ingestion)."
-    )
+def __getattr__(name):
+    if name in _LEGACY_NAMES:
+        return getattr(get_settings(), _LEGACY_NAMES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # You can add other configurations here as needed, for example:
 # DEFAULT_REQUEST_TIMEOUT = 10
-# LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
\ No newline at end of file
+# LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
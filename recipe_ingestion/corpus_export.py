@@ -0,0 +1,409 @@
+"""
+Columnar snapshots of the Recipes and Curated Menus tables for offline jobs.
+
+    python -m recipe_ingestion.corpus_export export [--dir DIR] [--format arrow|parquet]
+    python -m recipe_ingestion.corpus_export info [--dir DIR]
+
+Records are streamed out of Airtable page by page and written in record batches, so
+memory stays bounded by `batch_rows` whatever the table size. Course, Season, Diet
+Tags, Tagging Status and host are dictionary-encoded (a few dozen distinct values)
+and ingredients are a list<string> column.
+
+The default Arrow IPC file is read through a memory map without copying, so loading
+the table is near-instant and `load_recipes` only pays for building Recipe objects.
+Parquet is smaller and readable by other tools, but has to be decoded on load.
+
+pyarrow is optional: without it, snapshots are written and read as JSON lines (one
+Airtable record per line), which works the same but without the speedup.
+"""
+import json
+import os
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from .config import get_data_dir
+from .records import (APPROVED, COURSE, DIET_TAGS, IMAGE_URL, INGREDIENTS_RAW, SERVINGS_MAX, SERVINGS_MIN,
+                      SEASON, SOURCE_URL, TAGGING_STATUS, TITLE, TOTAL_TIME_MINUTES, Recipe, intern_tags)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+DEFAULT_CORPUS_DIR = "corpus"
+RECIPES_NAME = "recipes"
+CURATED_MENUS_NAME = "curated_menus"
+# Rows per record batch (and Parquet row group); bounds memory while exporting
+DEFAULT_BATCH_ROWS = 5000
+
+RECIPE_EXPORT_FIELDS = [TITLE, SOURCE_URL, IMAGE_URL, INGREDIENTS_RAW, COURSE, SEASON, DIET_TAGS,
+                        TAGGING_STATUS, APPROVED, TOTAL_TIME_MINUTES, SERVINGS_MIN, SERVINGS_MAX]
+
+# Recipe attribute -> column type name (see _arrow_type)
+RECIPE_COLUMNS = {
+    "record_id": "string",
+    "title": "string",
+    "url": "string",
+    "host": "dictionary",
+    "image": "string",
+    "ingredients": "list<string>",
+    "course": "dictionary",
+    "seasons": "list<dictionary>",
+    "diet_tags": "list<dictionary>",
+    "tagging_status": "dictionary",
+    "approved": "bool",
+    "total_minutes": "int32",
+    "servings_min": "int32",
+    "servings_max": "int32",
+}
+
+
+def _arrow_type(name: str):
+    dictionary = pa.dictionary(pa.int32(), pa.string())
+    return {
+        "string": pa.string(),
+        "dictionary": dictionary,
+        "list<string>": pa.list_(pa.string()),
+        "list<dictionary>": pa.list_(dictionary),
+        "bool": pa.bool_(),
+        "int32": pa.int32(),
+    }[name]
+
+
+def _int_or_none(value) -> Optional[int]:
+    return round(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+class _ColumnarWriter:
+    """
+    Writes rows (dicts of column -> value) as Arrow record batches to an IPC file or a
+    Parquet file. Dictionary columns keep one growing vocabulary, so every batch's
+    dictionary extends the previous one (written as a delta in IPC files).
+    """
+
+    def __init__(self, path: str, columns: Dict[str, str], file_format: str, batch_rows: int):
+        self.path = path
+        self.tmp_path = f"{path}.tmp"
+        self.columns = columns
+        self.batch_rows = batch_rows
+        self.schema = pa.schema([(name, _arrow_type(kind)) for name, kind in columns.items()])
+        self.vocab: Dict[str, Dict[str, int]] = {name: {} for name, kind in columns.items() if "dictionary" in kind}
+        self.rows: List[dict] = []
+        self.count = 0
+        if file_format == "parquet":
+            self.writer = pq.ParquetWriter(self.tmp_path, self.schema, compression="zstd")
+        else:
+            options = pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+            self.sink = pa.OSFile(self.tmp_path, "wb")
+            self.writer = pa.ipc.new_file(self.sink, self.schema, options=options)
+        self.file_format = file_format
+
+    def _index(self, column: str, value: Optional[str]) -> Optional[int]:
+        if value is None:
+            return None
+        vocab = self.vocab[column]
+        index = vocab.get(value)
+        if index is None:
+            index = vocab[value] = len(vocab)
+        return index
+
+    def _array(self, name: str, kind: str, values: list):
+        if kind == "dictionary":
+            dictionary = pa.array(list(self.vocab[name]), pa.string())
+            indices = pa.array([self._index(name, v) for v in values], pa.int32())
+            return pa.DictionaryArray.from_arrays(indices, dictionary)
+        if kind == "list<dictionary>":
+            offsets, flat = [0], []
+            for items in values:
+                flat.extend(self._index(name, item) for item in items or ())
+                offsets.append(len(flat))
+            dictionary = pa.array(list(self.vocab[name]), pa.string())
+            return pa.ListArray.from_arrays(pa.array(offsets, pa.int32()),
+                                            pa.DictionaryArray.from_arrays(pa.array(flat, pa.int32()), dictionary))
+        return pa.array(values, _arrow_type(kind))
+
+    def write(self, row: dict) -> None:
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.rows:
+            return
+        # Indices first: the dictionaries must include every value of this batch
+        arrays = []
+        for name, kind in self.columns.items():
+            values = [row.get(name) for row in self.rows]
+            if "dictionary" in kind:
+                flat = (item for items in values for item in (items or ())) if kind.startswith("list") else values
+                for value in flat:
+                    self._index(name, value)
+            arrays.append(self._array(name, kind, values))
+        batch = pa.record_batch(arrays, schema=self.schema)
+        if self.file_format == "parquet":
+            self.writer.write_table(pa.Table.from_batches([batch]))
+        else:
+            self.writer.write_batch(batch)
+        self.count += len(self.rows)
+        self.rows = []
+
+    def close(self) -> int:
+        self.flush()
+        self.writer.close()
+        if self.file_format != "parquet":
+            self.sink.close()
+        os.replace(self.tmp_path, self.path)
+        return self.count
+
+    def abort(self) -> None:
+        """Closes and removes the partial file, leaving any previous snapshot in place."""
+        self.writer.close()
+        if self.file_format != "parquet":
+            self.sink.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+def _recipe_row(recipe: Recipe) -> dict:
+    return {
+        "record_id": recipe.record_id,
+        "title": recipe.title,
+        "url": recipe.url,
+        "host": recipe.host,
+        "image": recipe.image,
+        "ingredients": recipe.ingredients,
+        "course": recipe.course,
+        "seasons": recipe.seasons,
+        "diet_tags": recipe.diet_tags,
+        "tagging_status": recipe.tagging_status,
+        "approved": recipe.approved if isinstance(recipe.approved, bool) else None,
+        "total_minutes": _int_or_none(recipe.total_minutes),
+        "servings_min": _int_or_none(recipe.servings_min),
+        "servings_max": _int_or_none(recipe.servings_max),
+    }
+
+
+def _airtable_recipe_row(record: dict) -> dict:
+    return _recipe_row(Recipe.from_airtable(record))
+
+
+def _menu_columns() -> Dict[str, str]:
+    from .menu_retriever import CURATED_MENU_FIELDS
+
+    columns = {"id": "string"}
+    columns.update({field: "list<dictionary>" if field == "Season" else "string" for field in CURATED_MENU_FIELDS})
+    return columns
+
+
+def _menu_row(record: dict) -> dict:
+    row = dict(record.get("fields", {}))
+    row["id"] = record.get("id")
+    season = row.get("Season")
+    row["Season"] = [season] if isinstance(season, str) else season
+    return row
+
+
+def _snapshot_path(directory: str, name: str, file_format: str) -> str:
+    extension = {"arrow": "arrow", "parquet": "parquet", "jsonl": "jsonl"}[file_format]
+    return os.path.join(directory, f"{name}.{extension}")
+
+
+# --- Export ---
+
+def write_snapshot(pages: Iterable[List[dict]], path: str, kind: str = RECIPES_NAME,
+                   file_format: str = "arrow", batch_rows: int = DEFAULT_BATCH_ROWS) -> int:
+    """
+    Writes pages of Airtable records (as from AirtableClient.iter_record_pages) to `path`.
+
+    Args:
+        kind: RECIPES_NAME or CURATED_MENUS_NAME; picks the columns.
+        file_format: "arrow" (IPC file), "parquet" or "jsonl".
+
+    Returns:
+        The number of records written.
+    """
+    if file_format == "jsonl":
+        count = 0
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            for page in pages:
+                for record in page:
+                    f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+                    count += 1
+        os.replace(f"{path}.tmp", path)
+        return count
+
+    if kind == RECIPES_NAME:
+        writer, to_row = _ColumnarWriter(path, RECIPE_COLUMNS, file_format, batch_rows), _airtable_recipe_row
+    else:
+        writer, to_row = _ColumnarWriter(path, _menu_columns(), file_format, batch_rows), _menu_row
+    try:
+        for page in pages:
+            for record in page:
+                if record.get("fields") is not None:
+                    writer.write(to_row(record))
+        return writer.close()
+    except BaseException:
+        writer.abort()
+        raise
+
+
+def export_corpus(directory: Optional[str] = None, file_format: str = "arrow", client=None, menus_client=None,
+                  batch_rows: int = DEFAULT_BATCH_ROWS) -> Dict[str, int]:
+    """
+    Snapshots the Recipes and Curated Menus tables into `directory` (default: the
+    corpus dir under the data dir), one file per table. Falls back to JSON lines
+    without pyarrow.
+
+    Returns:
+        Records written per table.
+    """
+    from .airtable_client import get_airtable_client
+    from .menu_retriever import CURATED_MENU_FIELDS, CURATED_MENUS_TABLE_NAME
+
+    if pa is None and file_format != "jsonl":
+        print("pyarrow is not installed; writing JSON lines instead.")
+        file_format = "jsonl"
+    directory = directory or get_data_dir(DEFAULT_CORPUS_DIR)
+    os.makedirs(directory, exist_ok=True)
+
+    sources = {
+        RECIPES_NAME: (client or get_airtable_client(), RECIPE_EXPORT_FIELDS),
+        CURATED_MENUS_NAME: (menus_client or get_airtable_client(CURATED_MENUS_TABLE_NAME), CURATED_MENU_FIELDS),
+    }
+    counts = {}
+    for name, (table_client, fields) in sources.items():
+        path = _snapshot_path(directory, name, file_format)
+        counts[name] = write_snapshot(table_client.iter_record_pages(fields=fields), path, name, file_format, batch_rows)
+        print(f"Wrote {counts[name]} {name.replace('_', ' ')} to {path}")
+    return counts
+
+
+# --- Import ---
+
+def _find_snapshot(directory: Optional[str], name: str) -> str:
+    directory = directory or get_data_dir(DEFAULT_CORPUS_DIR)
+    formats = ["arrow", "parquet", "jsonl"] if pa is not None else ["jsonl"]
+    for file_format in formats:
+        path = _snapshot_path(directory, name, file_format)
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError(f"No {name} snapshot in {directory}; run `python -m recipe_ingestion.corpus_export export`.")
+
+
+def read_table(path: str):
+    """
+    The snapshot at `path` as a pyarrow Table. IPC files are memory-mapped, so the
+    columns point into the file instead of being copied into memory.
+    """
+    if path.endswith(".parquet"):
+        return pq.read_table(path, memory_map=True)
+    return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+
+def load_recipe_table(directory: Optional[str] = None):
+    """The Recipes snapshot as a pyarrow Table, for analytics (needs pyarrow)."""
+    if pa is None:
+        raise ImportError("load_recipe_table needs pyarrow; use load_recipes instead.")
+    return read_table(_find_snapshot(directory, RECIPES_NAME))
+
+
+def _dictionary_column(column) -> list:
+    """Values of a dictionary column, decoding each chunk's dictionary once (strings interned)."""
+    values = []
+    for chunk in column.chunks:
+        dictionary = [sys.intern(value) for value in chunk.dictionary.to_pylist()]
+        values.extend(dictionary[i] if i is not None else None for i in chunk.indices.to_pylist())
+    return values
+
+
+def _list_column(column, decode_tags: bool) -> list:
+    """Values of a list column as tuples; list<dictionary> values become shared tag tuples."""
+    values = []
+    for chunk in column.chunks:
+        offsets = chunk.offsets.to_pylist()
+        if decode_tags:
+            dictionary = chunk.values.dictionary.to_pylist()
+            flat = [dictionary[i] for i in chunk.values.indices.to_pylist()]
+            values.extend(intern_tags(flat[start:end]) for start, end in zip(offsets, offsets[1:]))
+        else:
+            flat = chunk.values.to_pylist()
+            values.extend(tuple(flat[start:end]) for start, end in zip(offsets, offsets[1:]))
+    return values
+
+
+def recipes_from_table(table) -> List[Recipe]:
+    """Recipe objects from a Recipes table, converted column by column."""
+    columns = {}
+    for name, kind in RECIPE_COLUMNS.items():
+        column = table.column(name)
+        if kind == "dictionary":
+            columns[name] = _dictionary_column(column)
+        elif kind.startswith("list"):
+            columns[name] = _list_column(column, decode_tags=kind == "list<dictionary>")
+        else:
+            columns[name] = column.to_pylist()
+
+    recipes = []
+    new = Recipe.__new__
+    for (record_id, title, url, host, image, ingredients, course, seasons, diet_tags, tagging_status,
+         approved, total_minutes, servings_min, servings_max) in zip(*(columns[name] for name in RECIPE_COLUMNS)):
+        # Same direct slot filling as Recipe.from_airtable
+        recipe = new(Recipe)
+        recipe.record_id, recipe.title, recipe.url, recipe.host, recipe.image = record_id, title, url, host, image
+        recipe.ingredients, recipe.instructions, recipe.yields, recipe.total_time = ingredients, (), None, None
+        recipe.course, recipe.seasons, recipe.diet_tags = course, seasons, diet_tags
+        recipe.tagging_status, recipe.approved = tagging_status, approved
+        recipe.total_minutes, recipe.servings_min, recipe.servings_max = total_minutes, servings_min, servings_max
+        recipes.append(recipe)
+    return recipes
+
+
+def _read_jsonl(path: str) -> Iterator[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def load_recipes(directory: Optional[str] = None) -> List[Recipe]:
+    """All recipes in the snapshot, as Recipe objects."""
+    path = _find_snapshot(directory, RECIPES_NAME)
+    if path.endswith(".jsonl"):
+        return Recipe.from_airtable_records(_read_jsonl(path))
+    return recipes_from_table(read_table(path))
+
+
+def load_curated_menus(directory: Optional[str] = None) -> List[dict]:
+    """All curated menus in the snapshot, as Airtable records ({"id", "fields"})."""
+    path = _find_snapshot(directory, CURATED_MENUS_NAME)
+    if path.endswith(".jsonl"):
+        return list(_read_jsonl(path))
+    records = []
+    for row in read_table(path).to_pylist():
+        record_id = row.pop("id")
+        records.append({"id": record_id, "fields": {k: v for k, v in row.items() if v is not None}})
+    return records
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Export or inspect columnar snapshots of the Airtable tables.")
+    parser.add_argument("command", choices=["export", "info"])
+    parser.add_argument("--dir", help="Snapshot directory (default: the corpus dir under the data dir).")
+    parser.add_argument("--format", choices=["arrow", "parquet", "jsonl"], default="arrow")
+    parser.add_argument("--batch-rows", type=int, default=DEFAULT_BATCH_ROWS)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        start_time = time.perf_counter()
+        export_corpus(args.dir, args.format, batch_rows=args.batch_rows)
+        print(f"Exported in {time.perf_counter() - start_time:.1f}s")
+    else:
+        start_time = time.perf_counter()
+        recipes = load_recipes(args.dir)
+        menus = load_curated_menus(args.dir)
+        print(f"{len(recipes)} recipes and {len(menus)} curated menus loaded in "
+              f"{time.perf_counter() - start_time:.3f}s")
@@ -0,0 +1,280 @@
+import base64
+import hashlib
+import json
+import os
+import random
+import re
+from array import array
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from .config import get_data_dir
+
+# --- URL canonicalisation ---
+
+# Query parameters that identify the actual post; everything else (utm_*, fbclid,
+# replytocom, share ids, ...) is dropped
+KEEP_QUERY_PARAMS = {"p", "page_id", "recipe"}
+# Path suffixes that point at an alternate rendering of the same post
+ALTERNATE_PATH_SUFFIXES = ("/amp", "/print")
+
+def canonicalize_url(url: str) -> str:
+    """
+    Normalises a recipe URL so variants of the same post compare equal:
+    https scheme, lowercase host without "www.", no fragment, no tracking query
+    parameters, no trailing slash and no /amp or /print suffix.
+    """
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if host.endswith(":80") or host.endswith(":443"):
+        host = host.rsplit(":", 1)[0]
+
+    path = re.sub(r"/{2,}", "/", parts.path) or "/"
+    path = path.rstrip("/")
+    for suffix in ALTERNATE_PATH_SUFFIXES:
+        if path.endswith(suffix):
+            path = path[: -len(suffix)]
+    path = path or "/"
+
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query) if k in KEEP_QUERY_PARAMS))
+    return urlunsplit(("https", host, path, query, ""))
+
+
+# --- Shingling ---
+
+# Quantities, units and filler words say nothing about which recipe it is
+_STOPWORDS = {
+    "a", "an", "and", "or", "of", "the", "to", "for", "with", "in", "into", "at", "on", "about",
+    "cup", "cups", "tablespoon", "tablespoons", "tbsp", "teaspoon", "teaspoons", "tsp",
+    "pound", "pounds", "lb", "lbs", "ounce", "ounces", "oz", "gram", "grams", "g", "kg", "ml", "l",
+    "pinch", "dash", "large", "medium", "small", "whole", "plus", "more", "taste", "optional",
+    "chopped", "diced", "minced", "sliced", "finely", "thinly", "roughly", "fresh", "freshly", "divided",
+    "recipe", "best", "easy",
+}
+_WORD_RE = re.compile(r"[a-z]+")
+
+def _words(text: str) -> List[str]:
+    return [w for w in _WORD_RE.findall(text.lower()) if len(w) > 1 and w not in _STOPWORDS]
+
+def recipe_shingles(title: Optional[str], ingredients: Iterable[str]) -> Set[str]:
+    """
+    Builds the shingle set for a recipe: title words and word pairs, plus the words
+    and adjacent word pairs of every ingredient line, with quantities and units removed.
+    """
+    shingles = set()
+    title_words = _words(title or "")
+    shingles.update(f"t:{w}" for w in title_words)
+    shingles.update(f"t:{a} {b}" for a, b in zip(title_words, title_words[1:]))
+    for line in ingredients:
+        words = _words(line)
+        shingles.update(f"i:{w}" for w in words)
+        shingles.update(f"i:{a} {b}" for a, b in zip(words, words[1:]))
+    return shingles
+
+
+# --- MinHash / LSH ---
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 64) - 1
+
+def _shingle_hash(shingle: str) -> int:
+    # Stable across processes, unlike hash(), so persisted signatures stay valid
+    return int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class MinHashLSH:
+    """
+    MinHash signatures bucketed with banded LSH, so candidates for a new recipe are
+    found by looking up `bands` buckets instead of comparing against every stored recipe.
+    """
+
+    def __init__(self, num_perm: int = 128, bands: int = 32, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands.")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.seed = seed
+        rng = random.Random(seed)
+        self._perms = [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME)) for _ in range(num_perm)]
+        self.signatures: Dict[str, Tuple[int, ...]] = {}
+        self._buckets: List[Dict[Tuple[int, ...], List[str]]] = [{} for _ in range(bands)]
+
+    def signature(self, shingles: Iterable[str]) -> Tuple[int, ...]:
+        hashes = [_shingle_hash(s) for s in shingles]
+        if not hashes:
+            return tuple([_MAX_HASH] * self.num_perm)
+        p = _MERSENNE_PRIME
+        return tuple(min([(a * h + b) % p for h in hashes]) for a, b in self._perms)
+
+    def _band_keys(self, sig: Tuple[int, ...]):
+        rows = self.rows
+        for band in range(self.bands):
+            yield band, sig[band * rows:(band + 1) * rows]
+
+    def add(self, key: str, sig: Tuple[int, ...]) -> None:
+        if key in self.signatures:
+            return
+        self.signatures[key] = sig
+        for band, band_key in self._band_keys(sig):
+            self._buckets[band].setdefault(band_key, []).append(key)
+
+    def query(self, sig: Tuple[int, ...], threshold: float) -> List[Tuple[str, float]]:
+        """Stored keys whose estimated Jaccard similarity with `sig` is at least `threshold`, best first."""
+        candidates = set()
+        for band, band_key in self._band_keys(sig):
+            candidates.update(self._buckets[band].get(band_key, ()))
+        matches = []
+        for key in candidates:
+            other = self.signatures[key]
+            similarity = sum(1 for x, y in zip(sig, other) if x == y) / self.num_perm
+            if similarity >= threshold:
+                matches.append((key, similarity))
+        return sorted(matches, key=lambda m: m[1], reverse=True)
+
+
+# --- Persistent duplicate index ---
+
+DEFAULT_DEDUP_INDEX_FILE = "dedup_index.json"
+DEFAULT_SIMILARITY_THRESHOLD = 0.7
+# Recipes with fewer shingles (no title or ingredients scraped) are too sparse to
+# compare: their signatures would all match each other
+MIN_DEDUP_SHINGLES = 3
+
+class RecipeDeduplicator:
+    """
+    Local, persisted index of already-ingested recipes, checked before add_record.
+
+    A recipe is a duplicate if its canonical URL was seen before, or if its title and
+    ingredient shingles are near-identical (estimated Jaccard >= `threshold`) to a
+    stored recipe, e.g. a repost or a cross-site copy.
+    """
+
+    def __init__(self, path: Optional[str] = None, threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+                 num_perm: int = 128, bands: int = 32):
+        self.path = path or os.path.join(get_data_dir(), DEFAULT_DEDUP_INDEX_FILE)
+        self.threshold = threshold
+        self.lsh = MinHashLSH(num_perm=num_perm, bands=bands)
+        self.urls: Dict[str, str] = {}  # canonical URL -> key (Airtable record id or URL)
+        self.titles: Dict[str, str] = {}  # key -> title, for log messages
+        self._dirty = False
+
+    @classmethod
+    def load(cls, path: Optional[str] = None, bootstrap: bool = False, **kwargs) -> "RecipeDeduplicator":
+        """
+        Loads the index from `path`. If the file does not exist yet, it is built from
+        the recipes already in Airtable (and saved) with `bootstrap`; otherwise an
+        empty index is returned, with a warning, since it won't skip anything.
+        """
+        dedup = cls(path, **kwargs)
+        if not os.path.exists(dedup.path):
+            if not bootstrap:
+                print(f"Warning: no dedup index at {dedup.path}, so recipes already in Airtable won't be "
+                      f"skipped. Build it with `python -m recipe_ingestion.dedup`.")
+                return dedup
+            print(f"No dedup index at {dedup.path}; building it from the recipes in Airtable...")
+            try:
+                added = dedup.add_from_airtable()
+            except Exception as e:
+                print(f"Warning: could not build the dedup index from Airtable ({e}); starting with an empty one.")
+                return dedup
+            dedup.save()
+            print(f"Indexed {added} recipes into {dedup.path}")
+            return dedup
+        with open(dedup.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("num_perm") != dedup.lsh.num_perm or data.get("seed") != dedup.lsh.seed:
+            print(f"Dedup index at {dedup.path} uses different MinHash settings; starting a new one.")
+            return dedup
+        for key, entry in data.get("recipes", {}).items():
+            sig = tuple(array("Q", base64.b64decode(entry["sig"]))) if entry.get("sig") else ()
+            # Older indexes stored the all-max signature of recipes with no shingles; drop it
+            if sig and min(sig) != _MAX_HASH:
+                dedup.lsh.add(key, sig)
+            dedup.titles[key] = entry.get("title") or ""
+            if entry.get("url"):
+                dedup.urls[entry["url"]] = key
+        print(f"Loaded dedup index with {len(dedup)} recipes from {dedup.path}")
+        return dedup
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        keys_to_url = {key: url for url, key in self.urls.items()}
+        data = {
+            "num_perm": self.lsh.num_perm,
+            "seed": self.lsh.seed,
+            "recipes": {
+                key: {
+                    "url": keys_to_url.get(key),
+                    "title": self.titles.get(key, ""),
+                    "sig": base64.b64encode(array("Q", sig).tobytes()).decode("ascii") if sig else None,
+                }
+                for key, sig in ((key, self.lsh.signatures.get(key)) for key in self.titles)
+            },
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+    def __len__(self):
+        return len(self.titles)
+
+    def has_url(self, url: str) -> bool:
+        return canonicalize_url(url) in self.urls
+
+    def find_duplicate(self, title: Optional[str], ingredients: Iterable[str], url: Optional[str] = None) -> Optional[str]:
+        """
+        Returns a short description of the stored recipe this one duplicates, or None.
+        """
+        if url:
+            key = self.urls.get(canonicalize_url(url))
+            if key is not None:
+                return f"same URL as '{self.titles.get(key) or key}'"
+        shingles = recipe_shingles(title, ingredients)
+        if len(shingles) < MIN_DEDUP_SHINGLES:
+            return None
+        matches = self.lsh.query(self.lsh.signature(shingles), self.threshold)
+        if matches:
+            key, similarity = matches[0]
+            return f"{similarity:.0%} similar to '{self.titles.get(key) or key}'"
+        return None
+
+    def add(self, key: str, title: Optional[str], ingredients: Iterable[str], url: Optional[str] = None) -> None:
+        if url:
+            self.urls[canonicalize_url(url)] = key
+        self.titles[key] = title or ""
+        shingles = recipe_shingles(title, ingredients)
+        if len(shingles) >= MIN_DEDUP_SHINGLES:
+            self.lsh.add(key, self.lsh.signature(shingles))
+        self._dirty = True
+
+    def add_airtable_records(self, records: Iterable[dict]) -> int:
+        """Adds existing Airtable recipe records (Title, Source URL, Ingredients (raw)); returns how many."""
+        count = 0
+        for record in records:
+            fields = record.get("fields", {})
+            ingredients = (fields.get("Ingredients (raw)") or "").split("\n")
+            self.add(record.get("id") or fields.get("Source URL"), fields.get("Title"), ingredients, fields.get("Source URL"))
+            count += 1
+        return count
+
+    def add_from_airtable(self, client=None) -> int:
+        """Adds every recipe already in the Airtable table; returns how many."""
+        from .airtable_client import get_airtable_client
+
+        client = client or get_airtable_client()
+        return self.add_airtable_records(client.get_all_records(fields=["Title", "Source URL", "Ingredients (raw)"]))
+
+
+if __name__ == "__main__":
+    # Rebuild the local index from everything already in Airtable
+    print("Rebuilding dedup index from Airtable...")
+    dedup = RecipeDeduplicator()
+    added = dedup.add_from_airtable()
+    dedup.save()
+    print(f"Indexed {added} recipes into {dedup.path}")
@@ -0,0 +1,120 @@
+"""
+Parsing of recipe durations and yields into numbers.
+
+    parse_duration_minutes("1 hour 30 minutes")  -> 90
+    parse_duration_minutes("PT1H30M")            -> 90
+    parse_duration_minutes("30-40 mins")         -> 40   (ranges give the upper bound)
+    parse_servings("Serves 4–6")                 -> (4, 6)
+    parse_servings("Makes 24 cookies")           -> None (a count of items, not servings)
+"""
+import re
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from .ingredient_parser import normalize_line
+
+_ISO_RE = re.compile(
+    r"^p(?:(?P<days>\d+(?:\.\d+)?)d)?"
+    r"(?:t(?:(?P<hours>\d+(?:\.\d+)?)h)?(?:(?P<minutes>\d+(?:\.\d+)?)m)?(?:(?P<seconds>\d+(?:\.\d+)?)s)?)?$")
+_NUMBER = r"\d+/\d+|\d+(?:\.\d+)?(?: \d+/\d+)?"
+_DURATION_PART_RE = re.compile(
+    rf"(?P<low>{_NUMBER})(?: ?(?:-|to) ?(?P<high>{_NUMBER}))? ?"
+    r"(?P<unit>days?|hours?|hrs?|h|minutes?|mins?|m|seconds?|secs?|s)\b")
+_UNIT_MINUTES = {"d": 24 * 60, "h": 60, "m": 1, "s": 1 / 60}
+# "1:30" as hours:minutes, when that is the whole value
+_CLOCK_RE = re.compile(r"^(\d+):([0-5]\d)$")
+
+_SERVINGS_RANGE_RE = re.compile(r"(?P<low>\d+)(?: ?(?:-|to|or) ?(?P<high>\d+))?")
+_SERVING_WORDS_RE = re.compile(r"\b(?:serv\w*|people|persons?|portions?)\b")
+
+
+def _number(text: Optional[str]) -> Optional[float]:
+    if not text:
+        return None
+    total = 0.0
+    for part in text.split(" "):
+        if "/" in part:
+            numerator, denominator = part.split("/")
+            if not float(denominator):
+                return None
+            total += float(numerator) / float(denominator)
+        else:
+            total += float(part)
+    return total
+
+
+@lru_cache(maxsize=4096)
+def _parse_duration_text(text: str) -> Optional[int]:
+    text = normalize_line(text)
+    iso = _ISO_RE.match(text.replace(" ", ""))
+    if iso and any(iso.groupdict().values()):
+        minutes = sum(float(iso.group(unit) or 0) * _UNIT_MINUTES[unit[0]]
+                      for unit in ("days", "hours", "minutes", "seconds"))
+        return round(minutes) or None
+    clock = _CLOCK_RE.match(text)
+    if clock:
+        return int(clock.group(1)) * 60 + int(clock.group(2)) or None
+
+    # "Prep Time 15 mins Cook Time 30 mins Total Time 45 mins": only the total counts
+    total_at = text.rfind("total")
+    if total_at > 0:
+        text = text[total_at:]
+    minutes = 0.0
+    for part in _DURATION_PART_RE.finditer(text):
+        amount = _number(part.group("high")) or _number(part.group("low")) or 0.0
+        minutes += amount * _UNIT_MINUTES[part.group("unit")[0]]
+    return round(minutes) or None
+
+
+def parse_duration_minutes(value) -> Optional[int]:
+    """
+    Total minutes in a duration: a number of minutes (recipe-scrapers), an ISO 8601
+    duration ("PT1H30M"), "1:30", or text like "1 1/2 hours" or "Total time: 1 hr 15 mins".
+    Ranges count as their upper bound. Returns None if no duration is found.
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return round(value) if value > 0 else None
+    return _parse_duration_text(str(value))
+
+
+@lru_cache(maxsize=4096)
+def _parse_servings_text(text: str) -> Optional[Tuple[int, int]]:
+    text = normalize_line(text)
+    match = _SERVINGS_RANGE_RE.search(text)
+    if not match:
+        return None
+    # Only servings: "Serves 4", "4-6 servings", "Yield: 4"; not "Makes 24 cookies"
+    if not (_SERVING_WORDS_RE.search(text) or not text[match.end():].strip(" .)")):
+        return None
+    low = int(match.group("low"))
+    high = int(match.group("high")) if match.group("high") else low
+    if not low or high < low:
+        return None
+    return low, high
+
+
+def parse_servings(value) -> Optional[Tuple[int, int]]:
+    """
+    (min, max) servings from a yield like "Serves 4–6", "4 servings" or 4.
+    Returns None for counts of items ("Makes 24 cookies") or when no number is found.
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return (int(value), int(value)) if value >= 1 else None
+    return _parse_servings_text(str(value))
+
+
+def looks_like_duration_label(text: str, max_length: int = 80) -> bool:
+    """True for short labelled times ("Total Time: 45 minutes"), not paragraphs that mention "time"."""
+    return len(text) <= max_length and "time" in text.lower() and parse_duration_minutes(text) is not None
+
+
+if __name__ == "__main__":
+    import sys
+
+    for value in sys.argv[1:] or ["1 hour 30 minutes", "PT1H30M", "1½ hrs", "30-40 mins", "Serves 4–6",
+                                  "4 servings", "Makes 24 cookies"]:
+        print(f"{value!r:25} -> minutes={parse_duration_minutes(value)}, servings={parse_servings(value)}")
@@ -0,0 +1,419 @@
+"""
+Image stage for scraped recipes: picks a usable photo among the scraped candidate
+images and stores a compact thumbnail of it.
+
+Candidates are fetched concurrently (bounded pool, through the shared rate limiter).
+Broken, non-image, tiny and banner-shaped images are rejected from their headers,
+usually before the rest of the file is downloaded. Photos are compared by perceptual
+hash: variants of one photo count once, and a hash that shows up on several recipes
+(a logo or placeholder) is rejected. A recipe is always given its own image: a stored
+thumbnail is reused only for an identical image, never for a merely similar one. The
+chosen photo is resized into a WebP thumbnail in a content-addressed store under the
+data dir.
+
+Thumbnails and perceptual hashes need Pillow; without it images are only validated
+(and deduplicated by exact content) and the original URL is attached.
+
+The store is local, but Airtable attachments need a public URL: set
+RECIPE_IMAGE_BASE_URL to where the store directory is served (a bucket or CDN synced
+from it) to attach thumbnails instead of the original images.
+"""
+import hashlib
+import io
+import json
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+import requests
+
+from .config import get_data_dir
+from .rate_limiter import get_rate_limiter
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:
+    Image = None
+
+IMAGE_FETCH_WORKERS = 8
+IMAGE_FETCH_TIMEOUT = 15
+MAX_IMAGE_BYTES = 20 * 1024 * 1024
+# Bytes read before the header is checked, so small images are dropped early
+IMAGE_HEADER_BYTES = 64 * 1024
+MIN_IMAGE_DIMENSION = 300      # icons, avatars, spacers
+MAX_ASPECT_RATIO = 3.0         # banners and logos
+THUMBNAIL_MAX_WIDTH = 800
+THUMBNAIL_QUALITY = 80
+# Perceptual hashes this close (differing bits out of 64) are the same photo
+SAME_IMAGE_DISTANCE = 6
+# A photo found on this many recipes is a site-wide image, not a recipe photo
+SHARED_IMAGE_RECIPES = 3
+IMAGE_INDEX_VERSION = 1
+
+_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+
+class ImageAsset(NamedTuple):
+    source_url: str
+    width: int
+    height: int
+    source_bytes: int
+    key: str                      # perceptual hash ("p:...") or content hash ("s:...") of the source
+    thumbnail: Optional[str]      # path in the store, relative to its root
+    thumbnail_bytes: Optional[int]
+    url: str                      # what to attach: the public thumbnail URL, else source_url (the recipe's own image)
+
+
+class _Fetched(NamedTuple):
+    url: str
+    data: Optional[bytes]
+    size: Optional[Tuple[int, int]]
+    key: Optional[str]
+    hash_value: Optional[int]     # perceptual hash as an int, for distance checks
+    error: Optional[str]
+
+
+# --- Header parsing (no Pillow needed) ---
+
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def image_size(data: bytes) -> Optional[Tuple[int, int]]:
+    """(width, height) from the header of a JPEG, PNG, GIF or WebP; None if unknown or truncated."""
+    try:
+        if data[:8] == b"\x89PNG\r\n\x1a\n":
+            return struct.unpack(">II", data[16:24])
+        if data[:4] == b"GIF8":
+            return struct.unpack("<HH", data[6:10])
+        if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+            chunk = data[12:16]
+            if chunk == b"VP8 ":
+                width, height = struct.unpack("<HH", data[26:30])
+                return width & 0x3FFF, height & 0x3FFF
+            if chunk == b"VP8L":
+                b0, b1, b2, b3 = data[21:25]
+                return 1 + (((b1 & 0x3F) << 8) | b0), 1 + (((b3 & 0x0F) << 10) | (b2 << 2) | ((b1 & 0xC0) >> 6))
+            if chunk == b"VP8X":
+                return 1 + int.from_bytes(data[24:27], "little"), 1 + int.from_bytes(data[27:30], "little")
+            return None
+        if data[:2] == b"\xff\xd8":
+            position = 2
+            while position + 9 < len(data):
+                if data[position] != 0xFF:
+                    return None
+                marker = data[position + 1]
+                if marker in _JPEG_SOF_MARKERS:
+                    height, width = struct.unpack(">HH", data[position + 5:position + 9])
+                    return width, height
+                position += 2 + struct.unpack(">H", data[position + 2:position + 4])[0]
+    except (struct.error, ValueError):
+        return None
+    return None
+
+
+def _reject_reason(size: Optional[Tuple[int, int]]) -> Optional[str]:
+    if size is None:
+        return "not a readable image"
+    width, height = size
+    if min(width, height) < MIN_IMAGE_DIMENSION:
+        return f"too small ({width}x{height})"
+    if max(width, height) > MAX_ASPECT_RATIO * min(width, height):
+        return f"banner-shaped ({width}x{height})"
+    return None
+
+
+def perceptual_hash(data: bytes) -> Optional[int]:
+    """64-bit difference hash of an image (None without Pillow or for undecodable data)."""
+    if Image is None:
+        return None
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            img.draft("L", (64, 64))  # JPEGs decode at a fraction of full size
+            pixels = list(img.convert("L").resize((9, 8), Image.LANCZOS).getdata())
+    except Exception:
+        return None
+    value = 0
+    for row in range(8):
+        for column in range(8):
+            value = (value << 1) | (pixels[row * 9 + column] > pixels[row * 9 + column + 1])
+    return value
+
+
+def _distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+# Hashes within SAME_IMAGE_DISTANCE bits differ in at most that many of these bit
+# ranges, so they share at least one range exactly; the store buckets hashes by range
+# and only compares a new hash against the ones sharing a bucket
+_HASH_BAND_EDGES = [band * 64 // (SAME_IMAGE_DISTANCE + 1) for band in range(SAME_IMAGE_DISTANCE + 2)]
+_HASH_BANDS = tuple((low, (1 << (high - low)) - 1) for low, high in zip(_HASH_BAND_EDGES, _HASH_BAND_EDGES[1:]))
+
+def _hash_buckets(hash_value: int):
+    for band, (shift, mask) in enumerate(_HASH_BANDS):
+        yield band, (hash_value >> shift) & mask
+
+
+def make_thumbnail(data: bytes) -> Optional[Tuple[bytes, str]]:
+    """
+    Resizes an image to at most THUMBNAIL_MAX_WIDTH wide. Returns (bytes, extension),
+    WebP if this Pillow can write it, else JPEG; None without Pillow or on failure.
+    """
+    if Image is None:
+        return None
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            img.draft("RGB", (THUMBNAIL_MAX_WIDTH, THUMBNAIL_MAX_WIDTH))
+            img = ImageOps.exif_transpose(img)
+            has_alpha = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+            img = img.convert("RGBA" if has_alpha else "RGB")
+            img.thumbnail((THUMBNAIL_MAX_WIDTH, int(THUMBNAIL_MAX_WIDTH * MAX_ASPECT_RATIO)), Image.LANCZOS)
+            out = io.BytesIO()
+            if features.check("webp"):
+                img.save(out, "WEBP", quality=THUMBNAIL_QUALITY, method=4)
+                return out.getvalue(), "webp"
+            img.convert("RGB").save(out, "JPEG", quality=THUMBNAIL_QUALITY, optimize=True, progressive=True)
+            return out.getvalue(), "jpg"
+    except Exception as e:
+        print(f"Error making thumbnail: {e}")
+        return None
+
+
+# --- Content-addressed store ---
+
+class ImageStore:
+    """
+    Thumbnails stored by content hash (ab/cdef...webp) under the data dir, plus an
+    index from source image hash to its thumbnail and the recipes that use it.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or get_data_dir("images")
+        self.index_path = os.path.join(self.root, "index.json")
+        self.images: Dict[str, dict] = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == IMAGE_INDEX_VERSION:
+                self.images = data["images"]
+        self._hashes: Dict[int, str] = {}  # perceptual hash -> key
+        self._buckets: Dict[Tuple[int, int], List[int]] = {}  # (band, bits) -> hashes
+        for key in self.images:
+            if key.startswith("p:"):
+                self._add_hash(int(key[2:], 16), key)
+        self._dirty = False
+
+    def _add_hash(self, hash_value: int, key: str) -> None:
+        if hash_value not in self._hashes:
+            for bucket in _hash_buckets(hash_value):
+                self._buckets.setdefault(bucket, []).append(hash_value)
+        self._hashes[hash_value] = key
+
+    def find(self, key: str, hash_value: Optional[int]) -> Optional[str]:
+        """The stored key of the same image: the exact key, or a perceptual hash within SAME_IMAGE_DISTANCE."""
+        if key in self.images:
+            return key
+        if hash_value is not None:
+            for bucket in _hash_buckets(hash_value):
+                for stored in self._buckets.get(bucket, ()):
+                    if _distance(stored, hash_value) <= SAME_IMAGE_DISTANCE:
+                        return self._hashes[stored]
+        return None
+
+    def put(self, data: bytes, extension: str) -> str:
+        """Writes `data` under its content hash (once) and returns its path relative to the store."""
+        digest = hashlib.sha256(data).hexdigest()
+        relative = f"{digest[:2]}/{digest[2:]}.{extension}"
+        path = os.path.join(self.root, relative)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return relative
+
+    def record(self, key: str, hash_value: Optional[int], entry: dict) -> None:
+        self.images[key] = entry
+        if hash_value is not None:
+            self._add_hash(hash_value, key)
+        self._dirty = True
+
+    def add_recipe(self, key: str, recipe_url: str) -> None:
+        recipes = self.images[key].setdefault("recipes", [])
+        if recipe_url not in recipes:
+            recipes.append(recipe_url)
+            self._dirty = True
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": IMAGE_INDEX_VERSION, "images": self.images}, f, separators=(",", ":"))
+        os.replace(tmp_path, self.index_path)
+        self._dirty = False
+
+
+# --- Pipeline ---
+
+class ImagePipeline:
+    """
+    Chooses and stores one image per recipe from its candidate URLs (best first).
+
+    `process_many` fetches the candidates of a whole batch of recipes in one bounded
+    pool; choosing between them and updating the store happen on the calling thread.
+    """
+
+    def __init__(self, store: Optional[ImageStore] = None, max_workers: int = IMAGE_FETCH_WORKERS,
+                 rate_limiter=None, public_base_url: Optional[str] = None):
+        self.store = store or ImageStore()
+        self.max_workers = max_workers
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        base_url = public_base_url or os.getenv("RECIPE_IMAGE_BASE_URL")
+        self.public_base_url = base_url.rstrip("/") + "/" if base_url else None
+        self.headers = {"User-Agent": _USER_AGENT, "Accept": "image/webp,image/*;q=0.8"}
+        if Image is not None and self.public_base_url is None:
+            print("Warning: RECIPE_IMAGE_BASE_URL is not set, so thumbnails are stored but the original "
+                  "image URLs are attached. Serve the image store and set it to attach the thumbnails.")
+
+    def _fetch(self, url: str) -> _Fetched:
+        """Downloads one candidate, stopping early if its header already rules it out."""
+        host = urlparse(url).netloc
+        try:
+            with self.rate_limiter.request(host) as ticket:
+                with requests.get(url, headers=self.headers, timeout=IMAGE_FETCH_TIMEOUT, stream=True) as response:
+                    ticket.record(response.status_code, response.headers.get("Retry-After"))
+                    response.raise_for_status()
+                    content_type = response.headers.get("Content-Type", "")
+                    if content_type and not content_type.startswith("image/"):
+                        return _Fetched(url, None, None, None, None, f"not an image ({content_type})")
+                    buffer = bytearray()
+                    size = None
+                    for chunk in response.iter_content(IMAGE_HEADER_BYTES):
+                        if not buffer:
+                            size = image_size(chunk)
+                            if size and _reject_reason(size):
+                                return _Fetched(url, None, size, None, None, _reject_reason(size))
+                        buffer += chunk
+                        if len(buffer) > MAX_IMAGE_BYTES:
+                            return _Fetched(url, None, size, None, None, "too large")
+        except requests.exceptions.RequestException as e:
+            return _Fetched(url, None, None, None, None, str(e))
+
+        data = bytes(buffer)
+        size = size or image_size(data)
+        reason = _reject_reason(size)
+        if reason:
+            return _Fetched(url, None, size, None, None, reason)
+        hash_value = perceptual_hash(data)
+        key = f"p:{hash_value:016x}" if hash_value is not None else "s:" + hashlib.sha256(data).hexdigest()
+        return _Fetched(url, data, size, key, hash_value, None)
+
+    def _choose(self, recipe_url: str, fetched: Sequence[_Fetched]) -> Optional[Tuple[_Fetched, Optional[str]]]:
+        """First candidate that is valid and not a site-wide image, with its stored key if already known."""
+        for candidate in fetched:
+            if candidate.error:
+                print(f"Image rejected for {recipe_url}: {candidate.url}: {candidate.error}")
+                continue
+            stored_key = self.store.find(candidate.key, candidate.hash_value)
+            if stored_key is not None:
+                recipes = self.store.images[stored_key].get("recipes", [])
+                if recipe_url not in recipes and len(recipes) + 1 >= SHARED_IMAGE_RECIPES:
+                    print(f"Image rejected for {recipe_url}: {candidate.url}: shared by {len(recipes)} other recipes")
+                    continue
+            return candidate, stored_key
+        return None
+
+    def _asset(self, key: str, candidate: _Fetched) -> ImageAsset:
+        """
+        The asset for a chosen candidate. The stored thumbnail is used only if it was
+        made from this exact image: a perceptual near-match (stored under another key)
+        may be a different photo, so then the candidate's own URL is attached.
+        """
+        entry = self.store.images[key]
+        thumbnail = entry.get("thumbnail") if key == candidate.key else None
+        url = self.public_base_url + thumbnail if thumbnail and self.public_base_url else candidate.url
+        return ImageAsset(candidate.url, candidate.size[0], candidate.size[1], len(candidate.data), key,
+                          thumbnail, entry.get("thumbnail_bytes") if thumbnail else None, url)
+
+    def process_many(self, items: Sequence[Tuple[str, Sequence[str]]]) -> List[Optional[ImageAsset]]:
+        """
+        Args:
+            items: (recipe URL, candidate image URLs in order of preference) pairs.
+
+        Returns:
+            The chosen ImageAsset for each recipe, in order; None if no candidate passed.
+        """
+        urls = sorted({url for _, candidates in items for url in candidates if url})
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            fetched = dict(zip(urls, pool.map(self._fetch, urls)))
+
+            # Choose in order and record right away, so an image repeated within the
+            # batch counts towards SHARED_IMAGE_RECIPES for the recipes after it
+            chosen: List[Optional[Tuple[str, _Fetched]]] = []
+            new: Dict[str, _Fetched] = {}
+            for recipe_url, candidates in items:
+                choice = self._choose(recipe_url, [fetched[url] for url in dict.fromkeys(candidates) if url])
+                if choice is None:
+                    chosen.append(None)
+                    continue
+                candidate, key = choice
+                if key is None:
+                    key = candidate.key
+                    self.store.record(key, candidate.hash_value, {
+                        "source_url": candidate.url, "width": candidate.size[0], "height": candidate.size[1],
+                        "source_bytes": len(candidate.data)})
+                    new[key] = candidate
+                self.store.add_recipe(key, recipe_url)
+                chosen.append((key, candidate))
+
+            # Thumbnails only for images the store has not seen, also in the pool
+            thumbnails = pool.map(lambda candidate: make_thumbnail(candidate.data), new.values())
+            for (key, candidate), thumbnail in zip(new.items(), thumbnails):
+                # Keep the original when it is already smaller than the thumbnail would be
+                if thumbnail and len(thumbnail[0]) < len(candidate.data):
+                    self.store.images[key]["thumbnail"] = self.store.put(*thumbnail)
+                    self.store.images[key]["thumbnail_bytes"] = len(thumbnail[0])
+
+        self.store.save()
+        return [self._asset(*choice) if choice else None for choice in chosen]
+
+    def process(self, recipe_url: str, candidates: Sequence[str]) -> Optional[ImageAsset]:
+        return self.process_many([(recipe_url, candidates)])[0]
+
+
+def _candidate_urls(scraped_data: dict) -> List[str]:
+    """Candidate image URLs of a scrape_recipe result, best first."""
+    return scraped_data.get('image_candidates') or ([scraped_data['image']] if scraped_data.get('image') else [])
+
+
+def attach_images(scraped_recipes: Sequence[dict], pipeline: ImagePipeline) -> None:
+    """Replaces each scraped recipe's 'image' with its chosen asset's URL (None if none passed)."""
+    assets = pipeline.process_many([(data.get('url'), _candidate_urls(data)) for data in scraped_recipes])
+    for data, asset in zip(scraped_recipes, assets):
+        data['image'] = asset.url if asset else None
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pick and store a compact image from candidate image URLs.")
+    parser.add_argument("candidates", nargs="*", help="Candidate image URLs, best first.")
+    parser.add_argument("--recipe-url", default="manual", help="Recipe the image is for (used for shared-image detection).")
+    parser.add_argument("--stats", action="store_true", help="Print store statistics.")
+    args = parser.parse_args()
+
+    if Image is None:
+        print("Pillow is not installed: images are validated but not resized or perceptually hashed.")
+    image_pipeline = ImagePipeline()
+    if args.candidates:
+        chosen = image_pipeline.process(args.recipe_url, args.candidates)
+        print(chosen if chosen else "No usable image.")
+    if args.stats:
+        entries = image_pipeline.store.images.values()
+        source_bytes = sum(e["source_bytes"] for e in entries)
+        stored_bytes = sum(e.get("thumbnail_bytes") or e["source_bytes"] for e in entries)
+        print(f"{len(entries)} images; sources {source_bytes / 1e6:.1f} MB, attached {stored_bytes / 1e6:.1f} MB")
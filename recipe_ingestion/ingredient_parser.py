@@ -0,0 +1,195 @@
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional
+
+# Ingredient lines repeat heavily across recipes ("kosher salt", "1 large egg"), so
+# parses are cached by normalised line; this bounds the cache's memory.
+PARSE_CACHE_SIZE = 50_000
+
+
+class ParsedIngredient(NamedTuple):
+    quantity: Optional[float]      # 1.5 for "1 1/2 cups"; the low end of a range
+    quantity_max: Optional[float]  # 3 for "2-3 cloves", else None
+    unit: Optional[str]            # canonical unit ("tablespoon"), None for "2 eggs"
+    name: str                      # "unsalted butter"
+    comment: Optional[str]         # text after the first comma and parentheticals: "softened"
+
+
+# Canonical unit -> spellings (after lower-casing; trailing periods are stripped)
+UNITS = {
+    "teaspoon": ["teaspoon", "teaspoons", "tsp", "tsps"],
+    "tablespoon": ["tablespoon", "tablespoons", "tbsp", "tbsps", "tbs", "tbl"],
+    "cup": ["cup", "cups", "c"],
+    "fluid ounce": ["fl oz", "fluid ounce", "fluid ounces"],
+    "ounce": ["ounce", "ounces", "oz"],
+    "pound": ["pound", "pounds", "lb", "lbs"],
+    "gram": ["gram", "grams", "g"],
+    "kilogram": ["kilogram", "kilograms", "kg"],
+    "milliliter": ["milliliter", "milliliters", "millilitre", "millilitres", "ml"],
+    "liter": ["liter", "liters", "litre", "litres", "l"],
+    "pint": ["pint", "pints", "pt"],
+    "quart": ["quart", "quarts", "qt"],
+    "pinch": ["pinch", "pinches"],
+    "dash": ["dash", "dashes"],
+    "clove": ["clove", "cloves"],
+    "can": ["can", "cans"],
+    "stick": ["stick", "sticks"],
+    "slice": ["slice", "slices"],
+    "sprig": ["sprig", "sprigs"],
+    "bunch": ["bunch", "bunches"],
+    "head": ["head", "heads"],
+    "package": ["package", "packages", "pkg"],
+    "jar": ["jar", "jars"],
+    "handful": ["handful", "handfuls"],
+}
+_UNIT_LOOKUP = {spelling: unit for unit, spellings in UNITS.items() for spelling in spellings}
+
+_UNICODE_FRACTIONS = {
+    "½": "1/2", "⅓": "1/3", "⅔": "2/3", "¼": "1/4", "¾": "3/4", "⅕": "1/5",
+    "⅖": "2/5", "⅗": "3/5", "⅘": "4/5", "⅙": "1/6", "⅚": "5/6", "⅛": "1/8",
+    "⅜": "3/8", "⅝": "5/8", "⅞": "7/8",
+}
+_FRACTION_RE = re.compile("(\\d?)([" + "".join(_UNICODE_FRACTIONS) + "])")
+_BULLET_RE = re.compile(r"^[\s\-*•·▢□]+")
+_SPACE_RE = re.compile(r"\s+")
+_NUMBER = r"\d+/\d+|\d+(?:\.\d+)?(?: \d+/\d+)?"
+_QUANTITY_RE = re.compile(rf"^(?P<low>{_NUMBER})(?: ?(?:-|to) ?(?P<high>{_NUMBER}))? ?")
+_PARENTHETICAL_RE = re.compile(r"\s*\(([^)]*)\)")
+_WORD_RE = re.compile(r"[a-z]+")
+
+
+def normalize_line(line: str) -> str:
+    """Lower-cases an ingredient line, expands unicode fractions and collapses whitespace."""
+    line = _FRACTION_RE.sub(lambda m: f"{m.group(1)} {_UNICODE_FRACTIONS[m.group(2)]}" if m.group(1)
+                            else _UNICODE_FRACTIONS[m.group(2)], line)
+    line = line.replace("–", "-").replace("—", "-").replace("⁄", "/")
+    line = _BULLET_RE.sub("", line)
+    return _SPACE_RE.sub(" ", line).strip().lower()
+
+
+def _to_number(text: Optional[str]) -> Optional[float]:
+    if not text:
+        return None
+    total = 0.0
+    for part in text.split(" "):
+        if "/" in part:
+            numerator, denominator = part.split("/")
+            if float(denominator) == 0:
+                return None
+            total += float(numerator) / float(denominator)
+        else:
+            total += float(part)
+    return total
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_normalized(line: str) -> ParsedIngredient:
+    comments = _PARENTHETICAL_RE.findall(line)
+    rest = _PARENTHETICAL_RE.sub("", line).strip()
+
+    quantity = quantity_max = None
+    match = _QUANTITY_RE.match(rest)
+    if match:
+        quantity, quantity_max = _to_number(match.group("low")), _to_number(match.group("high"))
+        rest = rest[match.end():]
+
+    # A parenthetical right after the quantity ("1 (14-ounce) can") was removed above
+    unit = None
+    words = rest.split(" ", 2)
+    if len(words) >= 2 and f"{words[0]} {words[1]}".rstrip(".") in _UNIT_LOOKUP:
+        unit = _UNIT_LOOKUP[f"{words[0]} {words[1]}".rstrip(".")]
+        rest = words[2] if len(words) > 2 else ""
+    elif words[0].rstrip(".") in _UNIT_LOOKUP and (quantity is not None or len(words[0]) > 2):
+        # Single-letter units ("c", "g", "l") only count after a quantity
+        unit = _UNIT_LOOKUP[words[0].rstrip(".")]
+        rest = rest[len(words[0]):].strip()
+    if unit and rest.startswith("of "):
+        rest = rest[3:]
+
+    name, _, comment = rest.partition(",")
+    comment = comment.strip()
+    if comment:
+        comments.insert(0, comment)
+    return ParsedIngredient(quantity, quantity_max, unit, name.strip(), "; ".join(comments) or None)
+
+
+def parse_ingredient(line: str) -> ParsedIngredient:
+    """Parses one ingredient line ("2 tablespoons unsalted butter, softened")."""
+    return _parse_normalized(normalize_line(line))
+
+
+def parse_ingredients(lines: Iterable[str]) -> List[ParsedIngredient]:
+    """Parses a recipe's ingredient lines, skipping blank ones."""
+    return [_parse_normalized(normalized) for normalized in map(normalize_line, lines) if normalized]
+
+
+def parse_corpus(ingredient_lists: Iterable[Iterable[str]]) -> List[List[ParsedIngredient]]:
+    """
+    Parses the ingredient lists of many recipes. Each distinct line is parsed once
+    (and stays in the LRU cache for later calls), so the cost scales with the number
+    of distinct lines rather than the size of the corpus.
+    """
+    seen: Dict[str, ParsedIngredient] = {}
+    parsed = []
+    for lines in ingredient_lists:
+        recipe = []
+        for line in lines:
+            result = seen.get(line)
+            if result is None:
+                normalized = normalize_line(line)
+                if not normalized:
+                    continue
+                result = seen[line] = _parse_normalized(normalized)
+            recipe.append(result)
+        parsed.append(recipe)
+    return parsed
+
+
+def cache_info():
+    return _parse_normalized.cache_info()
+
+
+# --- Terms for tagging and search ---
+
+def singularize(word: str) -> str:
+    """Cheap English singular for ingredient nouns: berries -> berry, tomatoes -> tomato, eggs -> egg."""
+    if len(word) <= 3 or word.endswith(("ss", "us", "is")):
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith(("oes", "ches", "shes", "xes")):
+        return word[:-2]
+    if word.endswith("s"):
+        return word[:-1]
+    return word
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def name_terms(name: str) -> FrozenSet[str]:
+    """
+    Words of an ingredient name plus their singulars, and two-word phrases with the
+    head noun singularised ("sweet potatoes" -> "sweet potato"), for keyword matching.
+    """
+    words = _WORD_RE.findall(name)
+    terms = set(words)
+    terms.update(singularize(word) for word in words)
+    for first, second in zip(words, words[1:]):
+        terms.add(f"{first} {second}")
+        terms.add(f"{first} {singularize(second)}")
+    return frozenset(terms)
+
+
+def ingredient_terms(lines: Iterable[str]) -> FrozenSet[str]:
+    """Matching terms of all ingredient names in a recipe (quantities and units left out)."""
+    terms = set()
+    for parsed in parse_ingredients(lines):
+        terms |= name_terms(parsed.name)
+    return frozenset(terms)
+
+
+if __name__ == "__main__":
+    import sys
+
+    for line in sys.argv[1:] or ["2 tablespoons unsalted butter, softened", "1 (14-ounce) can chickpeas",
+                                 "1½ cups all-purpose flour", "2-3 cloves garlic", "Kosher salt"]:
+        print(f"{line!r:45} -> {parse_ingredient(line)}")
@@ -1,124 +1,473 @@
-import sys
-from dotenv import load_dotenv
+import json
 import os
+import sys
+import time
 from .scraper import EnhancedScraper
 from .tagger import RawDataFormatter
-from .airtable_client import AirtableClient
+from .airtable_client import get_airtable_client
+from .config import get_data_dir
+from .dedup import RecipeDeduplicator, canonicalize_url
+from .query import Query, is_blank
+from .recipe_tagging import tag_scraped_recipes
+from .images import ImagePipeline, attach_images
+from .search_index import SearchIndex
+from .similar_recipes import update_similar_index
+from .records import SERVINGS_MIN, SOURCE_URL, TIME_AND_YIELD_FIELDS, TITLE, TOTAL_TIME_MINUTES, Recipe
+from .work_queue import SharedRateBudget, WorkQueue, default_worker_id
+
+# --- Define index/category URLs for each site ---
+BON_APPETIT_INDEX_URLS = [
+    "https://www.bonappetit.com/recipes",
+    "https://www.bonappetit.com/meal-time/dinner",
+    "https://www.bonappetit.com/meal-time/lunch"
+]
+SMITTEN_KITCHEN_INDEX_URLS = [
+    "https://smittenkitchen.com/recipes/best-of-smitten-kitchen/"
+    # Add more Smitten Kitchen category URLs if desired
+]
+JUSTINE_SNACKS_INDEX_URLS = [
+    "https://justinesnacks.com/category/recipes/"
+    # Add more Justine Snacks category URLs if desired
+]
 
-# Load environment variables
-load_dotenv()
+# Outcomes of ingest_recipe_url
+INGESTED = "ingested"
+DUPLICATE = "duplicate"
+FAILED = "failed"
 
-def ingest_recipes(): 
+# URLs scraped per inline-tagging batch: one classifier call and one batched create (Airtable takes 10 records per request)
+INLINE_TAGGING_BATCH_SIZE = 10
+
+def discover_recipe_urls(scraper):
     """
-    Main function to orchestrate the scraping and ingestion process 
-    from multiple recipe websites and index pages.
+    Collects recipe links from every site's index pages, with variants of the same
+    URL (trailing slash, tracking params, ...) collapsed into one.
     """
-    scraper = EnhancedScraper()
-    formatter = RawDataFormatter()
-    
-    # --- Define index/category URLs for each site ---
-    bon_appetit_index_urls = [
-        "https://www.bonappetit.com/recipes", 
-        "https://www.bonappetit.com/meal-time/dinner", 
-        "https://www.bonappetit.com/meal-time/lunch"  
-    ]
-    smitten_kitchen_index_urls = [
-        "https://smittenkitchen.com/recipes/best-of-smitten-kitchen/" 
-        # Add more Smitten Kitchen category URLs if desired
-    ]
-    justine_snacks_index_urls = [
-        "https://justinesnacks.com/category/recipes/"
-        # Add more Justine Snacks category URLs if desired
-    ]
-
-    # --- Get recipe links from all sources ---
     all_recipe_urls_to_scrape = []
-    
+
     # --- Temporarily comment out Bon Appétit scraping ---
     # print("--- Starting Bon Appétit Link Discovery ---")
-    # ba_urls = scraper.get_recipe_links_from_index_pages(bon_appetit_index_urls)
+    # ba_urls = scraper.get_recipe_links_from_index_pages(BON_APPETIT_INDEX_URLS)
     # all_recipe_urls_to_scrape.extend(ba_urls)
     # print(f"--- Bon Appétit Complete: {len(ba_urls)} URLs found ---\n")
     # --- End Bon Appétit comment out ---
 
     # Call the new Smitten Kitchen function
-    sk_urls = scraper.get_recipe_links_from_smitten_kitchen(smitten_kitchen_index_urls)
+    sk_urls = scraper.get_recipe_links_from_smitten_kitchen(SMITTEN_KITCHEN_INDEX_URLS)
     all_recipe_urls_to_scrape.extend(sk_urls)
     # Smitten Kitchen function already prints summary
 
     # Call the new Justine Snacks function
-    js_urls = scraper.get_recipe_links_from_justine_snacks(justine_snacks_index_urls)
+    js_urls = scraper.get_recipe_links_from_justine_snacks(JUSTINE_SNACKS_INDEX_URLS)
     all_recipe_urls_to_scrape.extend(js_urls)
     # Justine Snacks function already prints summary
 
-    # Optional: Remove potential duplicates across sites (though unlikely)
-    all_recipe_urls_to_scrape = list(set(all_recipe_urls_to_scrape)) 
-    
+    # Remove duplicates, including variants of the same URL (trailing slash, tracking params, ...)
+    unique_by_canonical = {}
+    for url in all_recipe_urls_to_scrape:
+        unique_by_canonical.setdefault(canonicalize_url(url), url)
+    all_recipe_urls_to_scrape = list(unique_by_canonical.values())
+
     print(f"\n--- Total Link Discovery Complete: {len(all_recipe_urls_to_scrape)} unique URLs found across all sites ---\n")
+    return all_recipe_urls_to_scrape
+
+def scrape_new_recipe(recipe_url, scraper, deduplicator):
+    """
+    Scrapes one recipe and checks it against the dedup index.
+
+    Returns:
+        tuple: (scraped_data, None) for a new recipe, or (None, DUPLICATE/FAILED).
+    """
+    # URLs queued before another worker or run ingested them need no fetch
+    if deduplicator.has_url(recipe_url):
+        print(f"Skipping {recipe_url}: already ingested.")
+        return None, DUPLICATE
+
+    # 1. Scrape individual recipe data using the new unified method
+    scraped_data = scraper.scrape_recipe(recipe_url)
+
+    if not scraped_data:
+        print(f"Failed to scrape data for {recipe_url}. Skipping.")
+        return None, FAILED
+
+    # 2. Skip near-duplicates of recipes we already have (reposts, cross-site copies)
+    duplicate_of = deduplicator.find_duplicate(scraped_data.get('title'), scraped_data.get('ingredients') or [])
+    if duplicate_of:
+        print(f"Skipping '{scraped_data.get('title', 'N/A')}': {duplicate_of}.")
+        return None, DUPLICATE
+    return scraped_data, None
+
+def ingest_recipe_url(recipe_url, scraper, formatter, airtable_client, deduplicator, search_index=None,
+                      image_pipeline=None):
+    """
+    Scrapes one recipe, skips it if it duplicates a stored recipe, and adds it to Airtable.
+    New recipes are also added to `search_index`, if given. With an `image_pipeline`
+    (images.py), the attached image is the compact one it picks from the scraped candidates.
+
+    Returns:
+        str: INGESTED, DUPLICATE or FAILED.
+    """
+    scraped_data, outcome = scrape_new_recipe(recipe_url, scraper, deduplicator)
+    if outcome:
+        return outcome
+    if image_pipeline is not None:
+        attach_images([scraped_data], image_pipeline)
+
+    # 3. Format data for Airtable
+    try:
+        airtable_record_data = formatter.format_for_airtable(scraped_data)
+        print(f"Data prepared for Airtable: {airtable_record_data.get('Title', 'N/A')}")
+    except Exception as e:
+        print(f"Error formatting data for {recipe_url}: {e}")
+        return FAILED
+
+    # 4. Add record to Airtable
+    try:
+        response = airtable_client.add_record(airtable_record_data)
+        if response and 'id' in response:
+             print(f"Successfully added '{airtable_record_data.get('Title', 'N/A')}' to Airtable.")
+             deduplicator.add(response['id'], scraped_data.get('title'), scraped_data.get('ingredients') or [], recipe_url)
+             if search_index is not None:
+                 search_index.add(response['id'], scraped_data.get('title'), scraped_data.get('ingredients') or [])
+             return INGESTED
+        print(f"Failed to add '{airtable_record_data.get('Title', 'N/A')}' to Airtable. Response: {response}")
+    except Exception as e:
+        print(f"Error adding record to Airtable: {e}")
+    return FAILED
+
+def ingest_recipe_batch(recipe_urls, scraper, formatter, airtable_client, deduplicator, search_index=None,
+                        image_pipeline=None, tagged_records=None):
+    """
+    Inline-tagging variant of ingest_recipe_url for a batch of URLs: scrapes them, tags
+    the new recipes with one classifier call and creates them already tagged with
+    batched creates, saving recipe_tagging.py's read-back and update per recipe.
+    Recipes whose tagging fails are still created, as 'Pending'.
+
+    Near-duplicates within one batch are not caught, since the dedup index only learns
+    a recipe once it has been created. Created records that were tagged are appended
+    to `tagged_records`, if given, for update_similar_index.
+
+    Returns:
+        list: INGESTED, DUPLICATE or FAILED for each URL, in order.
+    """
+    outcomes = [None] * len(recipe_urls)
+    new_recipes = [] # (position, scraped_data)
+    for position, recipe_url in enumerate(recipe_urls):
+        scraped_data, outcome = scrape_new_recipe(recipe_url, scraper, deduplicator)
+        if outcome:
+            outcomes[position] = outcome
+        else:
+            new_recipes.append((position, scraped_data))
+    if not new_recipes:
+        return outcomes
+    if image_pipeline is not None:
+        # One bounded pool fetches the image candidates of the whole batch
+        attach_images([scraped_data for _, scraped_data in new_recipes], image_pipeline)
+
+    # Tag before formatting, so the records go out complete
+    all_tags = tag_scraped_recipes([scraped_data for _, scraped_data in new_recipes])
+    to_create = [] # (position, scraped_data, airtable_record_data)
+    for (position, scraped_data), tags in zip(new_recipes, all_tags):
+        try:
+            to_create.append((position, scraped_data, formatter.format_for_airtable(scraped_data, tags=tags)))
+        except Exception as e:
+            print(f"Error formatting data for {recipe_urls[position]}: {e}")
+            outcomes[position] = FAILED
+
+    created = airtable_client.batch_add_records([record_data for _, _, record_data in to_create])
+    for (position, scraped_data, record_data), response in zip(to_create, created):
+        title = record_data.get('Title', 'N/A')
+        if response and 'id' in response:
+            print(f"Successfully added '{title}' to Airtable ({record_data.get('Tagging Status')}).")
+            deduplicator.add(response['id'], scraped_data.get('title'), scraped_data.get('ingredients') or [], recipe_urls[position])
+            if search_index is not None:
+                search_index.add(response['id'], scraped_data.get('title'), scraped_data.get('ingredients') or [])
+            if tagged_records is not None and record_data.get('Tagging Status') == 'Tagged':
+                tagged_records.append({"id": response['id'], "fields": record_data})
+            outcomes[position] = INGESTED
+        else:
+            print(f"Failed to add '{title}' to Airtable.")
+            outcomes[position] = FAILED
+    return outcomes
+
+def ingest_recipes(inline_tagging=False, process_images=True):
+    """
+    Main function to orchestrate the scraping and ingestion process
+    from multiple recipe websites and index pages.
+
+    With `inline_tagging`, recipes are tagged during ingestion and created already
+    tagged (see ingest_recipe_batch) instead of being left 'Pending'. With
+    `process_images`, images go through the image stage (images.py) first.
+    """
+    scraper = EnhancedScraper()
+    formatter = RawDataFormatter()
+
+    # --- Get recipe links from all sources ---
+    all_recipe_urls_to_scrape = discover_recipe_urls(scraper)
+
+    # Skip URLs already ingested on a previous run (local dedup index)
+    deduplicator = RecipeDeduplicator.load(bootstrap=True)
+    already_ingested = [url for url in all_recipe_urls_to_scrape if deduplicator.has_url(url)]
+    if already_ingested:
+        print(f"Skipping {len(already_ingested)} URLs that were already ingested.")
+        all_recipe_urls_to_scrape = [url for url in all_recipe_urls_to_scrape if not deduplicator.has_url(url)]
 
     # Rename the variable used in the loop
-    recipe_urls_to_scrape = all_recipe_urls_to_scrape 
+    recipe_urls_to_scrape = all_recipe_urls_to_scrape
 
     if not recipe_urls_to_scrape:
         print("No recipe URLs found from any source. Exiting.")
         return
 
-    # --- Initialize Airtable Client ---
-    airtable_api_key = os.getenv("AIRTABLE_API_KEY")
-    airtable_base_id = os.getenv("AIRTABLE_BASE_ID")
-    airtable_table_name = os.getenv("AIRTABLE_TABLE_NAME")
-
-    if not all([airtable_api_key, airtable_base_id, airtable_table_name]):
-        print("Error: Airtable configuration (API Key, Base ID, Table Name) not found in .env file.")
+    # --- Initialize Airtable Client (settings come from config, loaded once from .env) ---
+    try:
+        airtable_client = get_airtable_client()
+    except ValueError as e:
+        print(f"Error: {e}")
         return
-        
-    airtable_client = AirtableClient(airtable_api_key, airtable_base_id, airtable_table_name)
 
     # --- Process Each Recipe URL ---
     print(f"--- Starting Recipe Ingestion for {len(recipe_urls_to_scrape)} URLs ---")
-    successful_ingestions = 0
-    failed_ingestions = 0
+    outcomes = {INGESTED: 0, DUPLICATE: 0, FAILED: 0}
     total_recipes = len(recipe_urls_to_scrape)
+    # New recipes become searchable without a rebuild
+    search_index = SearchIndex.load()
+    image_pipeline = ImagePipeline(rate_limiter=scraper.rate_limiter) if process_images else None
+    tagged_records = [] # created already tagged, for the similar-recipes index
 
-    for i, recipe_url in enumerate(recipe_urls_to_scrape):
-        print(f"\nProcessing recipe {i+1}/{total_recipes}: {recipe_url}")
-        
-        # 1. Scrape individual recipe data using the new unified method
-        scraped_data = scraper.scrape_recipe(recipe_url)
-        
-        if not scraped_data:
-            print(f"Failed to scrape data for {recipe_url}. Skipping.")
-            failed_ingestions += 1
-            continue 
-
-        # 2. Format data for Airtable
-        try:
-            airtable_record_data = formatter.format_for_airtable(scraped_data)
-            print(f"Data prepared for Airtable: {airtable_record_data.get('Title', 'N/A')}")
-        except Exception as e:
-            print(f"Error formatting data for {recipe_url}: {e}")
-            failed_ingestions += 1
-            continue 
+    try:
+        if inline_tagging:
+            for start in range(0, total_recipes, INLINE_TAGGING_BATCH_SIZE):
+                batch = recipe_urls_to_scrape[start:start + INLINE_TAGGING_BATCH_SIZE]
+                print(f"\nProcessing recipes {start+1}-{start+len(batch)}/{total_recipes}")
+                for outcome in ingest_recipe_batch(batch, scraper, formatter, airtable_client, deduplicator,
+                                                   search_index, image_pipeline, tagged_records):
+                    outcomes[outcome] += 1
+        else:
+            for i, recipe_url in enumerate(recipe_urls_to_scrape):
+                print(f"\nProcessing recipe {i+1}/{total_recipes}: {recipe_url}")
+                outcomes[ingest_recipe_url(recipe_url, scraper, formatter, airtable_client, deduplicator,
+                                              search_index, image_pipeline)] += 1
+    finally:
+        # Keep what was ingested so far even if the run is interrupted
+        deduplicator.save()
+        search_index.save()
+    if tagged_records:
+        # The new recipes are already tagged, so they can get pairing suggestions now,
+        # indexed from the records just created rather than re-read from Airtable
+        update_similar_index(airtable_client, records=tagged_records)
 
-        # 3. Add record to Airtable
-        try:
-            response = airtable_client.add_record(airtable_record_data)
-            if response and 'id' in response: 
-                 print(f"Successfully added '{airtable_record_data.get('Title', 'N/A')}' to Airtable.")
-                 successful_ingestions += 1
-            else:
-                 print(f"Failed to add '{airtable_record_data.get('Title', 'N/A')}' to Airtable. Response: {response}")
-                 failed_ingestions += 1
-        except Exception as e:
-            print(f"Error adding record to Airtable: {e}")
-            failed_ingestions += 1
-            
     # --- Print Summary ---
     print("\n--- Ingestion Summary ---")
-    print(f"Total URLs Found: {len(recipe_urls_to_scrape)}") 
-    print(f"Successfully ingested: {successful_ingestions}")
-    print(f"Failed to ingest: {failed_ingestions}")
+    print(f"Total URLs Found: {len(recipe_urls_to_scrape)}")
+    print(f"Successfully ingested: {outcomes[INGESTED]}")
+    print(f"Skipped as duplicates: {outcomes[DUPLICATE]}")
+    print(f"Failed to ingest: {outcomes[FAILED]}")
+    print("Request rates:")
+    scraper.rate_limiter.print_metrics()
+
+# Recipes whose page was re-scraped but still gave no time or yield, so later
+# backfills don't fetch them again; kept locally, the Airtable schema has no field for it
+BACKFILL_ATTEMPTS_FILE = "backfill_attempts.json"
+
+def _load_backfill_attempts(path):
+    if not os.path.exists(path):
+        return set()
+    with open(path, "r", encoding="utf-8") as f:
+        return set(json.load(f))
+
+def _save_backfill_attempts(path, record_ids):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(sorted(record_ids), f)
+    os.replace(tmp_path, path)
+
+def backfill_times_and_yields(limit=None, batch_size=10, retry_unparsed=False):
+    """
+    Fills Total Time (min) and Servings (min/max) on recipes ingested before those were
+    parsed. The raw time and yield text was never stored, so each recipe is re-scraped
+    from its Source URL; only the fields that are still blank are written back, in
+    batched updates.
+
+    Recipes whose page still leaves the time or the yield blank are remembered
+    (BACKFILL_ATTEMPTS_FILE) and skipped on later runs unless `retry_unparsed` is set.
+    """
+    airtable_client = get_airtable_client()
+    scraper = EnhancedScraper()
+    attempts_path = os.path.join(get_data_dir(), BACKFILL_ATTEMPTS_FILE)
+    attempted = _load_backfill_attempts(attempts_path)
+    query = Query(where=is_blank(TOTAL_TIME_MINUTES) | is_blank(SERVINGS_MIN),
+                  fields=[TITLE, SOURCE_URL] + TIME_AND_YIELD_FIELDS)
+    records = [record for record in airtable_client.query(query) if retry_unparsed or record['id'] not in attempted]
+    if limit:
+        records = records[:limit]
+    print(f"Found {len(records)} recipes without a parsed time or yield.")
+
+    updates = []
+    updated = 0
+    try:
+        for i, record in enumerate(records):
+            stored = record.get('fields', {})
+            recipe_url = stored.get(SOURCE_URL)
+            if not recipe_url:
+                continue
+            print(f"\nBackfilling {i+1}/{len(records)}: {recipe_url}")
+            scraped_data = scraper.scrape_recipe(recipe_url)
+            if not scraped_data:
+                continue # Fetch failed; try again next run
+            parsed = Recipe.from_scraped(scraped_data).to_airtable_fields(TIME_AND_YIELD_FIELDS, skip_empty=True)
+            fields = {field: value for field, value in parsed.items() if stored.get(field) in (None, "")}
+            if fields:
+                updates.append({"id": record['id'], "fields": fields})
+            if all(field in parsed or stored.get(field) for field in (TOTAL_TIME_MINUTES, SERVINGS_MIN)):
+                attempted.discard(record['id'])
+            else:
+                attempted.add(record['id'])
+            if len(updates) >= batch_size:
+                updated += len(airtable_client.batch_update_records(updates))
+                updates = []
+        if updates:
+            updated += len(airtable_client.batch_update_records(updates))
+    finally:
+        _save_backfill_attempts(attempts_path, attempted)
+
+    print(f"\n--- Backfill complete: {updated} of {len(records)} recipes updated ---")
+    return updated
+
+# --- Distributed mode ---
+# Discovery fills a shared WorkQueue; any number of worker processes, on this machine or
+# on other nodes sharing the queue file, claim URLs from it. Scraping and Airtable
+# writes go through a SharedRateBudget so all workers together respect per-host limits.
+
+def enqueue_recipe_urls(queue_path=None):
+    """
+    Runs link discovery and adds the found URLs to the shared queue, except the ones
+    the dedup index says were already ingested.
+    """
+    queue = WorkQueue(queue_path)
+    budget = SharedRateBudget(queue.path)
+    urls = discover_recipe_urls(EnhancedScraper(request_budget=budget))
+    deduplicator = RecipeDeduplicator.load(bootstrap=True)
+    already_ingested = sum(1 for url in urls if deduplicator.has_url(url))
+    if already_ingested:
+        print(f"Skipping {already_ingested} URLs that were already ingested.")
+        urls = [url for url in urls if not deduplicator.has_url(url)]
+    added = queue.enqueue(urls)
+    print(f"Queued {added} new URLs ({len(urls) - added} already queued). Queue status: {queue.stats()}")
+    return added
+
+def run_worker(queue_path=None, worker_id=None, batch_size=5, wait_for_work=False, poll_interval=10,
+               inline_tagging=False):
+    """
+    Claims URLs from the shared queue and ingests them until the queue is drained
+    (or forever with `wait_for_work`). With `inline_tagging`, each claimed batch is
+    tagged and created together (see ingest_recipe_batch).
+
+    Each worker checks near-duplicates against the dedup index as it was when it
+    started plus what it ingests itself; workers don't write the index file, so
+    rebuild it afterwards with `python -m recipe_ingestion.dedup`. The same goes for the
+    search index (`python -m recipe_ingestion.search_index --rebuild`). Workers attach
+    the scraped image as is, since the image store's index is not shared between processes.
+    """
+    worker_id = worker_id or default_worker_id()
+    queue = WorkQueue(queue_path)
+    budget = SharedRateBudget(queue.path)
+    scraper = EnhancedScraper(request_budget=budget)
+    formatter = RawDataFormatter()
+    airtable_client = get_airtable_client()
+    airtable_client.request_budget = budget
+    deduplicator = RecipeDeduplicator.load()
+    outcomes = {INGESTED: 0, DUPLICATE: 0, FAILED: 0}
+
+    print(f"Worker {worker_id} started on queue {queue.path}")
+    while True:
+        urls = queue.claim(worker_id, batch_size)
+        if not urls:
+            stats = queue.stats()
+            if not wait_for_work and not stats.get('pending') and not stats.get('leased'):
+                break
+            time.sleep(poll_interval) # Other workers still hold leases that may expire back to us
+            continue
+
+        if inline_tagging:
+            print(f"\n[{worker_id}] Processing {len(urls)} recipes")
+            try:
+                batch_outcomes = ingest_recipe_batch(urls, scraper, formatter, airtable_client, deduplicator)
+            except Exception as e:
+                print(f"Unexpected error ingesting batch: {e}")
+                batch_outcomes = [FAILED] * len(urls)
+        else:
+            batch_outcomes = []
+            for recipe_url in urls:
+                queue.extend_lease(recipe_url, worker_id)
+                print(f"\n[{worker_id}] Processing recipe: {recipe_url}")
+                try:
+                    batch_outcomes.append(ingest_recipe_url(recipe_url, scraper, formatter, airtable_client, deduplicator))
+                except Exception as e:
+                    print(f"Unexpected error ingesting {recipe_url}: {e}")
+                    batch_outcomes.append(FAILED)
+
+        for recipe_url, outcome in zip(urls, batch_outcomes):
+            outcomes[outcome] += 1
+            if outcome == FAILED:
+                queue.fail(recipe_url, worker_id, "ingestion failed")
+            else:
+                queue.complete(recipe_url, worker_id)
+
+    print(f"\n--- Worker {worker_id} Summary ---")
+    print(f"Successfully ingested: {outcomes[INGESTED]}")
+    print(f"Skipped as duplicates: {outcomes[DUPLICATE]}")
+    print(f"Failed attempts: {outcomes[FAILED]}")
+    print(f"Queue status: {queue.stats()}")
+    print("Request rates:")
+    scraper.rate_limiter.print_metrics()
+    return outcomes
+
+def run_workers(processes, queue_path=None, wait_for_work=False, inline_tagging=False):
+    """Starts `processes` worker processes on this machine and waits for them to finish."""
+    import multiprocessing
+
+    workers = [
+        multiprocessing.Process(target=run_worker, kwargs={"queue_path": queue_path, "wait_for_work": wait_for_work,
+                                                           "inline_tagging": inline_tagging})
+        for _ in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
 
 # Update the main execution block to call the renamed function
 if __name__ == "__main__":
-    ingest_recipes() 
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Scrape recipes and ingest them into Airtable.")
+    parser.add_argument("--queue", metavar="PATH", help="Shared queue file for distributed mode (default: data dir).")
+    parser.add_argument("--discover", action="store_true", help="Discover recipe URLs and add them to the shared queue.")
+    parser.add_argument("--worker", action="store_true", help="Ingest URLs claimed from the shared queue.")
+    parser.add_argument("--processes", type=int, default=1, help="Number of worker processes to start with --worker.")
+    parser.add_argument("--wait", action="store_true", help="Keep workers polling for new URLs instead of exiting when the queue is empty.")
+    parser.add_argument("--inline-tagging", action="store_true",
+                        help="Tag recipes while ingesting and create them already tagged, instead of as 'Pending'.")
+    parser.add_argument("--no-images", action="store_true",
+                        help="Attach the scraped image URL as is, without validating it or making a thumbnail.")
+    parser.add_argument("--backfill-times", action="store_true",
+                        help="Re-scrape stored recipes without a parsed total time or yield and fill those fields in.")
+    parser.add_argument("--retry-unparsed", action="store_true",
+                        help="With --backfill-times, also re-scrape recipes whose time or yield could not be parsed before.")
+    parser.add_argument("--status", action="store_true", help="Print the shared queue status.")
+    args = parser.parse_args()
+
+    if args.status:
+        print(WorkQueue(args.queue).stats())
+    if args.discover:
+        enqueue_recipe_urls(args.queue)
+    if args.worker:
+        if args.processes > 1:
+            run_workers(args.processes, args.queue, wait_for_work=args.wait, inline_tagging=args.inline_tagging)
+        else:
+            run_worker(args.queue, wait_for_work=args.wait, inline_tagging=args.inline_tagging)
+    if args.backfill_times:
+        backfill_times_and_yields(retry_unparsed=args.retry_unparsed)
+    if not (args.status or args.discover or args.worker or args.backfill_times):
+        ingest_recipes(inline_tagging=args.inline_tagging, process_images=not args.no_images)
@@ -1,16 +1,42 @@
 import random
-from typing import List, Optional
-from .airtable_client import AirtableClient
-from .config import AIRTABLE_API_KEY, AIRTABLE_BASE_ID, AIRTABLE_TABLE_NAME
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set
+from .airtable_client import AirtableClient, get_airtable_client
+from .query import Query, all_of, eq, is_in
+from .records import Recipe
 
-# 1. Initialize Airtable Client
-airtable_client = AirtableClient(AIRTABLE_API_KEY, AIRTABLE_BASE_ID, AIRTABLE_TABLE_NAME)
+# 1. Airtable Client: shared via get_airtable_client() and created on first use
 
 # 2. Define Course Categories for Menu
 STARTER_COURSE_TYPES = ["Starter", "Snack", "Side Dish"]
 MAIN_COURSE_TYPES = ["Main Course"]
 DESSERT_COURSE_TYPES = ["Dessert"]
 
+# Menu slot -> Airtable "Course" values that can fill it
+COURSE_GROUPS = {
+    "starter": STARTER_COURSE_TYPES,
+    "main": MAIN_COURSE_TYPES,
+    "dessert": DESSERT_COURSE_TYPES,
+}
+COURSE_TO_GROUP = {ctype: group for group, ctypes in COURSE_GROUPS.items() for ctype in ctypes}
+
+# Only the fields a generated menu actually shows; everything else stays in Airtable
+MENU_RECIPE_FIELDS = ["Title", "Source URL", "Image URL", "Course", "Season", "Diet Tags",
+                      "Total Time (min)", "Servings (min)", "Servings (max)"]
+TAGGED = eq("Tagging Status", "Tagged")
+TAGGED_RECIPES_QUERY = Query(where=TAGGED, fields=MENU_RECIPE_FIELDS)
+DEFAULT_INDEX_TTL_SECONDS = 15 * 60
+
+# Seasons and diets used when pre-building curated candidate pools
+SEASONS = ["Spring", "Summer", "Fall", "Winter"]
+YEAR_ROUND = "Year-Round"
+POOL_DIETS = [None, "Vegetarian", "Vegan", "Gluten-Free Potential"]
+# A recipe fits a requested diet if it carries any of these tags (vegan food is also vegetarian)
+DIET_COMPATIBLE_TAGS = {
+    "Vegetarian": {"Vegetarian", "Vegan"},
+}
+
 def fetch_recipes_by_course(course_types: List[str], client: AirtableClient) -> List:
     """
     Fetches all successfully tagged recipes from Airtable that match any of the given course types.
@@ -18,64 +44,410 @@ def fetch_recipes_by_course(course_types: List[str], client: AirtableClient) ->
     if not course_types:
         return []
 
-    # Construct the OR part of the formula for course types
-    course_conditions = [f"{{Course}}='{ctype}'" for ctype in course_types]
-    course_formula_part = f"OR({', '.join(course_conditions)})"
-    
-    # Combine with Tagging Status
-    full_formula = f"AND({course_formula_part}, {{Tagging Status}}='Tagged')"
-    
-    print(f"Fetching recipes with formula: {full_formula}")
+    query = Query(where=all_of(is_in("Course", course_types), TAGGED), fields=MENU_RECIPE_FIELDS)
+    print(f"Fetching recipes with formula: {query.formula}")
     try:
-        records = client.get_all_records(formula=full_formula)
+        records = client.query(query)
         return records if records else []
     except Exception as e:
         print(f"Error fetching recipes for courses {course_types}: {e}")
         return []
 
-def generate_menu(client: AirtableClient) -> Optional[dict]:
+def _menu_fields(recipe: Recipe) -> dict:
+    """A recipe as the Airtable fields dict callers get back (Recipe objects stay internal)."""
+    return recipe.to_airtable_fields(MENU_RECIPE_FIELDS, skip_empty=True)
+
+class _CourseIndex:
     """
-    Generates a 3-course menu (Starter, Main, Dessert) by randomly selecting
-    one recipe from each category from Airtable.
+    Immutable snapshot of tagged recipes for one menu slot, with candidate sets
+    (positions into `recipes`) per season and per diet tag.
     """
-    print("\nFetching recipes for each course...")
-    starter_recipes = fetch_recipes_by_course(STARTER_COURSE_TYPES, client)
-    main_course_recipes = fetch_recipes_by_course(MAIN_COURSE_TYPES, client)
-    dessert_recipes = fetch_recipes_by_course(DESSERT_COURSE_TYPES, client)
-
-    print(f"Found {len(starter_recipes)} potential starters.")
-    print(f"Found {len(main_course_recipes)} potential main courses.")
-    print(f"Found {len(dessert_recipes)} potential desserts.")
-
-    if not starter_recipes:
-        print("Error: No starter recipes found (looked for Starter, Snack, or Side Dish). Cannot generate menu.")
-        return None
-    if not main_course_recipes:
-        print("Error: No main course recipes found. Cannot generate menu.")
-        return None
-    if not dessert_recipes:
-        print("Error: No dessert recipes found. Cannot generate menu.")
-        return None
 
-    try:
-        chosen_starter = random.choice(starter_recipes)
-        chosen_main = random.choice(main_course_recipes)
-        chosen_dessert = random.choice(dessert_recipes)
-    except IndexError:
-        # Should not happen if above checks pass, but as a safeguard
-        print("Error: Could not select a recipe, a category might have become empty unexpectedly.")
-        return None
-
-    return {
-        "starter": chosen_starter['fields'], # Return the 'fields' dictionary
-        "main": chosen_main['fields'],
-        "dessert": chosen_dessert['fields']
-    }
+    def __init__(self, recipes: List[Recipe]):
+        self.recipes = recipes
+        self.hosts = [recipe.host or '' for recipe in recipes]
+        self.by_record = {recipe.record_id: position for position, recipe in enumerate(recipes)}
+        self.by_season: Dict[str, Set[int]] = {}
+        self.by_diet: Dict[str, Set[int]] = {}
+        for position, recipe in enumerate(recipes):
+            for season in recipe.seasons:
+                self.by_season.setdefault(season, set()).add(position)
+            for diet in recipe.diet_tags:
+                self.by_diet.setdefault(diet, set()).add(position)
+
+    def candidates(self, season: Optional[str] = None, diet: Optional[str] = None,
+                   include_year_round: bool = True, max_total_minutes: Optional[int] = None,
+                   min_servings: Optional[int] = None) -> List[int]:
+        """
+        Positions of recipes matching the season and diet, in a stable order.
+
+        With `max_total_minutes` / `min_servings`, only recipes known to take at most
+        that long / to serve at least that many people are kept.
+        """
+        if season:
+            matched = set(self.by_season.get(season, ()))
+            if include_year_round:
+                matched |= self.by_season.get(YEAR_ROUND, set())
+        else:
+            matched = set(range(len(self.recipes)))
+        if diet:
+            allowed: Set[int] = set()
+            for tag in DIET_COMPATIBLE_TAGS.get(diet, {diet}):
+                allowed |= self.by_diet.get(tag, set())
+            matched &= allowed
+        if max_total_minutes is not None:
+            recipes = self.recipes
+            matched = {p for p in matched
+                       if recipes[p].total_minutes is not None and recipes[p].total_minutes <= max_total_minutes}
+        if min_servings is not None:
+            recipes = self.recipes
+            matched = {p for p in matched
+                       if recipes[p].servings_max is not None and recipes[p].servings_max >= min_servings}
+        return sorted(matched)
+
+
+class MenuEngine:
+    """
+    In-memory index of tagged recipes grouped by menu slot (starter/main/dessert).
+
+    The index is loaded with a single projected Airtable query and reloaded once it is
+    older than `ttl_seconds`, so menus are generated from memory instead of running
+    one full table scan per course on every request.
+
+    With a `similar_index` (similar_recipes.SimilarRecipeIndex), courses can be paired
+    by similarity instead of at random (see suggest_pairings and generate_pool).
+    """
+
+    def __init__(self, client: AirtableClient, ttl_seconds: float = DEFAULT_INDEX_TTL_SECONDS, seed=None,
+                 similar_index=None):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.rng = random.Random(seed)
+        self.similar_index = similar_index
+        self._index: Dict[str, _CourseIndex] = {group: _CourseIndex([]) for group in COURSE_GROUPS}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_stale(self) -> bool:
+        if self._loaded_at is None:
+            return True
+        return (time.monotonic() - self._loaded_at) > self.ttl_seconds
+
+    def refresh(self) -> None:
+        """Reloads all tagged recipes from Airtable and rebuilds the course index."""
+        print(f"Loading tagged recipes with formula: {TAGGED_RECIPES_QUERY.formula}")
+        records = self.client.query(TAGGED_RECIPES_QUERY)
+
+        if not records and self._loaded_at is not None:
+            # query returns [] on errors too; keep serving the previous index
+            print("Warning: Reload returned no recipes, keeping the previous index.")
+            self._loaded_at = time.monotonic()
+            return
+
+        by_course: Dict[str, List[Recipe]] = {group: [] for group in COURSE_GROUPS}
+        # Sort by record id so a given seed picks the same menus for the same data
+        for recipe in Recipe.from_airtable_records(sorted(records, key=lambda r: r.get('id', ''))):
+            group = COURSE_TO_GROUP.get(recipe.course)
+            if group:
+                by_course[group].append(recipe)
+
+        # Swap the whole index at once so concurrent readers never see a partial one
+        self._index = {group: _CourseIndex(recipes) for group, recipes in by_course.items()}
+        self._loaded_at = time.monotonic()
+        print("Indexed " + ", ".join(f"{len(v)} {k}s" for k, v in by_course.items()) + ".")
+
+    def ensure_fresh(self) -> None:
+        """Loads the index on first use and reloads it once the TTL has expired."""
+        if not self.is_stale:
+            return
+        with self._lock:
+            if self.is_stale:  # another thread may have refreshed while we waited
+                self.refresh()
+
+    def course_counts(self) -> Dict[str, int]:
+        self.ensure_fresh()
+        return {group: len(course.recipes) for group, course in self._index.items()}
+
+    def generate(self, count: int = 1, seed=None) -> List[dict]:
+        """
+        Generates `count` random 3-course menus from the in-memory index.
+
+        Args:
+            count: Number of menus to generate.
+            seed: Optional seed; the same seed and index always give the same menus.
+
+        Returns:
+            A list of {"starter": fields, "main": fields, "dessert": fields} dicts,
+            each course an Airtable fields dict (MENU_RECIPE_FIELDS), or an empty
+            list if any course has no recipes.
+        """
+        self.ensure_fresh()
+        index = self._index
+        for group, course in index.items():
+            if not course.recipes:
+                print(f"Error: No {group} recipes found (looked for {', '.join(COURSE_GROUPS[group])}). Cannot generate menu.")
+                return []
+
+        rng = random.Random(seed) if seed is not None else self.rng
+        starters, mains, desserts = (index[group].recipes for group in ("starter", "main", "dessert"))
+        return [
+            {
+                "starter": _menu_fields(rng.choice(starters)),
+                "main": _menu_fields(rng.choice(mains)),
+                "dessert": _menu_fields(rng.choice(desserts)),
+            }
+            for _ in range(count)
+        ]
+
+    def suggest_pairings(self, record_id: str, k: int = 5, season: Optional[str] = None,
+                         diet: Optional[str] = None, include_year_round: bool = True) -> Dict[str, List[dict]]:
+        """
+        The `k` recipes from each other course that go best with a recipe (e.g. starters
+        and desserts for a main), best first, from the similar-recipes index. Only
+        recipes in the current menu index that match `season` and `diet` are suggested.
+
+        Returns:
+            A dict of menu slot -> Airtable fields dicts; empty if the recipe is not indexed.
+        """
+        if self.similar_index is None:
+            raise ValueError("suggest_pairings needs a MenuEngine with a similar_index.")
+        self.ensure_fresh()
+        index = self._index
+        suggestions = {}
+        for group, matches in self.similar_index.pairings(record_id).items():
+            course = index[group]
+            allowed = set(course.candidates(season, diet, include_year_round)) if season or diet else None
+            positions = [course.by_record.get(match.record_id) for match in matches]
+            suggestions[group] = [_menu_fields(course.recipes[p]) for p in positions
+                                  if p is not None and (allowed is None or p in allowed)][:k]
+        return suggestions
+
+    def generate_pool(self, count: int, season: Optional[str] = None, diet: Optional[str] = None,
+                      distinct_hosts: bool = False, include_year_round: bool = True, seed=None,
+                      max_total_minutes: Optional[int] = None, min_servings: Optional[int] = None,
+                      paired: bool = False) -> List[dict]:
+        """
+        Generates up to `count` distinct menus that all satisfy the given constraints.
+
+        Every course of every menu matches `season` (Year-Round recipes count unless
+        `include_year_round` is False) and is compatible with `diet`. No recipe is used
+        twice within the pool. With `distinct_hosts`, the courses of a menu come from as
+        many different sites as the candidates allow; a site is repeated only when too
+        few sites have recipes left (e.g. a corpus scraped from two sites).
+        `max_total_minutes` and `min_servings` limit every course to recipes that take at
+        most / serve at least that much (recipes without a parsed time or yield are left
+        out when those filters are used).
+
+        Candidates come straight from the season/diet index and are drawn without
+        replacement, so the cost is linear in the pool size rather than a retry loop.
+        With `paired` (needs a similar_index), mains are drawn at random and each gets
+        the most similar unused starter and dessert.
+
+        Returns:
+            A list of menus (slot -> Airtable fields dict); shorter than `count` if there
+            are not enough candidates.
+        """
+        self.ensure_fresh()
+        index = self._index
+        rng = random.Random(seed) if seed is not None else self.rng
+        candidates = {
+            group: course.candidates(season, diet, include_year_round, max_total_minutes, min_servings)
+            for group, course in index.items()
+        }
+
+        if paired:
+            if self.similar_index is None:
+                raise ValueError("paired pools need a MenuEngine with a similar_index.")
+            picks = self._draw_paired(index, candidates, count, rng, distinct_hosts)
+        elif distinct_hosts:
+            picks = self._draw_distinct_hosts(index, candidates, count, rng)
+        else:
+            size = min([count] + [len(positions) for positions in candidates.values()])
+            drawn = {group: rng.sample(positions, size) for group, positions in candidates.items()}
+            picks = [{group: drawn[group][i] for group in COURSE_GROUPS} for i in range(size)]
+
+        if len(picks) < count:
+            print(f"Warning: Only {len(picks)} of {count} menus possible for season={season}, diet={diet}.")
+        return [
+            {group: _menu_fields(index[group].recipes[position]) for group, position in pick.items()}
+            for pick in picks
+        ]
+
+    @staticmethod
+    def _draw_distinct_hosts(index: Dict[str, _CourseIndex], candidates: Dict[str, List[int]],
+                             count: int, rng: random.Random) -> List[Dict[str, int]]:
+        """
+        Draws menus whose courses come from as many different hosts as possible.
+        Candidates are shuffled into per-host buckets; each course takes from the
+        fullest bucket among the hosts least used on the menu so far, which prefers new
+        hosts, falls back to repeats and keeps the hosts balanced across the pool.
+        """
+        buckets: Dict[str, Dict[str, List[int]]] = {}
+        for group, positions in candidates.items():
+            by_host: Dict[str, List[int]] = {}
+            for position in rng.sample(positions, len(positions)):
+                by_host.setdefault(index[group].hosts[position], []).append(position)
+            buckets[group] = by_host
+
+        picks = []
+        while len(picks) < count:
+            used_hosts: Dict[str, int] = {}
+            pick = {}
+            for group in COURSE_GROUPS:
+                open_hosts = [h for h, items in buckets[group].items() if items]
+                if not open_hosts:
+                    break
+                host = max(open_hosts, key=lambda h: (-used_hosts.get(h, 0), len(buckets[group][h]), h))
+                pick[group] = buckets[group][host].pop()
+                used_hosts[host] = used_hosts.get(host, 0) + 1
+            if len(pick) < len(COURSE_GROUPS):
+                break  # recipes drawn for an incomplete menu are simply left unused
+            picks.append(pick)
+        return picks
+
+    def _draw_paired(self, index: Dict[str, _CourseIndex], candidates: Dict[str, List[int]],
+                     count: int, rng: random.Random, distinct_hosts: bool) -> List[Dict[str, int]]:
+        """
+        Draws menus around random mains, taking the other courses from each main's
+        precomputed neighbours. A course falls back to a random candidate when none of
+        the neighbours is still available. With `distinct_hosts`, candidates from hosts
+        not yet on the menu are preferred, but a host is repeated rather than leaving
+        the menu incomplete.
+        """
+        available = {group: set(positions) for group, positions in candidates.items()}
+        other_groups = [group for group in COURSE_GROUPS if group != "main"]
+        # Fallback order, drawn once per group: candidates shuffled into stacks (one per
+        # host with `distinct_hosts`), with recipes used by earlier menus dropped lazily
+        stacks: Dict[str, Dict[Optional[str], List[int]]] = {}
+        for group in other_groups:
+            stacks[group] = {}
+            for position in rng.sample(candidates[group], len(candidates[group])):
+                host = index[group].hosts[position] if distinct_hosts else None
+                stacks[group].setdefault(host, []).append(position)
+
+        def fallback(group: str, used_hosts) -> Optional[int]:
+            """A random free candidate; from the fullest host not on the menu yet, if any."""
+            free = available[group]
+            best_key, best = None, None
+            for host, stack in stacks[group].items():
+                while stack and stack[-1] not in free:
+                    stack.pop()
+                if stack:
+                    key = (host not in used_hosts, len(stack))
+                    if best_key is None or key > best_key:
+                        best_key, best = key, stack[-1]
+            return best
+
+        picks = []
+        for main in rng.sample(candidates["main"], len(candidates["main"])):
+            if len(picks) >= count:
+                break
+            pick = {"main": main}
+            used_hosts = {index["main"].hosts[main]}
+            record_id = index["main"].recipes[main].record_id
+            for group in other_groups:
+                course, free = index[group], available[group]
+                neighbours = [course.by_record.get(match.record_id) for match in self.similar_index.similar(record_id, group)]
+                neighbours = [p for p in neighbours if p in free]
+                if distinct_hosts:
+                    # New hosts first; sorted() is stable, so similarity order is kept within each half
+                    neighbours.sort(key=lambda p: course.hosts[p] in used_hosts)
+                position = neighbours[0] if neighbours else fallback(group, used_hosts)
+                if position is None:
+                    break
+                pick[group] = position
+                used_hosts.add(course.hosts[position])
+            if len(pick) < len(COURSE_GROUPS):
+                continue  # this main can't be completed; try the next one
+            for group, position in pick.items():
+                available[group].discard(position)
+            picks.append(pick)
+        return picks
+
+    def generate_pools(self, per_pool: int, seasons: Iterable[str] = SEASONS,
+                       diets: Iterable[Optional[str]] = POOL_DIETS, distinct_hosts: bool = False,
+                       seed=None, max_total_minutes: Optional[int] = None,
+                       min_servings: Optional[int] = None, paired: bool = False) -> Dict[tuple, List[dict]]:
+        """
+        Pre-builds a pool of `per_pool` menus for every season x diet combination.
+
+        Returns:
+            A dict keyed by (season, diet) tuples; diet None means no diet constraint.
+        """
+        rng = random.Random(seed) if seed is not None else self.rng
+        diets = list(diets)
+        return {
+            (season, diet): self.generate_pool(per_pool, season=season, diet=diet,
+                                               distinct_hosts=distinct_hosts, seed=rng.random(),
+                                               max_total_minutes=max_total_minutes, min_servings=min_servings,
+                                               paired=paired)
+            for season in seasons
+            for diet in diets
+        }
+
+
+# One engine per client, so repeated generate_menu calls share the loaded index
+_engines: Dict[int, MenuEngine] = {}
+_engines_lock = threading.Lock()
+
+def get_menu_engine(client: Optional[AirtableClient] = None) -> MenuEngine:
+    """Returns the shared MenuEngine for `client` (default: the shared Recipes client), creating it on first use."""
+    client = client or get_airtable_client()
+    with _engines_lock:
+        engine = _engines.get(id(client))
+        if engine is None or engine.client is not client:
+            engine = MenuEngine(client)
+            _engines[id(client)] = engine
+        return engine
+
+def generate_menu(client: Optional[AirtableClient] = None, seed=None) -> Optional[dict]:
+    """
+    Generates a 3-course menu (Starter, Main, Dessert) by randomly selecting
+    one recipe from each category of the shared in-memory index.
+    """
+    menus = get_menu_engine(client).generate(1, seed=seed)
+    return menus[0] if menus else None
 
 # 3. Main execution block for testing
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate 3-course menus from tagged recipes.")
+    parser.add_argument("--pool-size", type=int, default=0,
+                        help="Build a pool of this many menus per season x diet instead of a single menu.")
+    parser.add_argument("--distinct-hosts", action="store_true", help="Prefer a different site for each course of a menu.")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for reproducible menus.")
+    parser.add_argument("--max-minutes", type=int, default=None, help="With --pool-size: only recipes taking at most this many minutes.")
+    parser.add_argument("--min-servings", type=int, default=None, help="With --pool-size: only recipes serving at least this many.")
+    parser.add_argument("--paired", action="store_true",
+                        help="With --pool-size: pair courses by similarity (needs the similar-recipes index).")
+    parser.add_argument("--pair", metavar="RECORD_ID", help="Suggest starters and desserts for this recipe.")
+    args = parser.parse_args()
+
+    if args.paired or args.pair:
+        from .similar_recipes import SimilarRecipeIndex
+        get_menu_engine().similar_index = SimilarRecipeIndex.load()
+
+    if args.pair:
+        for group, recipes in get_menu_engine().suggest_pairings(args.pair).items():
+            print(f"{group.title()}: " + "; ".join(recipe.get('Title', 'N/A') for recipe in recipes))
+        raise SystemExit(0)
+
+    if args.pool_size:
+        engine = get_menu_engine()
+        start_time = time.perf_counter()
+        pools = engine.generate_pools(args.pool_size, distinct_hosts=args.distinct_hosts, seed=args.seed,
+                                      max_total_minutes=args.max_minutes, min_servings=args.min_servings,
+                                      paired=args.paired)
+        elapsed = time.perf_counter() - start_time
+        for (season, diet), pool in pools.items():
+            print(f"{season:<8} {diet or 'Any diet':<22} {len(pool)} menus")
+        print(f"\nBuilt {sum(len(p) for p in pools.values())} menus in {elapsed:.3f}s (including index load).")
+        raise SystemExit(0)
+
     print("Attempting to generate a 3-course menu...")
-    menu = generate_menu(airtable_client)
+    menu = generate_menu(seed=args.seed)
 
     if menu:
         print("\n--- Your Generated Menu ---")
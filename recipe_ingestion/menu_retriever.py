@@ -1,62 +1,243 @@
-from typing import List, Dict, Optional
+import datetime
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
 
-from .airtable_client import AirtableClient
-from .config import AIRTABLE_API_KEY, AIRTABLE_BASE_ID
+from .airtable_client import AirtableClient, get_airtable_client
+from .query import Query, has
 
-# Initialize Airtable Client for CURATED MENUS table
+# Airtable table for CURATED MENUS; its client is created on first use via get_airtable_client
 CURATED_MENUS_TABLE_NAME = "Curated Menus" # Make sure this is the exact name of your Airtable table
-curated_menus_client = AirtableClient(AIRTABLE_API_KEY, AIRTABLE_BASE_ID, CURATED_MENUS_TABLE_NAME)
 
-def get_curated_menus_by_season(season: str) -> List[Dict]:
+CURATED_MENU_FIELDS = [
+    "Season", "Menu Name",
+    "Starter Name", "Starter URL", "Starter Description",
+    "Main Name", "Main URL", "Main Description",
+    "Dessert Name", "Dessert URL", "Dessert Description"
+]
+# By name only: multi-season menus are grouped under each season afterwards, and
+# sorting by Season too would put them after that season's single-season menus
+ALL_CURATED_MENUS_QUERY = Query(fields=CURATED_MENU_FIELDS, sort=["Menu Name"])
+
+# Curated menus change a few times a week, so a few minutes of staleness is fine
+MENU_CACHE_TTL_SECONDS = 10 * 60
+# How long an expired entry may still be served while it revalidates or while Airtable is down
+MENU_CACHE_MAX_STALE_SECONDS = 24 * 60 * 60
+
+
+def fetch_curated_menus_by_season(season: str, client: Optional[AirtableClient] = None) -> List[Dict]:
+    """
+    Queries the "Curated Menus" table live for one season. A menu tagged with several
+    seasons matches each of them, as in fetch_all_curated_menus, so the cache holds
+    the same menus whether it was primed or filled by a miss.
+
+    Unlike get_curated_menus_by_season, errors are raised rather than turned into an
+    empty list, so the cache can keep serving the last good copy.
+    """
+    client = client or get_airtable_client(CURATED_MENUS_TABLE_NAME)
+    # The season is quoted and escaped by the query compiler, so any text is safe here
+    query = Query(where=has("Season", season), fields=CURATED_MENU_FIELDS, sort=["Menu Name"])
+    print(f"Fetching curated menus for {season} with formula: {query.formula}")
+    menus = client.query(query, raise_errors=True)
+
+    # The client returns a list of records, each containing an 'id', 'createdTime', and 'fields'
+    # We want to return a list of the 'fields' dictionaries
+    processed_menus = []
+    for menu_record in menus:
+        if 'fields' in menu_record:
+            processed_menus.append(menu_record['fields'])
+        else:
+            # This case should ideally not happen if records are found and structured correctly
+            print(f"Warning: Record found without 'fields': {menu_record.get('id')}")
+    return processed_menus
+
+
+class SeasonMenuCache:
+    """
+    Per-season cache of curated menus with a TTL and stale-while-revalidate.
+
+    - Fresh entries are returned as-is.
+    - Expired entries younger than `max_stale_seconds` are returned immediately while a
+      background thread refetches them.
+    - Missing entries are fetched synchronously; if that fetch fails, any older copy is
+      served rather than nothing.
+    """
+
+    def __init__(self, fetch: Callable[[str], List[Dict]], ttl_seconds: float = MENU_CACHE_TTL_SECONDS,
+                 max_stale_seconds: float = MENU_CACHE_MAX_STALE_SECONDS):
+        self.fetch = fetch
+        self.ttl_seconds = ttl_seconds
+        self.max_stale_seconds = max_stale_seconds
+        self._entries: Dict[str, tuple] = {}  # season -> (menus, fetched_at)
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def get(self, season: str) -> List[Dict]:
+        entry = self._entries.get(season)
+        if entry is not None:
+            menus, fetched_at = entry
+            age = time.monotonic() - fetched_at
+            if age <= self.ttl_seconds:
+                return menus
+            if age <= self.max_stale_seconds:
+                self._refresh_in_background(season)
+                return menus
+
+        try:
+            return self._refresh(season)
+        except Exception as e:
+            print(f"Error fetching curated menus for season '{season}': {e}")
+            if entry is not None:
+                print(f"Serving cached menus for {season} from {int(time.monotonic() - entry[1])}s ago.")
+                return entry[0]
+            return []
+
+    def put(self, season: str, menus: List[Dict]) -> None:
+        self._entries[season] = (menus, time.monotonic())
+
+    def invalidate(self, season: Optional[str] = None) -> None:
+        """Drops one season (or every season) so the next get refetches it."""
+        with self._lock:
+            if season is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(season, None)
+
+    def _refresh(self, season: str) -> List[Dict]:
+        menus = self.fetch(season)
+        self.put(season, menus)
+        return menus
+
+    def _refresh_in_background(self, season: str) -> None:
+        with self._lock:
+            if season in self._refreshing:
+                return
+            self._refreshing.add(season)
+
+        def run():
+            try:
+                self._refresh(season)
+            except Exception as e:
+                print(f"Background refresh of curated menus for '{season}' failed, keeping stale copy: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(season)
+
+        threading.Thread(target=run, name=f"menu-cache-{season}", daemon=True).start()
+
+
+menu_cache = SeasonMenuCache(fetch_curated_menus_by_season)
+
+
+def get_curated_menus_by_season(season: str, use_cache: bool = True) -> List[Dict]:
     """
     Fetches all curated menus for a specific season from the "Curated Menus" table.
 
     Args:
         season: The season to filter menus by (e.g., "Spring", "Summer").
+        use_cache: Serve from the per-season cache (default) instead of querying Airtable.
 
     Returns:
         A list of dictionaries, where each dictionary represents a menu
         with all its details (Name, Starter Name, URL, Description, etc.).
         Returns an empty list if no menus are found or an error occurs.
     """
-    fields_to_fetch = [
-        "Season", "Menu Name",
-        "Starter Name", "Starter URL", "Starter Description",
-        "Main Name", "Main URL", "Main Description",
-        "Dessert Name", "Dessert URL", "Dessert Description"
-    ]
-    
-    # Ensure the field name for season in the formula matches your Airtable (e.g., {Season})
-    formula = f"{{Season}} = '{season}'"
-    
-    try:
-        print(f"Fetching curated menus for {season} with formula: {formula}") # Removed fields for brevity
-        menus = curated_menus_client.get_all_records(fields=fields_to_fetch, formula=formula)
-        
-        if not menus:
-            print(f"No curated menus found for season: {season}")
+    if use_cache:
+        menus = menu_cache.get(season)
+    else:
+        try:
+            menus = fetch_curated_menus_by_season(season)
+        except Exception as e:
+            print(f"Error fetching curated menus for season '{season}': {e}")
             return []
-        
-        # The client returns a list of records, each containing an 'id', 'createdTime', and 'fields'
-        # We want to return a list of the 'fields' dictionaries
-        processed_menus = []
-        for menu_record in menus:
-            if 'fields' in menu_record:
-                processed_menus.append(menu_record['fields'])
-            else:
-                # This case should ideally not happen if records are found and structured correctly
-                print(f"Warning: Record found without 'fields': {menu_record.get('id')}")
-        return processed_menus
-        
-    except Exception as e:
-        print(f"Error fetching curated menus for season '{season}': {e}")
-        return []
+
+    if not menus:
+        print(f"No curated menus found for season: {season}")
+    return menus
+
+
+def fetch_all_curated_menus(client: Optional[AirtableClient] = None) -> Dict[str, List[Dict]]:
+    """
+    Fetches every curated menu in one pass and groups the records by season.
+
+    A menu tagged with several seasons is listed under each of them. Errors are raised,
+    like fetch_curated_menus_by_season.
+
+    Returns:
+        Records ({"id", "fields"}) by season, sorted by menu name.
+    """
+    client = client or get_airtable_client(CURATED_MENUS_TABLE_NAME)
+    records = client.query(ALL_CURATED_MENUS_QUERY, raise_errors=True)
+
+    seasons: Dict[str, List[Dict]] = {}
+    for record in records:
+        fields = record.get('fields')
+        if not fields:
+            continue
+        menu_seasons = fields.get('Season')
+        # Season may be a single select (string) or a multi-select (list)
+        for season in ([menu_seasons] if isinstance(menu_seasons, str) else menu_seasons or []):
+            seasons.setdefault(season, []).append(record)
+    return seasons
+
+
+def export_curated_menus_snapshot(path: str, client: Optional[AirtableClient] = None) -> Dict[str, List[Dict]]:
+    """
+    Writes every curated menu, grouped by season, to a compact JSON file in one pass.
+
+    The file can be served from a static host or CDN instead of querying Airtable per
+    request. It is written to a temporary file and renamed so readers never see a
+    partial snapshot. The season cache is primed with the same data.
+
+    Returns:
+        The menus by season that were written.
+    """
+    records_by_season = fetch_all_curated_menus(client)
+
+    seasons: Dict[str, List[Dict]] = {}
+    for season, records in records_by_season.items():
+        for record in records:
+            menu = {k: v for k, v in record['fields'].items() if k != 'Season'}
+            menu['id'] = record.get('id')
+            seasons.setdefault(season, []).append(menu)
+
+    snapshot = {
+        "generated_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "seasons": seasons,
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+    prime_menu_cache(records_by_season)
+    print(f"Wrote {sum(len(m) for m in seasons.values())} curated menus across {len(seasons)} seasons to {path}")
+    return seasons
+
+
+def prime_menu_cache(records_by_season: Dict[str, List[Dict]]) -> None:
+    """Fills the season cache from fetch_all_curated_menus output."""
+    for season, records in records_by_season.items():
+        menu_cache.put(season, [record['fields'] for record in records])
 
 # Example usage (you can run this file directly to test):
 if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Show or export curated menus.")
+    parser.add_argument("--export", metavar="PATH", help="Write a JSON snapshot of all seasons to PATH and exit.")
+    parser.add_argument("--season", default="Spring", help="Season to display (default: Spring).")
+    args = parser.parse_args()
+
+    if args.export:
+        export_curated_menus_snapshot(args.export)
+        raise SystemExit(0)
+
     # Make sure you have some data in your "Curated Menus" table for "Spring"
     # or change the season here to one that has data.
-    selected_season = "Spring" 
+    selected_season = args.season
     spring_menus = get_curated_menus_by_season(selected_season)
     
     if spring_menus:
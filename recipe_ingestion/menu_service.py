@@ -0,0 +1,280 @@
+"""
+Async HTTP service that serves curated and generated menus from memory.
+
+The app asks this service instead of Airtable, so app launches cost no Airtable
+calls and the API key stays on the server. Everything is loaded in one pass,
+refreshed in the background, and every response body is encoded, gzipped and
+hashed (for its ETag) once per refresh rather than once per request.
+
+Endpoints (GET or HEAD):
+    /menus?season=Spring   Curated menus for a season, in Airtable's list format
+                           ({"records": [{"id", "fields"}]}) so the app can decode
+                           them like a direct Airtable response. Without a season,
+                           all seasons: {"seasons": {season: [records]}}.
+    /generate?season=&diet=  A random menu from the pre-built pool for that
+                           season/diet (both optional, case-insensitive).
+    /healthz               Load time and counts.
+
+Run with: python -m recipe_ingestion.menu_service [--host HOST] [--port PORT]
+"""
+import asyncio
+import datetime
+import gzip
+import hashlib
+import json
+import random
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from .menu_generator import POOL_DIETS, SEASONS, MenuEngine, get_menu_engine
+from .menu_retriever import CURATED_MENUS_TABLE_NAME, fetch_all_curated_menus
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+DEFAULT_REFRESH_INTERVAL_SECONDS = 5 * 60
+# Menus pre-built per season x diet for /generate
+DEFAULT_POOL_SIZE = 200
+KEEP_ALIVE_TIMEOUT_SECONDS = 30
+MAX_HEADER_BYTES = 16 * 1024
+# No endpoint takes a body; larger ones are refused rather than buffered
+MAX_BODY_BYTES = 64 * 1024
+
+# Curated menus change a few times a week; generated menus should differ per request
+MENUS_CACHE_CONTROL = "public, max-age=60"
+GENERATE_CACHE_CONTROL = "no-store"
+
+_REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+            405: "Method Not Allowed", 413: "Payload Too Large", 503: "Service Unavailable"}
+
+
+class EncodedBody:
+    """A JSON response body with its gzipped form and ETag, computed once."""
+
+    __slots__ = ("body", "gzipped", "etag")
+
+    def __init__(self, payload):
+        self.body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        gzipped = gzip.compress(self.body, compresslevel=9, mtime=0)
+        self.gzipped = gzipped if len(gzipped) < len(self.body) else None
+        self.etag = '"' + hashlib.blake2b(self.body, digest_size=12).hexdigest() + '"'
+
+
+class MenuSnapshot:
+    """Every response the service can give, pre-encoded from one load of the data."""
+
+    def __init__(self, menus_by_season: Dict[str, List[dict]], pools: Dict[tuple, List[dict]]):
+        self.generated_at = datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds")
+        # Looked up case-insensitively: keys are casefolded (see _fold)
+        self.menus = {
+            _fold(season): EncodedBody({"records": [{"id": r.get("id"), "fields": r["fields"]} for r in records]})
+            for season, records in menus_by_season.items()
+        }
+        self.no_menus = EncodedBody({"records": []})
+        self.all_menus = EncodedBody({
+            "generated_at": self.generated_at,
+            "seasons": {
+                season: [{"id": r.get("id"), "fields": r["fields"]} for r in records]
+                for season, records in menus_by_season.items()
+            },
+        })
+        self.pools: Dict[tuple, List[EncodedBody]] = {
+            (_fold(season), _fold(diet)): [EncodedBody({"season": season, "diet": diet, "menu": menu}) for menu in pool]
+            for (season, diet), pool in pools.items()
+        }
+        self.health = EncodedBody({
+            "generated_at": self.generated_at,
+            "curated_menus": {season: len(records) for season, records in menus_by_season.items()},
+            "generated_menus": sum(len(pool) for pool in pools.values()),
+        })
+
+
+def _param(params: Dict[str, List[str]], name: str) -> Optional[str]:
+    values = params.get(name)
+    return (values[0].strip() or None) if values else None
+
+
+def _fold(key: Optional[str]) -> Optional[str]:
+    """Season/diet lookup key, so "spring" and "vegan" find "Spring" and "Vegan"."""
+    return key.casefold() if key else None
+
+
+class MenuService:
+    """
+    Holds a MenuSnapshot and answers requests from it. `load` does the blocking
+    Airtable work and runs in a thread, so requests keep being served from the
+    previous snapshot while a refresh is in progress.
+    """
+
+    def __init__(self, engine: Optional[MenuEngine] = None, menus_client=None,
+                 refresh_interval: float = DEFAULT_REFRESH_INTERVAL_SECONDS,
+                 pool_size: int = DEFAULT_POOL_SIZE, distinct_hosts: bool = False, seed=None):
+        self.engine = engine or get_menu_engine()
+        self.menus_client = menus_client
+        self.refresh_interval = refresh_interval
+        self.pool_size = pool_size
+        self.distinct_hosts = distinct_hosts
+        self.rng = random.Random(seed)
+        self.snapshot: Optional[MenuSnapshot] = None
+
+    def load(self) -> MenuSnapshot:
+        """Fetches curated menus and tagged recipes and builds a new snapshot (blocking)."""
+        from .airtable_client import get_airtable_client
+
+        menus_by_season = fetch_all_curated_menus(self.menus_client or get_airtable_client(CURATED_MENUS_TABLE_NAME))
+        self.engine.refresh()
+        pools = self.engine.generate_pools(self.pool_size, seasons=[None] + SEASONS, diets=POOL_DIETS,
+                                           distinct_hosts=self.distinct_hosts, seed=self.rng.random())
+        snapshot = MenuSnapshot(menus_by_season, pools)
+        print(f"Menu snapshot built: {sum(len(r) for r in menus_by_season.values())} curated menus, "
+              f"{sum(len(p) for p in pools.values())} generated menus.")
+        return snapshot
+
+    async def refresh(self) -> bool:
+        """Rebuilds the snapshot in a worker thread; keeps the old one if that fails."""
+        loop = asyncio.get_running_loop()
+        try:
+            self.snapshot = await loop.run_in_executor(None, self.load)
+            return True
+        except Exception as e:
+            print(f"Error refreshing menus, keeping the previous snapshot: {e}")
+            return False
+
+    async def _refresh_loop(self):
+        while True:
+            # Retry sooner while there is nothing to serve yet
+            await asyncio.sleep(self.refresh_interval if self.snapshot else min(30, self.refresh_interval))
+            await self.refresh()
+
+    # --- Request handling ---
+
+    def respond(self, method: str, target: str, headers: Dict[str, str]) -> Tuple[int, List[Tuple[str, str]], bytes]:
+        """Maps one request to (status, headers, body). Never touches Airtable."""
+        if method not in ("GET", "HEAD"):
+            return self._error(405, "Only GET and HEAD are supported.", [("Allow", "GET, HEAD")])
+        url = urlsplit(target)
+        params = parse_qs(url.query)
+        snapshot = self.snapshot
+        if url.path == "/healthz":
+            if snapshot is None:
+                return self._error(503, "Menus are still loading.")
+            return self._send(snapshot.health, headers, "no-store")
+        if snapshot is None:
+            return self._error(503, "Menus are still loading.", [("Retry-After", "5")])
+
+        if url.path == "/menus":
+            season = _param(params, "season")
+            if season is None:
+                return self._send(snapshot.all_menus, headers, MENUS_CACHE_CONTROL)
+            body = snapshot.menus.get(_fold(season)) or snapshot.no_menus
+            return self._send(body, headers, MENUS_CACHE_CONTROL)
+
+        if url.path == "/generate":
+            season, diet = _param(params, "season"), _param(params, "diet")
+            pool = snapshot.pools.get((_fold(season), _fold(diet)))
+            if pool is None:
+                return self._error(400, f"Unknown season or diet; seasons: {SEASONS}, diets: {POOL_DIETS[1:]}.")
+            if not pool:
+                return self._error(404, "No menus match this season and diet.")
+            return self._send(self.rng.choice(pool), headers, GENERATE_CACHE_CONTROL)
+
+        return self._error(404, "Not found.")
+
+    @staticmethod
+    def _send(encoded: EncodedBody, headers: Dict[str, str], cache_control: str):
+        response_headers = [("ETag", encoded.etag), ("Cache-Control", cache_control), ("Vary", "Accept-Encoding")]
+        if_none_match = headers.get("if-none-match")
+        if if_none_match and (if_none_match.strip() == "*" or encoded.etag in if_none_match):
+            return 304, response_headers, b""
+        if encoded.gzipped is not None and "gzip" in headers.get("accept-encoding", ""):
+            response_headers.append(("Content-Encoding", "gzip"))
+            return 200, response_headers, encoded.gzipped
+        return 200, response_headers, encoded.body
+
+    @staticmethod
+    def _error(status: int, message: str, extra_headers=None):
+        body = json.dumps({"error": message}).encode("utf-8")
+        return status, [("Cache-Control", "no-store")] + list(extra_headers or []), body
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serves HTTP/1.1 requests on one connection, with keep-alive."""
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEP_ALIVE_TIMEOUT_SECONDS)
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ConnectionError):
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    writer.write(self._encode_response(*self._error(400, "Malformed request line."), "GET", False))
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    name, sep, value = line.partition(":")
+                    if sep:
+                        headers[name.strip().lower()] = value.strip()
+                # Skip any request body so the next request on this connection parses cleanly
+                content_length = headers.get("content-length", "0")
+                if content_length.isdigit() and int(content_length) > MAX_BODY_BYTES:
+                    writer.write(self._encode_response(*self._error(413, "Request body too large."), method, False))
+                    await writer.drain()
+                    break
+                if content_length.isdigit() and int(content_length):
+                    await reader.readexactly(int(content_length))
+
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                status, response_headers, body = self.respond(method, target, headers)
+                writer.write(self._encode_response(status, response_headers, body, method, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _encode_response(status, headers, body, method, keep_alive) -> bytes:
+        lines = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}"]
+        if status != 304:
+            lines.append("Content-Type: application/json; charset=utf-8")
+            lines.append(f"Content-Length: {len(body)}")
+        lines.extend(f"{name}: {value}" for name, value in headers)
+        lines.append("Connection: keep-alive" if keep_alive else "Connection: close")
+        head = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+        return head if method == "HEAD" or status == 304 else head + body
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        """Loads the first snapshot, then serves until cancelled, refreshing in the background."""
+        await self.refresh()
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_HEADER_BYTES)
+        refresher = asyncio.create_task(self._refresh_loop())
+        print(f"Serving menus on http://{host}:{port} (refreshing every {self.refresh_interval:.0f}s)")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            refresher.cancel()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve curated and generated menus from memory.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--refresh-interval", type=float, default=DEFAULT_REFRESH_INTERVAL_SECONDS,
+                        help="Seconds between background reloads from Airtable.")
+    parser.add_argument("--pool-size", type=int, default=DEFAULT_POOL_SIZE,
+                        help="Menus pre-built per season x diet for /generate.")
+    parser.add_argument("--distinct-hosts", action="store_true",
+                        help="Prefer a different site for each course of a generated menu.")
+    args = parser.parse_args()
+
+    service = MenuService(refresh_interval=args.refresh_interval, pool_size=args.pool_size,
+                          distinct_hosts=args.distinct_hosts)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("\nMenu service stopped.")
@@ -0,0 +1,345 @@
+"""
+Structured record queries, compiled to Airtable filterByFormula or run on a local mirror.
+
+    TAGGED_BY_COURSE = Query(
+        where=all_of(is_in("Course", ["Starter", "Snack"]), eq("Tagging Status", "Tagged")),
+        fields=["Title", "Source URL"],
+        sort=["Title"],
+    )
+    records = client.query(TAGGED_BY_COURSE)           # AirtableClient: filter/fields/sort in the request
+    records = LocalTable(recipes).query(TAGGED_BY_COURSE)  # same records from a list or corpus snapshot
+
+Values are always quoted and escaped by the compiler, so a season or title containing
+a quote or backslash cannot break (or change) the formula. Predicates are immutable
+and hashable; compiled formulas are cached, so a module-level Query costs nothing to
+reuse per request.
+"""
+import functools
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
+
+from .records import Recipe
+
+# --- Predicates ---
+
+# Operators; each compiles to one Airtable formula function and has a local evaluator
+EQ = "eq"
+IN = "in"
+HAS = "has"
+BLANK = "blank"
+RECORD_ID_IN = "record_id_in"
+AND = "and"
+OR = "or"
+NOT = "not"
+
+
+class Predicate:
+    """
+    One filter condition: `op` on `field` with `args` (a value, a tuple of values or
+    sub-predicates). Build them with eq, is_in, has, is_blank, record_id_in, all_of,
+    any_of and negate, or combine with `&`, `|` and `~`.
+    """
+
+    __slots__ = ("op", "field", "args", "_key")
+
+    def __init__(self, op: str, field: Optional[str], args: tuple):
+        self.op = op
+        self.field = field
+        self.args = args
+        # Typed, since True == 1 == 1.0 would otherwise share a cached formula
+        self._key = (op, field, tuple((type(arg), arg) for arg in args))
+
+    def __eq__(self, other):
+        return isinstance(other, Predicate) and self._key == other._key
+
+    def __hash__(self):
+        return hash(self._key)
+
+    def __repr__(self):
+        return f"Predicate({compile_formula(self)!r})"
+
+    def __and__(self, other: "Predicate") -> "Predicate":
+        return all_of(self, other)
+
+    def __or__(self, other: "Predicate") -> "Predicate":
+        return any_of(self, other)
+
+    def __invert__(self) -> "Predicate":
+        return negate(self)
+
+    def matches(self, record) -> bool:
+        """Whether an Airtable record ({"id", "fields"}) or Recipe satisfies the predicate, as Airtable would decide."""
+        op = self.op
+        if op == AND:
+            return all(p.matches(record) for p in self.args)
+        if op == OR:
+            return any(p.matches(record) for p in self.args)
+        if op == NOT:
+            return not self.args[0].matches(record)
+        if op == RECORD_ID_IN:
+            return _record_id(record) in self.args
+        cell = _cell(record, self.field)
+        if op == BLANK:
+            return _is_blank(cell)
+        if op == HAS:
+            return self.args[0] in (cell if isinstance(cell, list) else [cell])
+        return any(_cell_equals(cell, value) for value in self.args)
+
+
+def _check_value(value):
+    if not isinstance(value, (str, bool, int, float)):
+        raise TypeError(f"Unsupported query value {value!r}; use a str, bool or number.")
+    return value
+
+
+def eq(field: str, value) -> Predicate:
+    """`field` equals `value` (a str, bool or number)."""
+    return Predicate(EQ, field, (_check_value(value),))
+
+
+def is_in(field: str, values: Iterable) -> Predicate:
+    """`field` equals any of `values`; with no values, nothing matches."""
+    return Predicate(IN, field, tuple(_check_value(value) for value in values))
+
+
+def has(field: str, option: str) -> Predicate:
+    """
+    `field` includes `option`: one of the selected options of a multi-select, or the
+    value of a single select or text field.
+    """
+    if not isinstance(option, str):
+        raise TypeError(f"Unsupported option {option!r}; use a str.")
+    return Predicate(HAS, field, (option,))
+
+
+def is_blank(field: str) -> Predicate:
+    """`field` is empty (missing, '', no options selected or unchecked)."""
+    return Predicate(BLANK, field, ())
+
+
+def record_id_in(record_ids: Iterable[str]) -> Predicate:
+    """The record is one of `record_ids`."""
+    return Predicate(RECORD_ID_IN, None, tuple(_check_value(record_id) for record_id in record_ids))
+
+
+def all_of(*predicates: Predicate) -> Predicate:
+    """Every predicate holds; nested all_of calls are flattened."""
+    return Predicate(AND, None, _flatten(AND, predicates))
+
+
+def any_of(*predicates: Predicate) -> Predicate:
+    """At least one predicate holds; nested any_of calls are flattened."""
+    return Predicate(OR, None, _flatten(OR, predicates))
+
+
+def negate(predicate: Predicate) -> Predicate:
+    return Predicate(NOT, None, (predicate,))
+
+
+def _flatten(op: str, predicates) -> tuple:
+    flat = []
+    for predicate in predicates:
+        flat.extend(predicate.args if predicate.op == op else (predicate,))
+    return tuple(flat)
+
+# --- Formula compilation ---
+
+def quote_string(value: str) -> str:
+    """A formula string literal: single-quoted, with backslashes and quotes escaped."""
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+def field_ref(field: str) -> str:
+    """A formula field reference, {Field Name}, with a closing brace in the name escaped."""
+    return "{" + field.replace("\\", "\\\\").replace("}", "\\}") + "}"
+
+
+def _literal(value) -> str:
+    if isinstance(value, bool):
+        return "TRUE()" if value else "FALSE()"
+    if isinstance(value, str):
+        return quote_string(value)
+    return repr(value)
+
+
+def _join(function: str, parts: List[str], empty: str) -> str:
+    if not parts:
+        return empty
+    return parts[0] if len(parts) == 1 else f"{function}({', '.join(parts)})"
+
+
+@functools.lru_cache(maxsize=256)
+def compile_formula(predicate: Optional[Predicate]) -> Optional[str]:
+    """The filterByFormula text for `predicate` (None for no filter); cached per predicate."""
+    if predicate is None:
+        return None
+    op = predicate.op
+    if op == AND:
+        return _join("AND", [compile_formula(p) for p in predicate.args], "TRUE()")
+    if op == OR:
+        return _join("OR", [compile_formula(p) for p in predicate.args], "FALSE()")
+    if op == NOT:
+        return f"NOT({compile_formula(predicate.args[0])})"
+    if op == RECORD_ID_IN:
+        return _join("OR", [f"RECORD_ID()={quote_string(rid)}" for rid in predicate.args], "FALSE()")
+    ref = field_ref(predicate.field)
+    if op == BLANK:
+        return f"{ref}=BLANK()"
+    if op == HAS:
+        # A multi-select reads as "A, B" in a formula; pad both sides so only whole options match
+        return f"FIND({quote_string(', ' + predicate.args[0] + ', ')}, ', ' & {ref} & ', ')>0"
+    return _join("OR", [f"{ref}={_literal(value)}" for value in predicate.args], "FALSE()")
+
+# --- Local evaluation ---
+# Mirrors how Airtable compares cells in a formula: multi-selects read as their
+# comma-joined text, and empty cells equal '' / 0 / FALSE().
+
+def _record_id(record) -> Optional[str]:
+    return record.record_id if isinstance(record, Recipe) else record.get("id")
+
+
+def _cell(record, field: str):
+    if isinstance(record, Recipe):
+        return record.get(field)
+    return record.get("fields", record).get(field)
+
+
+def _is_blank(cell) -> bool:
+    return cell is None or cell is False or cell == "" or cell == []
+
+
+def _cell_equals(cell, value) -> bool:
+    if isinstance(value, bool):
+        return bool(cell) == value
+    if isinstance(value, str):
+        if isinstance(cell, list):
+            cell = ", ".join(str(item) for item in cell)
+        return ("" if cell is None else str(cell)) == value
+    return (cell or 0) == value
+
+# --- Queries ---
+
+SortSpec = Union[str, Tuple[str, str]]
+
+
+def _normalize_sort(sort: Optional[Sequence[SortSpec]]) -> Tuple[Tuple[str, str], ...]:
+    """(field, "asc"/"desc") pairs; "-Field" means descending."""
+    if not sort:
+        return ()
+    if isinstance(sort, str):
+        sort = [sort]
+    pairs = []
+    for item in sort:
+        if isinstance(item, str):
+            pairs.append((item[1:], "desc") if item.startswith("-") else (item, "asc"))
+        else:
+            field, direction = item
+            if direction not in ("asc", "desc"):
+                raise ValueError(f"Sort direction must be 'asc' or 'desc', not {direction!r}.")
+            pairs.append((field, direction))
+    return tuple(pairs)
+
+
+def _sort_key(value):
+    # Empty cells first, as Airtable sorts them ascending; lists by their text
+    if _is_blank(value):
+        return (0, "")
+    if isinstance(value, list):
+        value = ", ".join(str(item) for item in value)
+    return (1, value) if isinstance(value, (int, float)) else (2, str(value).lower())
+
+
+class Query:
+    """
+    A filter, the fields to return, a sort order and a record limit.
+
+    Against Airtable (AirtableClient.query) all four go into the request, so only the
+    matching rows and the listed columns are downloaded. `apply` does the same to
+    records already in memory (see LocalTable).
+    """
+
+    __slots__ = ("where", "fields", "sort", "max_records", "view")
+
+    def __init__(self, where: Optional[Predicate] = None, fields: Optional[Iterable[str]] = None,
+                 sort: Optional[Sequence[SortSpec]] = None, max_records: int = 0, view: Optional[str] = None):
+        self.where = where
+        self.fields = tuple(fields) if fields else ()
+        self.sort = _normalize_sort(sort)
+        self.max_records = max_records or 0
+        self.view = view
+
+    def __repr__(self):
+        return f"Query(formula={self.formula!r}, fields={list(self.fields)!r}, sort={list(self.sort)!r})"
+
+    @property
+    def formula(self) -> Optional[str]:
+        return compile_formula(self.where)
+
+    def params(self) -> dict:
+        """Keyword parameters for AirtableClient.iter_record_pages."""
+        params = {}
+        if self.view:
+            params["view"] = self.view
+        if self.max_records > 0:
+            params["max_records"] = self.max_records
+        if self.fields:
+            params["fields"] = list(self.fields)
+        if self.sort:
+            # Explicit directions: the wrapper carries a "-Field" direction over to later fields
+            params["sort"] = list(self.sort)
+        formula = self.formula
+        if formula:
+            params["filterByFormula"] = formula
+        return params
+
+    def apply(self, records: Iterable) -> List[dict]:
+        """
+        Runs the query on Airtable records ({"id", "fields"}) or Recipe objects in memory.
+
+        Returns Airtable-shaped records holding only the queried fields (Recipes are
+        converted), so results look the same as from AirtableClient.query. `view` is
+        ignored: a local mirror has no views.
+        """
+        where = self.where
+        matched = [record for record in records if where is None or where.matches(record)]
+        for field, direction in reversed(self.sort):
+            matched.sort(key=lambda record: _sort_key(_cell(record, field)), reverse=direction == "desc")
+        if self.max_records > 0:
+            matched = matched[:self.max_records]
+        return [self._project(record) for record in matched]
+
+    def _project(self, record) -> dict:
+        if isinstance(record, Recipe):
+            if self.fields:
+                fields = {f: v for f in self.fields if (v := record.get(f)) is not None}
+            else:
+                fields = record.to_airtable_fields(skip_empty=True)
+            return {"id": record.record_id, "fields": fields}
+        fields = record.get("fields", {})
+        if self.fields:
+            fields = {f: fields[f] for f in self.fields if f in fields}
+        return {**record, "fields": fields}
+
+
+class LocalTable:
+    """
+    A read-only table held in memory (Airtable records or Recipe objects, e.g. from a
+    corpus_export snapshot) that answers `query` like AirtableClient does, so code that
+    takes a client can run offline against a mirror.
+    """
+
+    def __init__(self, records: Iterable):
+        self.records = list(records)
+
+    def query(self, query: Query, raise_errors: bool = False) -> List[dict]:
+        return query.apply(self.records)
+
+    def iter_query_pages(self, query: Query, page_size: int = 100):
+        results = query.apply(self.records)
+        for start in range(0, len(results), page_size):
+            yield results[start:start + page_size]
+
+    @classmethod
+    def from_snapshot(cls, kind: str = "recipes", directory: Optional[str] = None) -> "LocalTable":
+        """A mirror of the Recipes ("recipes") or Curated Menus ("curated_menus") snapshot from corpus_export."""
+        from .corpus_export import CURATED_MENUS_NAME, load_curated_menus, load_recipes
+        return cls(load_curated_menus(directory) if kind == CURATED_MENUS_NAME else load_recipes(directory))
@@ -0,0 +1,217 @@
+import email.utils
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+AIRTABLE_HOST = "api.airtable.com"
+
+# Status codes that mean "slow down" rather than "this request was bad"
+THROTTLE_STATUS_CODES = {429, 503}
+
+
+def parse_retry_after(value) -> Optional[float]:
+    """Parses a Retry-After header (seconds or an HTTP date) into seconds from now."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class HostLimits:
+    """Bounds for one host's adaptive rate (requests/second) and concurrency."""
+
+    def __init__(self, initial_rate=2.0, min_rate=0.2, max_rate=10.0,
+                 initial_concurrency=2, max_concurrency=8):
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.initial_concurrency = initial_concurrency
+        self.max_concurrency = max_concurrency
+
+
+# Airtable allows 5 requests per second per base
+DEFAULT_HOST_LIMITS = {
+    AIRTABLE_HOST: HostLimits(initial_rate=4.0, max_rate=5.0, initial_concurrency=2, max_concurrency=4),
+}
+
+
+class _HostState:
+    def __init__(self, limits: HostLimits):
+        self.limits = limits
+        self.rate = limits.initial_rate
+        self.concurrency = float(limits.initial_concurrency)
+        self.in_flight = 0
+        self.next_slot = 0.0       # earliest monotonic time the next request may start
+        self.blocked_until = 0.0   # set from Retry-After
+        self.last_decrease = 0.0
+        self.latency_ewma = None
+        self.latency_floor = None  # best latency seen, the "healthy" baseline
+        self.requests = 0
+        self.throttled = 0
+        self.errors = 0
+
+
+class RequestTicket:
+    """Handed out by AdaptiveRateLimiter.request(); record the response status on it."""
+
+    def __init__(self):
+        self.status_code = None
+        self.retry_after = None
+
+    def record(self, status_code=None, retry_after=None):
+        self.status_code = status_code
+        self.retry_after = parse_retry_after(retry_after)
+
+
+class AdaptiveRateLimiter:
+    """
+    Per-host AIMD rate limiter.
+
+    Each host has a request rate and a concurrency limit. Healthy responses (fast,
+    non-throttled) raise both additively; a 429/503, a connection error or latency above
+    `latency_factor` times the best latency seen cuts both multiplicatively. A
+    Retry-After header pauses the host for that long. Safe to share between threads.
+    """
+
+    def __init__(self, host_limits: Optional[Dict[str, HostLimits]] = None,
+                 default_limits: Optional[HostLimits] = None,
+                 rate_increase=0.25, concurrency_increase=0.25, decrease_factor=0.5,
+                 latency_factor=3.0, latency_smoothing=0.2):
+        self.host_limits = dict(DEFAULT_HOST_LIMITS)
+        self.host_limits.update(host_limits or {})
+        self.default_limits = default_limits or HostLimits()
+        self.rate_increase = rate_increase
+        self.concurrency_increase = concurrency_increase
+        self.decrease_factor = decrease_factor
+        self.latency_factor = latency_factor
+        self.latency_smoothing = latency_smoothing
+        self._hosts: Dict[str, _HostState] = {}
+        self._condition = threading.Condition()
+
+    def _state(self, host: str) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = _HostState(self.host_limits.get(host, self.default_limits))
+            self._hosts[host] = state
+        return state
+
+    def acquire(self, host: str) -> None:
+        """Blocks until `host` has a free concurrency slot and its pacing allows another request."""
+        with self._condition:
+            state = self._state(host)
+            while state.in_flight >= max(1, int(state.concurrency)):
+                self._condition.wait()
+            state.in_flight += 1
+            start_at = max(time.monotonic(), state.next_slot, state.blocked_until)
+            state.next_slot = start_at + 1.0 / state.rate
+        delay = start_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def release(self, host: str, status_code=None, latency=None, retry_after=None, error=False) -> None:
+        """Records the outcome of a request started with acquire() and adapts the host's limits."""
+        with self._condition:
+            state = self._state(host)
+            state.in_flight = max(0, state.in_flight - 1)
+            state.requests += 1
+            now = time.monotonic()
+
+            if latency is not None:
+                if state.latency_ewma is None:
+                    state.latency_ewma = latency
+                else:
+                    state.latency_ewma += self.latency_smoothing * (latency - state.latency_ewma)
+                state.latency_floor = latency if state.latency_floor is None else min(state.latency_floor, latency)
+
+            throttled = status_code in THROTTLE_STATUS_CODES
+            slow = (
+                state.latency_ewma is not None and state.latency_floor
+                and state.latency_ewma > self.latency_factor * state.latency_floor
+            )
+            if throttled:
+                state.throttled += 1
+            if error:
+                state.errors += 1
+            if retry_after:
+                state.blocked_until = max(state.blocked_until, now + retry_after)
+
+            limits = state.limits
+            if throttled or error or slow:
+                # Cut at most once per request interval, so a burst of concurrent
+                # 429s counts as one signal instead of collapsing the rate to the floor
+                if now - state.last_decrease > 1.0 / state.rate:
+                    state.rate = max(limits.min_rate, state.rate * self.decrease_factor)
+                    state.concurrency = max(1.0, state.concurrency * self.decrease_factor)
+                    state.last_decrease = now
+                    if slow and not throttled:
+                        # Re-baseline so one slow period doesn't keep us throttled forever
+                        state.latency_floor = state.latency_ewma / self.latency_factor
+            else:
+                state.rate = min(limits.max_rate, state.rate + self.rate_increase)
+                state.concurrency = min(float(limits.max_concurrency),
+                                        state.concurrency + self.concurrency_increase / state.concurrency)
+            self._condition.notify_all()
+
+    @contextmanager
+    def request(self, host: str):
+        """
+        Context manager around one request to `host`:
+
+            with limiter.request(host) as ticket:
+                response = session.get(url)
+                ticket.record(response.status_code, response.headers.get("Retry-After"))
+
+        An exception leaving the block counts as an error unless a status was recorded.
+        """
+        self.acquire(host)
+        ticket = RequestTicket()
+        start = time.monotonic()
+        try:
+            yield ticket
+        except BaseException:
+            self.release(host, ticket.status_code, time.monotonic() - start, ticket.retry_after,
+                         error=ticket.status_code is None)
+            raise
+        self.release(host, ticket.status_code, time.monotonic() - start, ticket.retry_after)
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Current per-host rates and counters, for run metrics."""
+        with self._condition:
+            return {
+                host: {
+                    "rate_per_s": round(state.rate, 2),
+                    "concurrency": int(state.concurrency),
+                    "in_flight": state.in_flight,
+                    "latency_ms": round(state.latency_ewma * 1000) if state.latency_ewma is not None else None,
+                    "requests": state.requests,
+                    "throttled": state.throttled,
+                    "errors": state.errors,
+                }
+                for host, state in self._hosts.items()
+            }
+
+    def print_metrics(self) -> None:
+        for host, metrics in sorted(self.snapshot().items()):
+            print(f"  {host}: {metrics['rate_per_s']} req/s, concurrency {metrics['concurrency']}, "
+                  f"latency {metrics['latency_ms']} ms, {metrics['requests']} requests, "
+                  f"{metrics['throttled']} throttled, {metrics['errors']} errors")
+
+
+_shared_limiter: Optional[AdaptiveRateLimiter] = None
+_shared_limiter_lock = threading.Lock()
+
+def get_rate_limiter() -> AdaptiveRateLimiter:
+    """Returns the process-wide limiter shared by EnhancedScraper and AirtableClient."""
+    global _shared_limiter
+    if _shared_limiter is None:
+        with _shared_limiter_lock:
+            if _shared_limiter is None:
+                _shared_limiter = AdaptiveRateLimiter()
+    return _shared_limiter
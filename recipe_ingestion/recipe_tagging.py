@@ -1,25 +1,37 @@
-import os
 import re
-import time
+import threading
 from tqdm import tqdm
-from transformers import pipeline
-from .airtable_client import AirtableClient  # Use our client
-from .config import AIRTABLE_BASE_ID, AIRTABLE_TABLE_NAME, AIRTABLE_API_KEY # Use our config
-
-# 1️⃣ SET UP AIRTABLE CLIENT
-# Uses credentials from config.py which loads .env
-# Correct argument order: api_key, base_id, table_name
-airtable_client = AirtableClient(AIRTABLE_API_KEY, AIRTABLE_BASE_ID, AIRTABLE_TABLE_NAME)
-
-# 2️⃣ LOAD FREE ZERO-SHOT MODEL
-print("Downloading/loading zero-shot classification model...")
-# This might take time on the first run as it downloads the model (~1.6 GB)
-classifier = pipeline(
-    "zero-shot-classification",
-    model="facebook/bart-large-mnli",  # Revert back to BART model
-    device_map="auto"  # Automatically use GPU if available, otherwise CPU
-)
-print("Model loaded.")
+from .airtable_client import get_airtable_client  # Shared client, credentials from config.py which loads .env
+from .ingredient_parser import ingredient_terms
+from .query import Query, eq
+from .records import Recipe
+
+# 1️⃣ AIRTABLE CLIENT
+# get_airtable_client() builds the shared Recipes-table client on first use
+
+# 2️⃣ FREE ZERO-SHOT MODEL (loaded lazily)
+# Importing transformers and loading BART takes a long time, so it only happens the
+# first time a record is actually classified, not when this module is imported.
+_classifier = None
+_classifier_lock = threading.Lock()
+
+def get_classifier():
+    """Returns the zero-shot classification pipeline, loading it on first use."""
+    global _classifier
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                from transformers import pipeline
+
+                print("Downloading/loading zero-shot classification model...")
+                # This might take time on the first run as it downloads the model (~1.6 GB)
+                _classifier = pipeline(
+                    "zero-shot-classification",
+                    model="facebook/bart-large-mnli",  # Revert back to BART model
+                    device_map="auto"  # Automatically use GPU if available, otherwise CPU
+                )
+                print("Model loaded.")
+    return _classifier
 
 # --- Tagging Configuration ---
 COURSE_LABELS = ["Starter", "Main Course", "Side Dish", "Dessert", "Snack"]
@@ -32,11 +44,18 @@ WINTER = {"kale", "citrus", "sweet potato", "brussels sprout", "pomegranate"} #
 
 # --- Tagging Functions ---
 
+def _ingredient_tokens(ingredients: str):
+    """
+    Words of the raw text plus the parsed ingredient names' terms, which add singulars
+    ("tomatoes" -> "tomato") and two-word names ("sweet potato") for the keyword sets.
+    """
+    return set(re.findall(r'\b\w+\b', ingredients.lower())) | ingredient_terms(ingredients.split("\n"))
+
 def guess_season(ingredients: str):
     """Simple season guessing based on keyword presence."""
     if not ingredients:
         return ["Unknown"] # Handle cases with no ingredients
-    tokens = set(re.findall(r'\b\w+\b', ingredients.lower())) # Extract words
+    tokens = _ingredient_tokens(ingredients) # Extract words and ingredient names
 
     # Check intersections, can be refined for multi-season items
     if tokens & SPRING: return ["Spring"]
@@ -60,7 +79,7 @@ def guess_diets(ingredients: str):
     # Define common gluten terms
     gluten = {"flour", "bread", "pasta", "wheat", "barley", "rye", "noodle", "dough", "crust"} # Added noodle, dough, crust
 
-    ing_tokens = set(re.findall(r'\b\w+\b', ing))
+    ing_tokens = _ingredient_tokens(ing)
 
     is_vegetarian = not bool(ing_tokens & meat_fish)
     is_vegan = is_vegetarian and not bool(ing_tokens & dairy_egg) and "honey" not in ing # Check for dairy/egg/honey
@@ -76,50 +95,145 @@ def guess_diets(ingredients: str):
 
     return diets if diets else ["Unknown"]
 
-def tag_record(record_data):
-    """Generates tags for a single Airtable record."""
-    fields = record_data.get("fields", {})
-    title = fields.get("Title", "")
-    ingredients_raw = fields.get("Ingredients (raw)", "") # Use the raw field
-
-    if not title and not ingredients_raw:
-        print(f"Skipping record {record_data.get('id')} due to missing Title and Ingredients.")
-        return {"Tagging Status": "Failed - Missing Data"}
+# Fields tagging reads; fetch only these instead of whole records
+TAGGING_INPUT_FIELDS = ["Title", "Ingredients (raw)"]
+PENDING_QUERY = Query(where=eq("Tagging Status", "Pending"), fields=TAGGING_INPUT_FIELDS)
+# Records per classifier call / Airtable batch write
+TAGGING_BATCH_SIZE = 16
 
+def _classification_text(title, ingredients_raw):
     # Concatenate title and ingredients for better context
-    text_to_classify = f"Recipe Title: {title}. Ingredients: {ingredients_raw}"
+    return f"Recipe Title: {title}. Ingredients: {ingredients_raw}"
 
-    # 🏷 Course via zero-shot classification
+def _classify_courses(texts, default="Unknown"):
+    """Top course label for each text, in one classifier call; `default` where it fails."""
+    if not texts:
+        return []
     try:
         # Use multi_label=False if we only want the top course
-        classification_result = classifier(text_to_classify, COURSE_LABELS, multi_label=False)
-        course = classification_result["labels"][0]
+        results = get_classifier()(texts, COURSE_LABELS, multi_label=False)
+        if isinstance(results, dict): # a single input comes back as a dict, not a list
+            results = [results]
+        return [result["labels"][0] for result in results]
     except Exception as e:
-        print(f"Error during classification for record {record_data.get('id')}: {e}")
-        course = "Unknown" # Default on error
+        if len(texts) == 1:
+            print(f"Error during classification: {e}")
+            return [default] # Default on error
+        print(f"Error during batch classification, retrying one by one: {e}")
+        return [_classify_courses([text], default)[0] for text in texts]
 
+def _tags(course, ingredients_raw):
     # 🏷 Season and Diet via keyword heuristics
-    season = guess_season(ingredients_raw)
-    diet_tags = guess_diets(ingredients_raw)
-
-    # --- Restore full tagging --- 
     return {
-        "Course": course,          # Update Course field
-        "Season": season,          # Update Season field (assuming it's multi-select)
-        "Diet Tags": diet_tags,    # Update Diet Tags field (assuming it's multi-select)
-        "Tagging Status": "Tagged" # Update status
+        "Course": course,                          # Update Course field
+        "Season": guess_season(ingredients_raw),   # Update Season field (assuming it's multi-select)
+        "Diet Tags": guess_diets(ingredients_raw), # Update Diet Tags field (assuming it's multi-select)
+        "Tagging Status": "Tagged"                 # Update status
     }
-    # --- End Restore ---
+
+def tag_recipes(recipes, default_course="Unknown"):
+    """
+    Generates tags for a batch of Recipe objects, classifying all of their courses in
+    a single model call.
+
+    Args:
+        recipes (list): Recipe objects (see records.py).
+        default_course: Course used when classification fails; pass None to get None
+                        instead of tags for those recipes.
+
+    Returns:
+        list: Tag fields for each recipe, in order; None for recipes without a title
+              or ingredients, or whose classification failed with default_course=None.
+    """
+    results = [None] * len(recipes)
+    to_classify = [] # (position, ingredients_raw, text)
+    for position, recipe in enumerate(recipes):
+        ingredients_raw = recipe.ingredients_raw or ""
+        if recipe.title or ingredients_raw:
+            to_classify.append((position, ingredients_raw, _classification_text(recipe.title or "", ingredients_raw)))
+
+    # 🏷 Course via zero-shot classification
+    courses = _classify_courses([text for _, _, text in to_classify], default=default_course)
+    for (position, ingredients_raw, _), course in zip(to_classify, courses):
+        if course is not None:
+            results[position] = _tags(course, ingredients_raw)
+    return results
+
+FAILED_TAGS = {"Tagging Status": "Failed"}
+
+def _tag_recipes_or_fail(recipes):
+    """tag_recipes, retried one by one if the batch raises; FAILED_TAGS for recipes that still fail."""
+    try:
+        return tag_recipes(recipes)
+    except Exception as e:
+        if len(recipes) == 1:
+            print(f"Error tagging record {recipes[0].record_id}: {e}")
+            return [dict(FAILED_TAGS)]
+        print(f"Error tagging batch of {len(recipes)} records, retrying one by one: {e}")
+        return [_tag_recipes_or_fail([recipe])[0] for recipe in recipes]
+
+def tag_records(records):
+    """
+    Generates tags for a batch of Airtable records. Records whose tagging raises are
+    marked 'Failed' (so they are not retried forever) instead of aborting the batch.
+
+    Returns:
+        list: (record_id, update_data) pairs in the same order as `records`.
+    """
+    recipes = [Recipe.from_airtable(record_data) for record_data in records]
+    results = []
+    for recipe, tags in zip(recipes, _tag_recipes_or_fail(recipes)):
+        if tags is None:
+            print(f"Skipping record {recipe.record_id} due to missing Title and Ingredients.")
+            tags = {"Tagging Status": "Failed - Missing Data"}
+        results.append((recipe.record_id, tags))
+    return results
+
+def tag_record(record_data):
+    """Generates tags for a single Airtable record."""
+    return tag_records([record_data])[0][1]
+
+def tag_scraped_recipes(scraped_recipes):
+    """
+    Generates tags for freshly scraped recipes (EnhancedScraper.scrape_recipe output),
+    so ingestion can create them already tagged instead of as 'Pending'.
+
+    Returns:
+        list: The tag fields for each recipe, in order, or None where tagging failed
+              (those recipes should be written as 'Pending' for the tagger to retry).
+    """
+    return tag_recipes([Recipe.from_scraped(scraped_data) for scraped_data in scraped_recipes], default_course=None)
+
+def write_tagged_ids(airtable_client, tagged):
+    """
+    Writes (record_id, update_data) pairs back in batched updates.
+
+    Returns:
+        list: IDs of the records that were written as 'Tagged'.
+    """
+    updates = [{"id": record_id, "fields": data} for record_id, data in tagged if record_id]
+    written = {record["id"] for record in airtable_client.batch_update_records(updates)}
+    return [u["id"] for u in updates if u["id"] in written and u["fields"].get("Tagging Status") == "Tagged"]
 
 # --- Main Execution ---
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Tag pending recipes (course, season, diet).")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Keep the model loaded and tag new Pending records continuously (see tagging_daemon.py).")
+    args = parser.parse_args()
+
+    if args.daemon:
+        from .tagging_daemon import TaggingDaemon
+        TaggingDaemon().run()
+        raise SystemExit(0)
+
     print("Starting recipe tagging process...")
-    # Get records marked as 'Pending'
-    # Note: Adjust maxRecords as needed, or implement pagination in AirtableClient if dealing with >100 pending
-    pending_records = airtable_client.get_all_records(
-        formula="{Tagging Status}='Pending'" # Correct method name and parameter
-    )
+    airtable_client = get_airtable_client()
+    # Get records marked as 'Pending' (all pages, only the fields tagging reads)
+    pending_records = airtable_client.query(PENDING_QUERY)
 
     if not pending_records:
         print("No recipes found with 'Pending' status.")
@@ -128,36 +242,25 @@ if __name__ == "__main__":
         
         tagged_count = 0
         failed_count = 0
+        tagged_ids = []
 
-        # Use tqdm for progress bar
-        for record in tqdm(pending_records, desc="Tagging Recipes"):
-            record_id = record.get("id")
-            if not record_id:
-                print("Skipping record with missing ID.")
-                continue
-
-            try:
-                # Generate the tags
-                update_data = tag_record(record)
-
-                # Update the record in Airtable
-                airtable_client.update_record(record_id, update_data)
-                
-                if update_data.get("Tagging Status") == "Tagged":
-                    tagged_count += 1
-                else: # Handle specific failure cases if tag_record returns a different status
-                     failed_count += 1
-                     
-            except Exception as e:
-                print(f"\nError processing record {record_id}: {e}")
-                # Attempt to mark as Failed in Airtable
-                try:
-                    airtable_client.update_record(record_id, {"Tagging Status": "Failed"})
-                except Exception as ae:
-                    print(f"  Failed to update status for {record_id}: {ae}")
-                failed_count += 1
-            
-            # Be polite to Airtable API
-            time.sleep(0.3) # Slightly increased sleep time
+        # Use tqdm for progress bar; classify and write back a batch at a time
+        with tqdm(total=len(pending_records), desc="Tagging Recipes") as progress:
+            for start in range(0, len(pending_records), TAGGING_BATCH_SIZE):
+                chunk = pending_records[start:start + TAGGING_BATCH_SIZE]
+                batch = [r for r in chunk if r.get("id")]
+                tagged = tag_records(batch)
+                batch_tagged_ids = write_tagged_ids(airtable_client, tagged)
+                tagged_ids += batch_tagged_ids
+                tagged_count += len(batch_tagged_ids)
+                failed_count += len(tagged) - len(batch_tagged_ids)
+                progress.update(len(chunk))
+            # Politeness toward the Airtable API is handled by the client's adaptive rate limiter
 
         print(f"\nTagging complete. Successfully tagged: {tagged_count}, Failed: {failed_count}")
+        if tagged_count:
+            from .similar_recipes import update_similar_index
+            # Only the recipes tagged in this run are fetched for the index
+            update_similar_index(airtable_client, record_ids=tagged_ids)
+        print("Request rates:")
+        airtable_client.rate_limiter.print_metrics()
@@ -0,0 +1,217 @@
+import re
+import sys
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .durations import parse_duration_minutes, parse_servings
+
+# Airtable field names in the Recipes table
+TITLE = "Title"
+SOURCE_URL = "Source URL"
+IMAGE_URL = "Image URL"
+INGREDIENTS_RAW = "Ingredients (raw)"
+COURSE = "Course"
+SEASON = "Season"
+DIET_TAGS = "Diet Tags"
+TAGGING_STATUS = "Tagging Status"
+APPROVED = "Approved"
+TOTAL_TIME_MINUTES = "Total Time (min)"
+SERVINGS_MIN = "Servings (min)"
+SERVINGS_MAX = "Servings (max)"
+
+# Fields format_for_airtable has always written for a new recipe, in order
+NEW_RECORD_FIELDS = [TITLE, SOURCE_URL, IMAGE_URL, INGREDIENTS_RAW, TAGGING_STATUS, APPROVED]
+# Parsed from the scraped total_time/yields; written only when known
+TIME_AND_YIELD_FIELDS = [TOTAL_TIME_MINUTES, SERVINGS_MIN, SERVINGS_MAX]
+
+# Tag tuples are shared between records: a corpus has only a few dozen distinct
+# combinations ("Vegan", "Gluten-Free Potential"), so each is stored once.
+_tag_tuples: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+
+def intern_tags(values) -> Tuple[str, ...]:
+    """Returns the shared tuple of interned strings for a tag list (or a single-select string)."""
+    if not values:
+        return ()
+    if isinstance(values, str):
+        values = (values,)
+    key = tuple(values)
+    shared = _tag_tuples.get(key)
+    if shared is None:
+        shared = tuple(sys.intern(value) for value in key)
+        _tag_tuples[shared] = shared
+    return shared
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if value else None
+
+
+def _split_lines(text: Optional[str]) -> Tuple[str, ...]:
+    if not text:
+        return ()
+    return tuple(filter(None, map(str.strip, text.split("\n"))))
+
+
+# Same netloc as urlparse(url).netloc for absolute URLs, without its per-call overhead
+_NETLOC_RE = re.compile(r"[A-Za-z][A-Za-z0-9+.-]*://([^/?#]*)")
+
+def _host(url: Optional[str]) -> Optional[str]:
+    match = _NETLOC_RE.match(url) if url else None
+    return sys.intern(match.group(1)) if match and match.group(1) else None
+
+
+class Recipe:
+    """
+    One recipe, as scraped or as stored in Airtable.
+
+    Uses slots, tuples and interned tag strings so a whole corpus can be held in
+    memory cheaply. `get(field)` reads a value by its Airtable field name, in the
+    shape Airtable returns it, so code written against a record's "fields" dict
+    can use a Recipe directly.
+    """
+
+    __slots__ = ("record_id", "title", "url", "image", "host", "ingredients", "instructions",
+                 "yields", "total_time", "course", "seasons", "diet_tags", "tagging_status", "approved",
+                 "total_minutes", "servings_min", "servings_max")
+
+    def __init__(self, title: Optional[str] = None, url: Optional[str] = None, image: Optional[str] = None,
+                 host: Optional[str] = None, ingredients: Iterable[str] = (), instructions: Iterable[str] = (),
+                 yields=None, total_time=None, course: Optional[str] = None, seasons=(), diet_tags=(),
+                 tagging_status: Optional[str] = None, approved: Optional[bool] = None,
+                 record_id: Optional[str] = None, total_minutes: Optional[int] = None,
+                 servings: Optional[Tuple[int, int]] = None):
+        self.record_id = record_id
+        self.title = title
+        self.url = url
+        self.image = image
+        self.host = _intern(host) if host is not None else _host(url)
+        self.ingredients = tuple(ingredients)
+        self.instructions = tuple(instructions)
+        self.yields = yields
+        self.total_time = total_time
+        self.course = _intern(course)
+        self.seasons = intern_tags(seasons)
+        self.diet_tags = intern_tags(diet_tags)
+        self.tagging_status = _intern(tagging_status)
+        self.approved = approved
+        # Numeric forms of total_time/yields, parsed from them unless given
+        self.total_minutes = total_minutes if total_minutes is not None else parse_duration_minutes(total_time)
+        self.servings_min, self.servings_max = servings or parse_servings(yields) or (None, None)
+
+    def __repr__(self):
+        return f"Recipe({self.title!r}, course={self.course!r}, record_id={self.record_id!r})"
+
+    # --- Converters ---
+
+    @classmethod
+    def from_scraped(cls, data: dict) -> "Recipe":
+        """From EnhancedScraper.scrape_recipe output."""
+        return cls(
+            title=data.get("title"),
+            url=data.get("url"),
+            image=data.get("image"),
+            host=data.get("host"),
+            ingredients=data.get("ingredients") or (),
+            instructions=data.get("instructions") or (),
+            yields=data.get("yields"),
+            total_time=data.get("total_time"),
+        )
+
+    @classmethod
+    def from_airtable(cls, record: dict) -> "Recipe":
+        """From an Airtable record ({"id", "fields"}) or a bare fields dict; missing fields stay empty."""
+        fields = record.get("fields", record)
+        image = fields.get(IMAGE_URL)
+        if isinstance(image, list): # attachment field: [{"url": ...}, ...]
+            image = image[0].get("url") if image else None
+        course, status = fields.get(COURSE), fields.get(TAGGING_STATUS)
+
+        # Loading a whole table goes through here, so fill the slots directly
+        recipe = cls.__new__(cls)
+        recipe.record_id = record.get("id")
+        recipe.title = fields.get(TITLE)
+        recipe.url = fields.get(SOURCE_URL)
+        recipe.image = image
+        recipe.host = _host(recipe.url)
+        recipe.ingredients = _split_lines(fields.get(INGREDIENTS_RAW))
+        recipe.instructions = ()
+        recipe.yields = None
+        recipe.total_time = None
+        recipe.course = sys.intern(course) if course else None
+        recipe.seasons = intern_tags(fields.get(SEASON))
+        recipe.diet_tags = intern_tags(fields.get(DIET_TAGS))
+        recipe.tagging_status = sys.intern(status) if status else None
+        recipe.approved = fields.get(APPROVED)
+        recipe.total_minutes = fields.get(TOTAL_TIME_MINUTES)
+        recipe.servings_min = fields.get(SERVINGS_MIN)
+        recipe.servings_max = fields.get(SERVINGS_MAX)
+        return recipe
+
+    @classmethod
+    def from_airtable_records(cls, records: Iterable[dict]) -> List["Recipe"]:
+        return [cls.from_airtable(record) for record in records if record.get("fields")]
+
+    @property
+    def ingredients_raw(self) -> Optional[str]:
+        """Ingredients as the newline-joined "Ingredients (raw)" text."""
+        return "\n".join(self.ingredients) if self.ingredients else None
+
+    def parsed_ingredients(self):
+        """Ingredients as ParsedIngredient tuples (quantity, unit, name, ...), via the shared parse cache."""
+        from .ingredient_parser import parse_ingredients
+        return parse_ingredients(self.ingredients)
+
+    def get(self, field: str, default=None):
+        """Value of an Airtable field, shaped as Airtable returns it (None/default if empty)."""
+        getter = _FIELD_GETTERS.get(field)
+        if getter is None:
+            return default
+        value = getter(self)
+        return default if value is None else value
+
+    def __getitem__(self, field: str):
+        value = self.get(field)
+        if value is None:
+            raise KeyError(field)
+        return value
+
+    def to_airtable_fields(self, fields: Optional[Iterable[str]] = None, skip_empty: bool = False) -> dict:
+        """
+        The recipe in the Airtable field layout.
+
+        Args:
+            fields: Field names to include; by default the new-record fields plus any
+                    tags that are set.
+            skip_empty: Leave out empty fields, as Airtable does in its responses.
+        """
+        if fields is None:
+            fields = list(NEW_RECORD_FIELDS)
+            fields += [field for field in TIME_AND_YIELD_FIELDS if _FIELD_GETTERS[field](self) is not None]
+            if self.course:
+                fields += [COURSE, SEASON, DIET_TAGS]
+        data = {}
+        for field in fields:
+            value = _FIELD_GETTERS[field](self)
+            if value is not None or not skip_empty:
+                data[field] = value
+        return data
+
+
+def _list_or_none(values: Tuple[str, ...]) -> Optional[List[str]]:
+    return list(values) if values else None
+
+
+_FIELD_GETTERS = {
+    TITLE: lambda r: r.title,
+    SOURCE_URL: lambda r: r.url,
+    IMAGE_URL: lambda r: [{"url": r.image}] if r.image else None,
+    INGREDIENTS_RAW: lambda r: r.ingredients_raw,
+    COURSE: lambda r: r.course,
+    SEASON: lambda r: _list_or_none(r.seasons),
+    DIET_TAGS: lambda r: _list_or_none(r.diet_tags),
+    TAGGING_STATUS: lambda r: r.tagging_status,
+    APPROVED: lambda r: r.approved,
+    TOTAL_TIME_MINUTES: lambda r: r.total_minutes,
+    SERVINGS_MIN: lambda r: r.servings_min,
+    SERVINGS_MAX: lambda r: r.servings_max,
+}
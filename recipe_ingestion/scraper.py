@@ -1,40 +1,335 @@
 import requests
-from bs4 import BeautifulSoup
-from recipe_scrapers import scrape_me, WebsiteNotImplementedError
+from bs4 import BeautifulSoup, SoupStrainer
 from urllib.parse import urljoin, urlparse
+from typing import Dict, NamedTuple, Optional, Pattern, Tuple
 import datetime
+import html
 import re
-import time
+
+from .durations import looks_like_duration_label, parse_servings
+from .rate_limiter import THROTTLE_STATUS_CODES, get_rate_limiter
+
+# --- Targeted parsing ---
+# Recipe pages carry headers, nav, sidebars and hundreds of comments, but the extractors
+# only read the title and the entry-content/WPRM container, and the link finders only
+# read <a> tags. These per-site strainers make BeautifulSoup build just those subtrees.
+
+class PageStrainer(NamedTuple):
+    strainer: SoupStrainer
+    # CSS selectors that must all match in the strained tree; if one doesn't (unusual
+    # layout), the page is parsed in full instead so extraction still works
+    required: Tuple[str, ...]
+
+def _class_pattern(*class_names):
+    """Matches a class attribute containing any of `class_names` as a whole word."""
+    return re.compile(r'(?:^|\s)(?:%s)(?:\s|$)' % '|'.join(re.escape(c) for c in class_names))
+
+# Index pages without the site's <main> fall back to a <div> content area that the
+# strainer doesn't keep, so those are parsed in full
+SK_INDEX_PAGE_STRAINER = PageStrainer(SoupStrainer(['main', 'a']), ('a', 'main'))
+JS_INDEX_PAGE_STRAINER = PageStrainer(SoupStrainer(['main', 'a']), ('a', 'main#main'))
+
+SITE_STRAINERS = {
+    'smittenkitchen.com': {
+        'recipe': PageStrainer(
+            SoupStrainer(['h1', 'div'], class_=_class_pattern('entry-title', 'entry-content', 'smittenkitchen-recipe')),
+            ('h1', '.entry-content, .smittenkitchen-recipe'),
+        ),
+        'index': SK_INDEX_PAGE_STRAINER,
+    },
+    'justinesnacks.com': {
+        'recipe': PageStrainer(
+            SoupStrainer(['h1', 'div', 'figure'], class_=_class_pattern(
+                'entry-title', 'entry-content', 'featured-image', 'wprm-recipe-container')),
+            ('h1', '.entry-content, .wprm-recipe-container'),
+        ),
+        'index': JS_INDEX_PAGE_STRAINER,
+    },
+}
+
+def _site_key(url):
+    domain = urlparse(url).netloc.lower()
+    for site in SITE_STRAINERS:
+        if domain == site or domain.endswith('.' + site):
+            return site
+    return None
+
+# --- Index-page link rules ---
+# Precompiled per-site filters for recipe post links, shared by the soup link finders
+# and the raw-HTML href scanner below.
+
+class LinkRules(NamedTuple):
+    prefix: str                       # recipe links must start with this
+    pattern: Optional[Pattern]        # ... and match this, if set
+    exclude: Tuple[str, ...]          # ... and contain none of these
+    content_areas: Tuple[Tuple[str, Pattern], ...]  # (tag, opening tag pattern) of the content
+                                      # area links are taken from, in priority order
+    next_class: Pattern               # class attribute of the "next page" link
+    next_text: Tuple[Pattern, ...]    # fallback "next page" link texts, in priority order
+
+    def accepts(self, href):
+        if not href.startswith(self.prefix) or len(href) <= len(self.prefix):
+            return False
+        if any(part in href for part in self.exclude):
+            return False
+        return self.pattern is None or self.pattern.search(href) is not None
+
+SK_LINK_RULES = LinkRules(
+    prefix="https://smittenkitchen.com/",
+    pattern=re.compile(r'/\d{4}/\d{2}/[^/]+/?$'), # Typical SK post URLs (YYYY/MM/slug)
+    exclude=("/category/", "/tag/"),
+    content_areas=(
+        ('main', re.compile(r'<main\b[^>]*>', re.I)),
+        ('div', re.compile(r'<div\b[^>]*\bid\s*=\s*["\']?content(?=["\'\s/>])[^>]*>', re.I)),
+    ),
+    next_class=_class_pattern('nextpostslink'),
+    next_text=(re.compile(r'Older posts', re.I),),
+)
+
+JS_LINK_RULES = LinkRules(
+    prefix="https://justinesnacks.com/",
+    pattern=None, # Any post path; category/tag/page/anchor links are excluded
+    exclude=("/category/", "/tag/", "/page/", "#"),
+    content_areas=(
+        ('main', re.compile(r'<main\b[^>]*\bid\s*=\s*["\']?main(?=["\'\s/>])[^>]*>', re.I)),
+        ('div', re.compile(r'<div\b[^>]*\bclass\s*=\s*["\']?(?:[^"\'>]*\s)?site-content(?=["\'\s/>])[^>]*>', re.I)),
+    ),
+    next_class=re.compile(r'(?=.*(?:^|\s)next(?:\s|$))(?=.*(?:^|\s)page-numbers(?:\s|$))'),
+    next_text=(re.compile(r'Next', re.I), re.compile(r'Older Posts', re.I)),
+)
+
+# Short "Serves 4" / "Yield: 6 servings" labels, for the Justine Snacks fallback
+def _looks_like_yield_label(text, max_length=80):
+    lowered = text.lower()
+    return (len(text) <= max_length and ('yield' in lowered or 'servings' in lowered or 'serves' in lowered)
+            and parse_servings(text) is not None)
+
+
+# --- Image candidates ---
+# The first <img> of a post isn't always its photo (logos, avatars, ads), so several
+# candidates are returned best-first for the image stage (images.py) to choose from.
+MAX_IMAGE_CANDIDATES = 4
+# srcset entry to prefer: the smallest one at least this wide (thumbnails are 800px)
+PREFERRED_IMAGE_WIDTH = 800
+# One "url 800w" entry; entries are comma-separated, but URLs may contain commas too
+_SRCSET_ENTRY_RE = re.compile(r'(?:^|,)\s*([^\s,]\S*?)\s+(\d+)w\b')
+
+def _img_url(img, base_url):
+    """Best URL of an <img>: a suitably sized srcset entry, else the (lazy-loaded) src."""
+    srcset = img.get('srcset') or img.get('data-srcset') or img.get('data-lazy-srcset')
+    if srcset:
+        entries = sorted((int(width), url) for url, width in _SRCSET_ENTRY_RE.findall(srcset))
+        if entries:
+            wide_enough = [url for width, url in entries if width >= PREFERRED_IMAGE_WIDTH]
+            return urljoin(base_url, wide_enough[0] if wide_enough else entries[-1][1])
+    src = img.get('data-lazy-src') or img.get('data-src') or img.get('src')
+    if not src or src.startswith('data:') or src.lower().split('?')[0].endswith('.svg'):
+        return None
+    return urljoin(base_url, src)
+
+def image_candidates(soup, base_url, selectors, limit=MAX_IMAGE_CANDIDATES):
+    """Distinct image URLs from the <img> tags matching `selectors`, in selector order."""
+    candidates = []
+    for selector in selectors:
+        for img in soup.select(selector):
+            url = _img_url(img, base_url)
+            if url and url not in candidates:
+                candidates.append(url)
+                if len(candidates) >= limit:
+                    return candidates
+    return candidates
+
+
+# --- Raw-HTML href scanner ---
+# Index pages only need hrefs, so instead of building a soup, the HTML is streamed
+# through these compiled patterns once, collecting post links and the next-page link.
+_ANCHOR_RE = re.compile(r'<a\b([^>]*)>(.*?)</a\s*>', re.I | re.S)
+_HREF_RE = re.compile(r'\bhref\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'>]+))', re.I)
+_CLASS_RE = re.compile(r'\bclass\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'>]+))', re.I)
+_TAG_RE = re.compile(r'<[^>]+>')
+# Anchors in comments and scripts aren't links; the soup finders never see them
+_NON_MARKUP_RE = re.compile(r'<!--.*?-->|<(script|style)\b[^>]*>.*?</\1\s*>', re.I | re.S)
+
+# Open/close tag pattern per content-area tag name, compiled on first use
+_ELEMENT_TAG_RES: Dict[str, Pattern] = {}
+
+def _element_end(html_content, start, tag):
+    """Offset of the tag that closes the `tag` element whose content starts at `start` (nesting-aware)."""
+    tag_re = _ELEMENT_TAG_RES.get(tag)
+    if tag_re is None:
+        tag_re = _ELEMENT_TAG_RES[tag] = re.compile(r'<(/?)%s\b[^>]*>' % re.escape(tag), re.I)
+    depth = 1
+    for match in tag_re.finditer(html_content, start):
+        depth += -1 if match.group(1) else 1
+        if depth == 0:
+            return match.start()
+    return len(html_content)
+
+def _content_scope(html_content, rules):
+    """(start, end) of the first content area in rules.content_areas found on the page, or the whole page."""
+    for tag, open_pattern in rules.content_areas:
+        match = open_pattern.search(html_content)
+        if match:
+            return match.end(), _element_end(html_content, match.end(), tag)
+    return 0, len(html_content)
+
+def _attr_value(pattern, attrs):
+    match = pattern.search(attrs)
+    if not match:
+        return None
+    value = match.group(1) if match.group(1) is not None else match.group(2) if match.group(2) is not None else match.group(3)
+    return html.unescape(value) if '&' in value else value
+
+def scan_index_page(html_content, base_url, rules):
+    """
+    Finds recipe links and the next-page URL in one pass over the raw HTML.
+
+    Drop-in equivalent of the soup link finders: comments and scripts are ignored,
+    links are taken from inside the first content area in rules.content_areas (or the
+    whole page if it has none) and the next-page link from anywhere on the page.
+
+    Returns:
+        tuple: (set of recipe URLs, absolute next-page URL or None)
+    """
+    html_content = _NON_MARKUP_RE.sub('', html_content)
+    scope_start, scope_end = _content_scope(html_content, rules)
+
+    links = set()
+    next_by_class = None
+    next_by_text = [None] * len(rules.next_text)
+    for anchor in _ANCHOR_RE.finditer(html_content):
+        attrs = anchor.group(1)
+        href = _attr_value(_HREF_RE, attrs)
+        if not href:
+            continue
+        if scope_start <= anchor.start() < scope_end and rules.accepts(href):
+            links.add(href)
+        if next_by_class is None:
+            css_class = _attr_value(_CLASS_RE, attrs)
+            if css_class and rules.next_class.search(css_class):
+                next_by_class = href
+                continue
+            text = anchor.group(2)
+            if '<' in text:
+                text = _TAG_RE.sub('', text)
+            for i, text_pattern in enumerate(rules.next_text):
+                if next_by_text[i] is None and text_pattern.search(text):
+                    next_by_text[i] = href
+
+    next_href = next_by_class or next(filter(None, next_by_text), None)
+    return links, (urljoin(base_url, next_href) if next_href else None)
+
+# --- Soup link finders (used when link_scan_mode='soup') ---
+
+def find_sk_links(soup):
+    links = set()
+    # Find links within common article containers or main content area
+    content_area = soup.find('main') or soup.find('div', id='content') or soup
+    for link in content_area.find_all('a', href=True):
+        if SK_LINK_RULES.accepts(link['href']):
+            links.add(link['href'])
+    return links
+
+def find_sk_next_page(soup, base_url):
+    # Look for standard WordPress pagination links
+    next_link = soup.select_one('a.nextpostslink') or soup.find('a', string=SK_LINK_RULES.next_text[0])
+    if next_link and next_link.get('href'):
+        # Ensure the link is absolute
+        return urljoin(base_url, next_link['href'])
+    return None
+
+def find_js_links(soup):
+    links = set()
+    # Look for links within the main content area or specific article containers
+    content_area = soup.find('main', id='main') or soup.find('div', class_='site-content') or soup
+    for link in content_area.find_all('a', href=True):
+        if JS_LINK_RULES.accepts(link['href']):
+            links.add(link['href'])
+    return links
+
+def find_js_next_page(soup, base_url):
+    # Look for standard WordPress pagination links
+    next_link = soup.select_one('a.next.page-numbers') or soup.find('a', string=JS_LINK_RULES.next_text[0])
+    # Sometimes it might be an older posts link too
+    if not next_link:
+        next_link = soup.find('a', string=JS_LINK_RULES.next_text[1])
+    if next_link and next_link.get('href'):
+        # Ensure the link is absolute
+        return urljoin(base_url, next_link['href'])
+    return None
 
 class EnhancedScraper:
-    def __init__(self, default_timeout=10):
+    def __init__(self, default_timeout=10, targeted_parsing=True, link_scan_mode='regex', rate_limiter=None, max_retries=2,
+                 request_budget=None):
         self.default_timeout = default_timeout
+        # Per-host adaptive politeness, shared with AirtableClient (see rate_limiter.py)
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.max_retries = max_retries
+        # Optional per-host budget shared with other processes (work_queue.SharedRateBudget)
+        self.request_budget = request_budget
+        # Build only the subtrees each extractor needs (see SITE_STRAINERS)
+        self.targeted_parsing = targeted_parsing
+        # 'regex' scans raw index-page HTML for hrefs (scan_index_page); 'soup' parses it
+        self.link_scan_mode = link_scan_mode
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
 
     def fetch_html_for_links(self, url):
+        host = urlparse(url).netloc
         try:
-            response = requests.get(url, headers=self.headers, timeout=self.default_timeout)
+            for attempt in range(self.max_retries + 1):
+                if self.request_budget is not None:
+                    self.request_budget.acquire(host)
+                with self.rate_limiter.request(host) as ticket:
+                    response = requests.get(url, headers=self.headers, timeout=self.default_timeout)
+                    ticket.record(response.status_code, response.headers.get('Retry-After'))
+                if response.status_code not in THROTTLE_STATUS_CODES or attempt == self.max_retries:
+                    break
+                print(f"{host} throttled {url} ({response.status_code}), retrying ({attempt + 1}/{self.max_retries})...")
             response.raise_for_status()
             return response.text
         except requests.exceptions.RequestException as e:
             print(f"Error fetching HTML for link discovery from {url}: {e}")
             return None
 
-    def _get_soup(self, url):
+    def _get_soup(self, url, page_type=None):
+        """
+        Fetches and parses `url`. With targeted parsing on and a known site, `page_type`
+        ('recipe' or 'index') picks the strainer so only the needed subtrees are built.
+        """
         html_content = self.fetch_html_for_links(url)
         if html_content:
-            return BeautifulSoup(html_content, 'html.parser')
+            return self._parse_html(html_content, url, page_type)
         return None
 
+    def _parse_html(self, html_content, url, page_type=None):
+        page_strainer = None
+        if self.targeted_parsing and page_type:
+            page_strainer = SITE_STRAINERS.get(_site_key(url), {}).get(page_type)
+        if page_strainer is None:
+            return BeautifulSoup(html_content, 'html.parser')
+
+        soup = BeautifulSoup(html_content, 'html.parser', parse_only=page_strainer.strainer)
+        if all(soup.select_one(selector) for selector in page_strainer.required):
+            return soup
+        print(f"Targeted parse of {url} missed expected content, parsing the full page.")
+        soup.decompose()
+        return BeautifulSoup(html_content, 'html.parser')
+
     def scrape_recipe(self, url):
+        # recipe-scrapers is slow to import, so only load it once we actually scrape
+        from recipe_scrapers import scrape_me, WebsiteNotImplementedError
+
         print(f"Scraping individual recipe: {url}")
         domain = urlparse(url).netloc
 
         try:
             if 'bonappetit.com' in domain:
-                scraper = scrape_me(url)
+                if self.request_budget is not None:
+                    self.request_budget.acquire(domain)
+                with self.rate_limiter.request(domain): # recipe-scrapers fetches the page itself
+                    scraper = scrape_me(url)
                 return {
                     'title': scraper.title(),
                     'yields': scraper.yields(),
@@ -46,22 +341,31 @@ class EnhancedScraper:
                     'url': url
                 }
             elif 'smittenkitchen.com' in domain:
-                soup = self._get_soup(url)
+                soup = self._get_soup(url, page_type='recipe')
                 if soup:
-                    return self._scrape_smitten_kitchen(url, soup)
+                    try:
+                        return self._scrape_smitten_kitchen(url, soup)
+                    finally:
+                        soup.decompose() # Free the tree now rather than whenever the GC gets to it
                 else:
                     print(f"Failed to get soup for custom scraping: {url}")
                     return None
             elif 'justinesnacks.com' in domain:
-                soup = self._get_soup(url)
+                soup = self._get_soup(url, page_type='recipe')
                 if soup:
-                    return self._scrape_justine_snacks(url, soup)
+                    try:
+                        return self._scrape_justine_snacks(url, soup)
+                    finally:
+                        soup.decompose() # Free the tree now rather than whenever the GC gets to it
                 else:
                     print(f"Failed to get soup for custom scraping: {url}")
                     return None
             else:
                 print(f"Domain '{domain}' not explicitly supported, trying recipe-scrapers anyway...")
-                scraper = scrape_me(url)
+                if self.request_budget is not None:
+                    self.request_budget.acquire(domain)
+                with self.rate_limiter.request(domain): # recipe-scrapers fetches the page itself
+                    scraper = scrape_me(url)
                 return {
                     'title': scraper.title(),
                     'yields': scraper.yields(),
@@ -90,8 +394,8 @@ class EnhancedScraper:
             print(f"SK: Error parsing title: {e}"); data['title'] = None
 
         try:
-            img_tag = soup.select_one('.entry-content img')
-            data['image'] = img_tag['src'] if img_tag else None
+            data['image_candidates'] = image_candidates(soup, url, ['.entry-content img'])
+            data['image'] = data['image_candidates'][0] if data['image_candidates'] else None
         except Exception as e:
             print(f"SK: Error parsing image: {e}"); data['image'] = None
 
@@ -165,9 +469,10 @@ class EnhancedScraper:
 
         # Image (Often featured image)
         try:
-            # Look for common WordPress featured image classes or within entry content
-            img_tag = soup.select_one('.featured-image img') or soup.select_one('.entry-content img') or soup.find('img')
-            data['image'] = img_tag['src'] if img_tag else None
+            # Look for common WordPress featured image classes, then within entry content,
+            # then any image on the page
+            data['image_candidates'] = image_candidates(soup, url, ['.featured-image img', '.entry-content img', 'img'])
+            data['image'] = data['image_candidates'][0] if data['image_candidates'] else None
         except Exception as e: 
              print(f"JS: Error parsing image: {e}"); data['image'] = None
 
@@ -182,12 +487,13 @@ class EnhancedScraper:
             time_tag = soup.select_one('.wprm-recipe-total-time-container .wprm-recipe-time')
             if time_tag: data['total_time'] = time_tag.get_text(strip=True) # Needs parsing
             
-            # Fallback: Look for simple text near top or specific non-plugin classes (less reliable)
+            # Fallback: Look for simple text near top or specific non-plugin classes (less reliable).
+            # Only short labels that actually parse count, not any paragraph mentioning "time".
             if not data['yields']:
-                yield_tag_alt = soup.find(lambda tag: tag.name in ['p','li'] and ('yield' in tag.get_text(strip=True).lower() or 'servings' in tag.get_text(strip=True).lower()))
+                yield_tag_alt = soup.find(lambda tag: tag.name in ['p','li'] and _looks_like_yield_label(tag.get_text(strip=True)))
                 if yield_tag_alt: data['yields'] = yield_tag_alt.get_text(strip=True)
             if not data['total_time']:
-                 time_tag_alt = soup.find(lambda tag: tag.name in ['p','li'] and 'time' in tag.get_text(strip=True).lower())
+                 time_tag_alt = soup.find(lambda tag: tag.name in ['p','li'] and looks_like_duration_label(tag.get_text(strip=True)))
                  if time_tag_alt: data['total_time'] = time_tag_alt.get_text(strip=True)
                  
         except Exception as e:
@@ -261,7 +567,23 @@ class EnhancedScraper:
         print(f"Custom Justine Snacks scrape attempted for {url}")
         return data
 
-    def _fetch_and_find_links_paginated(self, start_url, site_name, link_selector_func, next_page_selector_func, max_pages=5):
+    def _find_links_on_page(self, url, link_rules, link_selector_func, next_page_selector_func):
+        """Returns (links, next_page_url) for one index page, or None if it couldn't be fetched."""
+        if self.link_scan_mode == 'regex':
+            html_content = self.fetch_html_for_links(url)
+            if not html_content:
+                return None
+            return scan_index_page(html_content, url, link_rules)
+
+        soup = self._get_soup(url, page_type='index')
+        if not soup:
+            return None
+        try:
+            return link_selector_func(soup), next_page_selector_func(soup, url)
+        finally:
+            soup.decompose()
+
+    def _fetch_and_find_links_paginated(self, start_url, site_name, link_rules, link_selector_func, next_page_selector_func, max_pages=5):
         """Helper function to fetch links from a starting URL and follow pagination."""
         found_urls = set()
         current_url = start_url
@@ -269,28 +591,23 @@ class EnhancedScraper:
 
         while current_url and pages_processed < max_pages:
             print(f"{site_name}: Processing page {pages_processed + 1}: {current_url}")
-            soup = self._get_soup(current_url)
-            if not soup:
-                print(f"{site_name}: Fetch error or empty soup for {current_url}, stopping pagination for this index.")
+            page = self._find_links_on_page(current_url, link_rules, link_selector_func, next_page_selector_func)
+            if page is None:
+                print(f"{site_name}: Fetch error or empty page for {current_url}, stopping pagination for this index.")
                 break # Stop if we can't fetch a page
 
-            # Find recipe links on the current page
-            links_on_page = link_selector_func(soup)
+            # Recipe links on the current page, and the next page link
+            links_on_page, next_page_url = page
             new_links_count = len(links_on_page - found_urls)
             found_urls.update(links_on_page)
             print(f"{site_name}: Found {new_links_count} new recipe links on this page (Total unique: {len(found_urls)})")
-
-            # Find the next page link
-            next_page_url = next_page_selector_func(soup, current_url)
             pages_processed += 1
 
             if not next_page_url or next_page_url == current_url:
                 print(f"{site_name}: No more pages found or next link is same as current. Ending pagination for {start_url}.")
                 current_url = None
             else:
-                current_url = next_page_url
-                # Optional: Add a small delay to be polite to the server
-                time.sleep(0.5) 
+                current_url = next_page_url # Politeness delay comes from the rate limiter
         
         print(f"{site_name}: Finished processing index {start_url}. Found {len(found_urls)} total unique links after {pages_processed} pages.")
         return found_urls
@@ -300,31 +617,10 @@ class EnhancedScraper:
         all_found_urls = set()
         processed_indices = 0
 
-        def find_sk_links(soup):
-            links = set()
-            # Find links within common article containers or main content area
-            content_area = soup.find('main') or soup.find('div', id='content') or soup
-            all_a_tags = content_area.find_all('a', href=True)
-            for link in all_a_tags:
-                href = link['href']
-                # Regex to match typical SK post URLs (YYYY/MM/slug)
-                if href.startswith("https://smittenkitchen.com/") and re.search(r'/\d{4}/\d{2}/[^/]+/?$', href): 
-                    if "/category/" not in href and "/tag/" not in href:
-                        links.add(href)
-            return links
-
-        def find_sk_next_page(soup, base_url):
-            # Look for standard WordPress pagination links
-            next_link = soup.select_one('a.nextpostslink') or soup.find('a', string=re.compile(r'Older posts', re.I))
-            if next_link and next_link['href']:
-                # Ensure the link is absolute
-                return urljoin(base_url, next_link['href']) 
-            return None
-
         for url in index_urls:
             print(f"Processing Smitten Kitchen index root: {url}")
             found_for_index = self._fetch_and_find_links_paginated(
-                url, "SK", find_sk_links, find_sk_next_page, max_pages=max_pages_per_index
+                url, "SK", SK_LINK_RULES, find_sk_links, find_sk_next_page, max_pages=max_pages_per_index
             )
             all_found_urls.update(found_for_index)
             processed_indices += 1
@@ -337,40 +633,13 @@ class EnhancedScraper:
         all_found_urls = set()
         processed_indices = 0
 
-        def find_js_links(soup):
-            links = set()
-            # Look for links within the main content area or specific article containers
-            content_area = soup.find('main', id='main') or soup.find('div', class_='site-content') or soup
-            all_a_tags = content_area.find_all('a', href=True)
-            for link in all_a_tags:
-                href = link['href']
-                # Check if it looks like a recipe post URL (avoids category/tag/page links)
-                if href.startswith("https://justinesnacks.com/") and "/category/" not in href and "/tag/" not in href and "/page/" not in href and "#" not in href and len(href) > len("https://justinesnacks.com/"):
-                     # Simple check: URL path has more than one segment usually indicates a post
-                     path_parts = urlparse(href).path.strip('/').split('/')
-                     if len(path_parts) >= 1: # e.g., /recipe-name/
-                        links.add(href)
-            return links
-
-        def find_js_next_page(soup, base_url):
-            # Look for standard WordPress pagination links
-            next_link = soup.select_one('a.next.page-numbers') or soup.find('a', string=re.compile(r'Next', re.I))
-            # Sometimes it might be an older posts link too
-            if not next_link:
-                 next_link = soup.find('a', string=re.compile(r'Older Posts', re.I))
-                 
-            if next_link and next_link['href']:
-                 # Ensure the link is absolute
-                return urljoin(base_url, next_link['href'])
-            return None
-
         for url in index_urls:
             print(f"Processing Justine Snacks index root: {url}")
             found_for_index = self._fetch_and_find_links_paginated(
-                url, "JS", find_js_links, find_js_next_page, max_pages=max_pages_per_index
+                url, "JS", JS_LINK_RULES, find_js_links, find_js_next_page, max_pages=max_pages_per_index
             )
             all_found_urls.update(found_for_index)
             processed_indices += 1
 
         print(f"--- Justine Snacks Complete: {len(all_found_urls)} unique URLs found from {processed_indices} index source(s) ---\n")
-        return list(all_found_urls)
\ No newline at end of file
+        return list(all_found_urls)
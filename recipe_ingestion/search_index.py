@@ -0,0 +1,412 @@
+import base64
+import bisect
+import heapq
+import json
+import math
+import os
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from .config import get_data_dir
+from .ingredient_parser import name_terms, parse_ingredients, singularize
+from .records import INGREDIENTS_RAW, TITLE, Recipe
+
+DEFAULT_SEARCH_INDEX_FILE = "search_index.json"
+SEARCH_INDEX_VERSION = 2
+
+# Postings of replaced recipes are dropped (see SearchIndex.compact) on save once
+# they make up this share of the docs
+COMPACT_DELETED_FRACTION = 0.1
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Query words that stand for a group of ingredients ("rhubarb -dairy")
+CATEGORY_TERMS = {
+    "dairy": {"milk", "buttermilk", "cheese", "parmesan", "ricotta", "mozzarella", "feta", "cheddar",
+              "yogurt", "butter", "cream", "creme fraiche", "mascarpone", "ghee"},
+    "meat": {"beef", "pork", "lamb", "veal", "chicken", "turkey", "duck", "bacon", "sausage", "ham", "prosciutto"},
+    "seafood": {"fish", "salmon", "tuna", "shrimp", "crab", "lobster", "clam", "mussel", "oyster", "anchovy", "cod"},
+    "gluten": {"flour", "bread", "pasta", "wheat", "barley", "rye", "noodle", "dough", "crust", "breadcrumb"},
+    "egg": {"egg", "yolk"},
+    "nuts": {"almond", "walnut", "pecan", "hazelnut", "pistachio", "cashew", "peanut"},
+}
+# Ingredient names containing one of these don't count towards the category, although
+# they contain one of its words ("peanut butter" is not dairy)
+CATEGORY_EXCLUSIONS = {
+    "dairy": ("peanut butter", "almond butter", "cashew butter", "nut butter", "seed butter", "apple butter",
+              "cocoa butter", "coconut butter", "vegan butter", "coconut milk", "coconut cream", "almond milk",
+              "oat milk", "soy milk", "rice milk", "cashew milk", "cashew cream", "vegan cheese",
+              "cream of tartar", "dairy-free", "non-dairy", "plant-based"),
+    "meat": ("vegan", "vegetarian", "plant-based", "meatless"),
+    "gluten": ("gluten-free", "rice flour", "almond flour", "coconut flour", "chickpea flour", "corn flour",
+               "tapioca flour", "oat flour", "rice noodle", "rice pasta"),
+    "egg": ("egg-free", "vegan egg"),
+}
+# Category terms are stored under this prefix, so they can't collide with words
+CATEGORY_PREFIX = "@"
+
+# Fields the index is built from
+SEARCH_FIELDS = [TITLE, INGREDIENTS_RAW]
+
+
+class SearchHit(NamedTuple):
+    record_id: str
+    title: str
+    score: float
+
+
+# --- Posting lists: (doc id delta, term frequency) pairs as varints ---
+
+def _append_varint(buf: bytearray, value: int) -> None:
+    while value >= 0x80:
+        buf.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buf.append(value)
+
+
+def _decode_postings(data: bytes) -> Tuple[List[int], List[int]]:
+    """Decodes a posting list into (doc ids, term frequencies)."""
+    docs, freqs = [], []
+    doc = value = shift = 0
+    first = True
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        if first:
+            doc += value
+            docs.append(doc)
+        else:
+            freqs.append(value)
+        first = not first
+        value = shift = 0
+    return docs, freqs
+
+
+def ingredient_categories(name: str, terms: Iterable[str]) -> List[str]:
+    """CATEGORY_TERMS groups a parsed ingredient name (with its name_terms) belongs to."""
+    name = name.lower()
+    return [category for category, words in CATEGORY_TERMS.items()
+            if not words.isdisjoint(terms)
+            and not any(phrase in name for phrase in CATEGORY_EXCLUSIONS.get(category, ()))]
+
+
+def recipe_terms(title: Optional[str], ingredient_lines: Iterable[str]) -> Dict[str, int]:
+    """
+    Term -> frequency for a recipe: title words and parsed ingredient names (with
+    singulars and two-word names), plus a CATEGORY_PREFIX term for each category its
+    ingredients belong to.
+    """
+    counts: Dict[str, int] = {}
+    for parsed in parse_ingredients(ingredient_lines):
+        terms = name_terms(parsed.name)
+        for term in terms:
+            counts[term] = counts.get(term, 0) + 1
+        for category in ingredient_categories(parsed.name, terms):
+            term = CATEGORY_PREFIX + category
+            counts[term] = counts.get(term, 0) + 1
+    if title:
+        for term in name_terms(title.lower()):
+            counts[term] = counts.get(term, 0) + 1
+    return counts
+
+
+class SearchIndex:
+    """
+    Inverted index over recipe titles and ingredients with BM25 ranking.
+
+    Posting lists are delta + varint encoded byte strings, decoded on demand through a
+    small cache. Recipes are added incrementally; re-adding a record replaces its old
+    entry. Query syntax (see `search`):
+
+        rhubarb strawberry     both terms
+        rhubarb|strawberry     either term
+        -dairy / not dairy     exclude a term or a category from CATEGORY_TERMS
+        rhub*                  prefix
+        "sweet potato"         two-word name (longer phrases are not indexed)
+
+    A query of only exclusions ("not egg") lists every recipe without them, unranked,
+    in the order they were added.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(get_data_dir(), DEFAULT_SEARCH_INDEX_FILE)
+        self.postings: Dict[str, bytearray] = {}
+        self._last_doc: Dict[str, int] = {}   # last doc id in each posting list, for appending deltas
+        self.record_ids: List[str] = []       # doc id -> record id
+        self.titles: List[str] = []
+        self.lengths: List[int] = []
+        self.deleted: Set[int] = set()
+        self._doc_by_record: Dict[str, int] = {}
+        self._total_length = 0
+        self._sorted_terms: Optional[List[str]] = None
+        self._dirty = False
+        self._postings_cache = lru_cache(maxsize=1024)(self._decode_term)
+
+    # --- Building ---
+
+    def __len__(self):
+        return len(self.record_ids) - len(self.deleted)
+
+    def add(self, record_id: str, title: Optional[str], ingredient_lines: Iterable[str]) -> int:
+        """Indexes one recipe (replacing any earlier version of the record); returns its doc id."""
+        old = self._doc_by_record.get(record_id)
+        if old is not None:
+            self.deleted.add(old)
+            self._total_length -= self.lengths[old]
+
+        doc = len(self.record_ids)
+        terms = recipe_terms(title, ingredient_lines)
+        for term, freq in terms.items():
+            buf = self.postings.get(term)
+            if buf is None:
+                buf = self.postings[term] = bytearray()
+                self._sorted_terms = None
+            _append_varint(buf, doc - self._last_doc.get(term, 0))
+            _append_varint(buf, freq)
+            self._last_doc[term] = doc
+
+        length = sum(terms.values())
+        self.record_ids.append(record_id)
+        self.titles.append(title or "")
+        self.lengths.append(length)
+        self._doc_by_record[record_id] = doc
+        self._total_length += length
+        self._postings_cache.cache_clear()
+        self._dirty = True
+        return doc
+
+    def add_recipe(self, recipe: Recipe) -> int:
+        return self.add(recipe.record_id, recipe.title, recipe.ingredients)
+
+    def add_airtable_records(self, records: Iterable[dict]) -> int:
+        """Indexes Airtable records (Title, Ingredients (raw)); returns how many."""
+        count = 0
+        for recipe in Recipe.from_airtable_records(records):
+            if recipe.record_id:
+                self.add_recipe(recipe)
+                count += 1
+        return count
+
+    def compact(self) -> None:
+        """Drops replaced recipes: renumbers the live docs and rewrites the postings without the dead ones."""
+        if not self.deleted:
+            return
+        new_doc_ids: Dict[int, int] = {}
+        record_ids, titles, lengths = [], [], []
+        for doc, record_id in enumerate(self.record_ids):
+            if doc in self.deleted:
+                continue
+            new_doc_ids[doc] = len(record_ids)
+            record_ids.append(record_id)
+            titles.append(self.titles[doc])
+            lengths.append(self.lengths[doc])
+
+        postings: Dict[str, bytearray] = {}
+        last_docs: Dict[str, int] = {}
+        for term, buf in self.postings.items():
+            docs, freqs = _decode_postings(buf)
+            new_buf = bytearray()
+            last = 0
+            for doc, freq in zip(docs, freqs):
+                new_doc = new_doc_ids.get(doc)
+                if new_doc is not None:
+                    _append_varint(new_buf, new_doc - last)
+                    _append_varint(new_buf, freq)
+                    last = new_doc
+            if new_buf:
+                postings[term] = new_buf
+                last_docs[term] = last
+
+        self.postings, self._last_doc = postings, last_docs
+        self.record_ids, self.titles, self.lengths = record_ids, titles, lengths
+        self._doc_by_record = {record_id: doc for doc, record_id in enumerate(record_ids)}
+        self.deleted = set()
+        self._sorted_terms = None
+        self._postings_cache.cache_clear()
+        self._dirty = True
+
+    # --- Persistence (same JSON + base64 layout as the dedup index) ---
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "SearchIndex":
+        """Loads the index from `path`, or returns an empty one if the file does not exist yet."""
+        index = cls(path)
+        if not os.path.exists(index.path):
+            return index
+        with open(index.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != SEARCH_INDEX_VERSION:
+            print(f"Search index at {index.path} has an old format; starting a new one "
+                  f"(run `python -m recipe_ingestion.search_index --rebuild` to reindex existing recipes).")
+            return index
+        for term, (encoded, last_doc) in data["postings"].items():
+            index.postings[term] = bytearray(base64.b64decode(encoded))
+            index._last_doc[term] = last_doc
+        for record_id, title, length in data["docs"]:
+            index.record_ids.append(record_id)
+            index.titles.append(title)
+            index.lengths.append(length)
+        index.deleted = set(data.get("deleted", []))
+        for doc, record_id in enumerate(index.record_ids):
+            if doc not in index.deleted:
+                index._doc_by_record[record_id] = doc
+                index._total_length += index.lengths[doc]
+        print(f"Loaded search index with {len(index)} recipes from {index.path}")
+        return index
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        if len(self.deleted) > COMPACT_DELETED_FRACTION * len(self.record_ids):
+            self.compact()
+        data = {
+            "version": SEARCH_INDEX_VERSION,
+            "docs": [list(doc) for doc in zip(self.record_ids, self.titles, self.lengths)],
+            "deleted": sorted(self.deleted),
+            "postings": {
+                term: [base64.b64encode(bytes(buf)).decode("ascii"), self._last_doc[term]]
+                for term, buf in self.postings.items()
+            },
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+    # --- Querying ---
+
+    def _decode_term(self, term: str) -> Tuple[List[int], List[int]]:
+        buf = self.postings.get(term)
+        return _decode_postings(buf) if buf else ([], [])
+
+    def _expand(self, word: str) -> List[str]:
+        """Index terms a query word stands for: a prefix, a category, or the word and its singular."""
+        if word.endswith("*"):
+            prefix = word[:-1]
+            if self._sorted_terms is None:
+                self._sorted_terms = sorted(self.postings)
+            start = bisect.bisect_left(self._sorted_terms, prefix)
+            end = bisect.bisect_left(self._sorted_terms, prefix + "￿")
+            return self._sorted_terms[start:end]
+        if word in CATEGORY_TERMS:
+            # Matched per ingredient when indexing, so exclusions like "peanut butter" apply
+            return [CATEGORY_PREFIX + word]
+        words = word.split()
+        # Single words and two-word names are indexed, with the (last) word also singularised
+        return sorted({word, " ".join(words[:-1] + [singularize(words[-1])])})
+
+    @staticmethod
+    def _parse_query(query: str) -> List[Tuple[bool, List[str]]]:
+        """Splits a query into (negated, alternatives) clauses."""
+        clauses = []
+        negate_next = False
+        parts = query.lower().split('"')
+        words = []
+        for i, part in enumerate(parts):
+            if i % 2:  # inside quotes: a phrase
+                if part.strip():
+                    words.append(" ".join(part.split()))
+            else:
+                words.extend(part.split())
+        for word in words:
+            if word == "not":
+                negate_next = True
+                continue
+            negated = negate_next or word.startswith("-")
+            negate_next = False
+            alternatives = [w for w in word.lstrip("-").split("|") if w]
+            if alternatives:
+                clauses.append((negated, alternatives))
+        return clauses
+
+    def search(self, query: str, limit: int = 20) -> List[SearchHit]:
+        """
+        Returns the best `limit` recipes matching every positive clause of `query` and
+        no negated one, ranked by BM25 over the positive terms. With only negated
+        clauses, the first `limit` recipes without any of them.
+        """
+        positive: List[List[str]] = []
+        negative: List[str] = []
+        for negated, alternatives in self._parse_query(query):
+            terms = [term for word in alternatives for term in self._expand(word)]
+            if negated:
+                negative.extend(terms)
+            else:
+                positive.append(terms)
+
+        live_docs = len(self)
+        if not (positive or negative) or not live_docs:
+            return []
+
+        # Candidate docs: intersect each clause's union, smallest clause first
+        clause_docs = []
+        for terms in positive:
+            docs: Set[int] = set()
+            for term in terms:
+                docs.update(self._postings_cache(term)[0])
+            clause_docs.append(docs)
+        clause_docs.sort(key=len)
+        candidates = clause_docs[0] if clause_docs else set(range(len(self.record_ids)))
+        for docs in clause_docs[1:]:
+            candidates = candidates & docs
+            if not candidates:
+                return []
+        for term in negative:
+            candidates = candidates.difference(self._postings_cache(term)[0])
+        candidates -= self.deleted
+        if not candidates:
+            return []
+
+        # BM25 over the positive terms
+        avg_length = self._total_length / live_docs
+        scores: Dict[int, float] = {}
+        for term in {term for terms in positive for term in terms}:
+            docs, freqs = self._postings_cache(term)
+            # Replaced recipes stay in the postings until the next compaction; don't count them
+            doc_freq = len(docs) - (len(self.deleted.intersection(docs)) if self.deleted else 0)
+            if not doc_freq:
+                continue
+            idf = math.log(1 + (live_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+            for doc, freq in zip(docs, freqs):
+                if doc in candidates:
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[doc] / avg_length)
+                    scores[doc] = scores.get(doc, 0.0) + idf * freq * (BM25_K1 + 1) / (freq + norm)
+        best = heapq.nlargest(limit, candidates, key=lambda doc: (scores.get(doc, 0.0), -doc))
+        return [SearchHit(self.record_ids[doc], self.titles[doc], round(scores.get(doc, 0.0), 4)) for doc in best]
+
+
+def rebuild_search_index(client=None, path: Optional[str] = None) -> SearchIndex:
+    """Builds a fresh index from every recipe in Airtable (projected to the searched fields) and saves it."""
+    from .airtable_client import get_airtable_client
+
+    client = client or get_airtable_client()
+    index = SearchIndex(path)
+    count = index.add_airtable_records(client.get_all_records(fields=SEARCH_FIELDS, raise_errors=True))
+    index.save()
+    print(f"Indexed {count} recipes ({len(index.postings)} terms) into {index.path}")
+    return index
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Search recipes by title and ingredients.")
+    parser.add_argument("query", nargs="*", help='e.g. rhubarb -dairy, "sweet potato", choc*')
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the index from Airtable first.")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    index = rebuild_search_index() if args.rebuild else SearchIndex.load()
+    if args.query:
+        start = time.perf_counter()
+        hits = index.search(" ".join(args.query), limit=args.limit)
+        elapsed = time.perf_counter() - start
+        for hit in hits:
+            print(f"{hit.score:7.3f}  {hit.title}  ({hit.record_id})")
+        print(f"{len(hits)} results in {elapsed * 1000:.1f} ms")
@@ -0,0 +1,418 @@
+"""
+Precomputed "similar recipes" index for pairing suggestions.
+
+Each tagged recipe is turned into a sparse vector of hashed features (ingredient
+names, seasons, diet tags), weighted by IDF and L2-normalised. For every recipe the
+top NEIGHBOURS_PER_COURSE most similar recipes (cosine) of each menu course are
+precomputed and written to one binary file under the data dir, which `load`
+memory-maps, so a lookup is a slice of an array rather than a scan.
+
+    python -m recipe_ingestion.similar_recipes --rebuild      full rebuild from Airtable
+    python -m recipe_ingestion.similar_recipes --update       add newly tagged recipes
+    python -m recipe_ingestion.similar_recipes recXXXXXXXX    pairings for one recipe
+"""
+import hashlib
+import heapq
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from .config import get_data_dir
+from .ingredient_parser import ingredient_terms, singularize
+from .menu_generator import COURSE_GROUPS, COURSE_TO_GROUP, TAGGED
+from .query import Query, record_id_in
+from .records import COURSE, DIET_TAGS, INGREDIENTS_RAW, SEASON, TITLE, Recipe
+
+DEFAULT_SIMILAR_INDEX_FILE = "similar_recipes.idx"
+SIMILAR_INDEX_VERSION = 1
+SIMILAR_INDEX_FIELDS = [TITLE, COURSE, SEASON, DIET_TAGS, INGREDIENTS_RAW]
+TAGGED_FEATURES_QUERY = Query(where=TAGGED, fields=SIMILAR_INDEX_FIELDS)
+# Record IDs per lookup query when updating by ID (keeps the formula URL short)
+RECORD_ID_QUERY_CHUNK = 50
+NEIGHBOURS_PER_COURSE = 20
+# Features shared by more recipes than this (salt, olive oil, a season) don't make
+# recipes candidates for each other; they still count towards the score of recipes
+# that share a rarer feature. This is what keeps the build well below all-pairs.
+MAX_CANDIDATE_POSTINGS = 500
+# Relative weight of each feature kind, on top of IDF
+FEATURE_WEIGHTS = {"i": 1.0, "s": 1.5, "d": 1.5}
+
+_MAGIC = b"RSIM"
+_EMPTY = 0xFFFFFFFF  # unused neighbour slot
+GROUPS = list(COURSE_GROUPS)
+
+
+class SimilarRecipe(NamedTuple):
+    record_id: str
+    title: str
+    course: str   # menu slot: starter, main or dessert
+    score: float  # cosine similarity, 0-1
+
+
+def _feature_id(feature: str) -> int:
+    # Stable across processes, unlike hash(), so persisted vectors stay valid
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=4).digest(), "little")
+
+
+def recipe_features(recipe: Recipe) -> List[str]:
+    """Feature names of a recipe: ingredient terms, seasons and diet tags."""
+    # ingredient_terms has both "tomatoes" and "tomato"; keep only singular forms
+    features = [f"i:{term}" for term in ingredient_terms(recipe.ingredients) if term == singularize(term)]
+    features += [f"s:{season}" for season in recipe.seasons]
+    features += [f"d:{diet}" for diet in recipe.diet_tags]
+    return features
+
+
+class SimilarRecipeIndex:
+    """
+    Per-course nearest neighbours of every tagged recipe.
+
+    Built in full with `build`, extended with `add` (new recipes get their own
+    neighbour lists and are merged into everyone else's). IDF weights are fixed at the
+    last full build, so rebuild now and then as the corpus grows; recipes whose course
+    or ingredients changed also need a rebuild.
+    """
+
+    def __init__(self, path: Optional[str] = None, k: int = NEIGHBOURS_PER_COURSE):
+        self.path = path or os.path.join(get_data_dir(), DEFAULT_SIMILAR_INDEX_FILE)
+        self.k = k
+        self.record_ids: List[str] = []
+        self.titles: List[str] = []
+        self.groups = array("B")                  # doc -> index into GROUPS
+        self.neighbours = array("I")              # doc x group x k neighbour doc ids, best first
+        self.scores = array("f")                  # matching cosine scores
+        self.vector_offsets = array("I", [0])     # doc -> slice of vector_ids / vector_weights
+        self.vector_ids = array("I")
+        self.vector_weights = array("f")
+        self.idf: Dict[int, float] = {}
+        self.default_idf = 0.0                    # for features unseen at build time
+        self._doc_by_record: Dict[str, int] = {}
+        self._mmap: Optional[mmap.mmap] = None
+        self._postings: Optional[Dict[int, list]] = None  # feature -> [(doc, weight)], built on first add
+        self._vectors: Optional[List[Dict[int, float]]] = None
+        self._dirty = False
+
+    def __len__(self):
+        return len(self.record_ids)
+
+    def __contains__(self, record_id: str) -> bool:
+        return record_id in self._doc_by_record
+
+    # --- Lookup ---
+
+    def similar(self, record_id: str, course: Optional[str] = None, k: Optional[int] = None) -> List[SimilarRecipe]:
+        """
+        Most similar recipes of one menu course ("starter", "main", "dessert"; by
+        default the recipe's own), best first. Empty for unknown record ids.
+        """
+        doc = self._doc_by_record.get(record_id)
+        if doc is None:
+            return []
+        group = GROUPS.index(course) if course else self.groups[doc]
+        start = (doc * len(GROUPS) + group) * self.k
+        end = start + min(k or self.k, self.k)
+        return [
+            SimilarRecipe(self.record_ids[other], self.titles[other], GROUPS[group], round(score, 4))
+            for other, score in zip(self.neighbours[start:end].tolist(), self.scores[start:end].tolist())
+            if other != _EMPTY
+        ]
+
+    def pairings(self, record_id: str, k: Optional[int] = None) -> Dict[str, List[SimilarRecipe]]:
+        """Best matches from each of the other courses, e.g. a starter and dessert for a main."""
+        doc = self._doc_by_record.get(record_id)
+        if doc is None:
+            return {}
+        return {group: self.similar(record_id, group, k) for i, group in enumerate(GROUPS) if i != self.groups[doc]}
+
+    # --- Building ---
+
+    def _vector(self, features: Iterable[str]) -> Dict[int, float]:
+        weights = {}
+        for feature in features:
+            fid = _feature_id(feature)
+            weights[fid] = FEATURE_WEIGHTS[feature[0]] * self.idf.get(fid, self.default_idf)
+        norm = math.sqrt(sum(w * w for w in weights.values()))
+        return {fid: w / norm for fid, w in weights.items()} if norm else {}
+
+    def _prepare_for_updates(self) -> None:
+        """Copies a memory-mapped index into writable arrays and builds the feature postings."""
+        if self._mmap is not None:
+            for name in ("groups", "neighbours", "scores", "vector_offsets", "vector_ids", "vector_weights"):
+                view = getattr(self, name)
+                values = array(view.format)
+                values.frombytes(view.tobytes())
+                setattr(self, name, values)
+                view.release()
+            self._mmap.close()
+            self._mmap = None
+        if self._postings is None:
+            self._postings, self._vectors = {}, []
+            for doc in range(len(self.record_ids)):
+                start, end = self.vector_offsets[doc], self.vector_offsets[doc + 1]
+                vector = dict(zip(self.vector_ids[start:end], self.vector_weights[start:end]))
+                self._vectors.append(vector)
+                for fid, weight in vector.items():
+                    self._postings.setdefault(fid, []).append((doc, weight))
+
+    def _insert(self, record_id: str, title: str, group: int, vector: Dict[int, float]) -> None:
+        """Adds one recipe: computes its neighbours and offers it to every recipe it resembles."""
+        postings, k, num_groups = self._postings, self.k, len(GROUPS)
+        dots: Dict[int, float] = {}
+        get = dots.get
+        common = []
+        for fid, weight in vector.items():
+            docs = postings.get(fid, ())
+            if len(docs) > MAX_CANDIDATE_POSTINGS:
+                common.append((fid, weight))
+                continue
+            for other, other_weight in docs:
+                dots[other] = get(other, 0.0) + weight * other_weight
+        for fid, weight in common:
+            if len(postings[fid]) < len(dots):
+                for other, other_weight in postings[fid]:
+                    if other in dots:
+                        dots[other] += weight * other_weight
+            else:
+                vectors = self._vectors
+                for other in dots:
+                    other_weight = vectors[other].get(fid)
+                    if other_weight:
+                        dots[other] += weight * other_weight
+
+        doc = len(self.record_ids)
+        by_group: List[list] = [[] for _ in GROUPS]
+        groups = self.groups
+        for other, score in dots.items():
+            by_group[groups[other]].append((score, -other))
+        for candidates in by_group:
+            best = heapq.nlargest(k, candidates)
+            self.neighbours.extend([-other for _, other in best] + [_EMPTY] * (k - len(best)))
+            self.scores.extend([score for score, _ in best] + [-1.0] * (k - len(best)))
+
+        # Similarity is symmetric: the new recipe may now rank in others' lists
+        neighbours, scores = self.neighbours, self.scores
+        for other, score in dots.items():
+            start = (other * num_groups + group) * k
+            if score <= scores[start + k - 1]:
+                continue
+            position = start + k - 1
+            while position > start and scores[position - 1] < score:
+                neighbours[position], scores[position] = neighbours[position - 1], scores[position - 1]
+                position -= 1
+            neighbours[position], scores[position] = doc, score
+
+        self.record_ids.append(record_id)
+        self.titles.append(title)
+        self.groups.append(group)
+        self.vector_ids.extend(vector)
+        self.vector_weights.extend(vector.values())
+        self.vector_offsets.append(len(self.vector_ids))
+        self._doc_by_record[record_id] = doc
+        self._vectors.append(vector)
+        for fid, weight in vector.items():
+            postings.setdefault(fid, []).append((doc, weight))
+
+    def add(self, recipes: Iterable[Recipe]) -> int:
+        """
+        Adds tagged recipes that are not in the index yet (recipes without a menu
+        course are skipped). Returns how many were added.
+        """
+        self._prepare_for_updates()
+        added = 0
+        for recipe in recipes:
+            group = COURSE_TO_GROUP.get(recipe.course)
+            if group is None or not recipe.record_id or recipe.record_id in self._doc_by_record:
+                continue
+            self._insert(recipe.record_id, recipe.title or "", GROUPS.index(group), self._vector(recipe_features(recipe)))
+            added += 1
+        self._dirty = self._dirty or bool(added)
+        return added
+
+    @classmethod
+    def build(cls, recipes: Iterable[Recipe], path: Optional[str] = None, k: int = NEIGHBOURS_PER_COURSE) -> "SimilarRecipeIndex":
+        """Builds a fresh index, with IDF weights computed over `recipes`."""
+        recipes = [recipe for recipe in recipes if COURSE_TO_GROUP.get(recipe.course) and recipe.record_id]
+        index = cls(path, k)
+        doc_freq: Dict[int, int] = {}
+        for recipe in recipes:
+            for fid in {_feature_id(feature) for feature in recipe_features(recipe)}:
+                doc_freq[fid] = doc_freq.get(fid, 0) + 1
+        index.idf = {fid: math.log(1 + len(recipes) / df) for fid, df in doc_freq.items()}
+        index.default_idf = math.log(1 + max(len(recipes), 1))
+        index.add(recipes)
+        index._dirty = True
+        return index
+
+    # --- Persistence: a JSON header followed by the raw arrays, memory-mapped on load ---
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        sections = {
+            "groups": self.groups,
+            "neighbours": self.neighbours,
+            "scores": self.scores,
+            "vector_offsets": self.vector_offsets,
+            "vector_ids": self.vector_ids,
+            "vector_weights": self.vector_weights,
+            "idf_ids": array("I", self.idf.keys()),
+            "idf_values": array("f", self.idf.values()),
+        }
+        header = {
+            "version": SIMILAR_INDEX_VERSION,
+            "byteorder": sys.byteorder,
+            "k": self.k,
+            "groups": GROUPS,
+            "default_idf": self.default_idf,
+            "docs": [list(doc) for doc in zip(self.record_ids, self.titles)],
+            "sections": {},
+        }
+        # Section offsets depend on the header's length, so size the header first
+        header_bytes = b""
+        for _ in range(2):
+            offset = _aligned(8 + len(header_bytes) + 64)
+            for name, values in sections.items():
+                header["sections"][name] = [offset, values.typecode, len(values)]
+                offset = _aligned(offset + len(values) * values.itemsize)
+            header_bytes = json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_MAGIC + struct.pack("<I", len(header_bytes)) + header_bytes)
+            for name, values in sections.items():
+                f.write(b"\0" * (header["sections"][name][0] - f.tell()))
+                values.tofile(f)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "SimilarRecipeIndex":
+        """Memory-maps the index at `path`, or returns an empty one if there is none (or it is outdated)."""
+        index = cls(path)
+        if not os.path.exists(index.path):
+            return index
+        with open(index.path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header_length = struct.unpack_from("<I", mapped, 4)[0] if mapped[:4] == _MAGIC else 0
+        header = json.loads(mapped[8:8 + header_length]) if header_length else {}
+        if (header.get("version") != SIMILAR_INDEX_VERSION or header.get("byteorder") != sys.byteorder
+                or header.get("groups") != GROUPS):
+            print(f"Similar-recipes index at {index.path} has an old format; starting a new one.")
+            mapped.close()
+            return index
+
+        index.k = header["k"]
+        index.default_idf = header["default_idf"]
+        for doc, (record_id, title) in enumerate(header["docs"]):
+            index.record_ids.append(record_id)
+            index.titles.append(title)
+            index._doc_by_record[record_id] = doc
+        views = {
+            name: memoryview(mapped)[offset:offset + count * array(typecode).itemsize].cast(typecode)
+            for name, (offset, typecode, count) in header["sections"].items()
+        }
+        for name in ("groups", "neighbours", "scores", "vector_offsets", "vector_ids", "vector_weights"):
+            setattr(index, name, views.pop(name))
+        # IDF is only needed to add recipes; a dict is simpler to use than the mapped arrays
+        index.idf = dict(zip(views["idf_ids"].tolist(), views["idf_values"].tolist()))
+        for view in views.values():
+            view.release()
+        index._mmap = mapped
+        print(f"Loaded similar-recipes index with {len(index)} recipes from {index.path}")
+        return index
+
+
+def _aligned(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def _fetch_tagged_recipes(client, record_ids: Optional[List[str]] = None) -> List[Recipe]:
+    """Every tagged recipe, or only those among `record_ids`."""
+    if record_ids is None:
+        records = client.query(TAGGED_FEATURES_QUERY, raise_errors=True)
+    else:
+        records = []
+        for start in range(0, len(record_ids), RECORD_ID_QUERY_CHUNK):
+            chunk = record_ids[start:start + RECORD_ID_QUERY_CHUNK]
+            query = Query(where=TAGGED & record_id_in(chunk), fields=SIMILAR_INDEX_FIELDS)
+            records.extend(client.query(query, raise_errors=True))
+    return Recipe.from_airtable_records(sorted(records, key=lambda r: r.get("id", "")))
+
+
+def rebuild_similar_index(client=None, path: Optional[str] = None) -> SimilarRecipeIndex:
+    """Builds the index from every tagged recipe in Airtable and saves it."""
+    from .airtable_client import get_airtable_client
+
+    index = SimilarRecipeIndex.build(_fetch_tagged_recipes(client or get_airtable_client()), path)
+    index.save()
+    print(f"Indexed neighbours for {len(index)} recipes into {index.path}")
+    return index
+
+
+def update_similar_index(client=None, path: Optional[str] = None, records: Optional[Iterable[dict]] = None,
+                         record_ids: Optional[Iterable[str]] = None) -> SimilarRecipeIndex:
+    """
+    Adds newly tagged recipes to the saved index (a full build if there is none).
+
+    Args:
+        records: The new Airtable records themselves (e.g. as returned when they were
+                 created); nothing is fetched.
+        record_ids: IDs of the new recipes; only those are fetched.
+        Without either, every tagged recipe is fetched and the ones not yet indexed
+        are added.
+    """
+    from .airtable_client import get_airtable_client
+
+    index = SimilarRecipeIndex.load(path)
+    if not len(index):
+        return rebuild_similar_index(client, path)
+    if records is not None:
+        recipes = [recipe for recipe in Recipe.from_airtable_records(sorted(records, key=lambda r: r.get("id", "")))
+                   if recipe.tagging_status == "Tagged"]
+    else:
+        recipes = _fetch_tagged_recipes(client or get_airtable_client(),
+                                        None if record_ids is None else sorted(set(record_ids)))
+    added = index.add(recipes)
+    index.save()
+    print(f"Added {added} recipes to the similar-recipes index ({len(index)} in total).")
+    return index
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Build or query the similar-recipes index.")
+    parser.add_argument("record_id", nargs="?", help="Show pairings for this recipe.")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the index from all tagged recipes.")
+    parser.add_argument("--update", action="store_true", help="Add recipes tagged since the last build.")
+    parser.add_argument("--course", choices=GROUPS, help="Only show neighbours from this course.")
+    parser.add_argument("-k", type=int, default=5, help="Neighbours to show per course.")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        start_time = time.perf_counter()
+        index = rebuild_similar_index()
+        print(f"Built in {time.perf_counter() - start_time:.1f}s")
+    elif args.update:
+        index = update_similar_index()
+    else:
+        index = SimilarRecipeIndex.load()
+
+    if args.record_id:
+        if args.record_id not in index:
+            raise SystemExit(f"{args.record_id} is not in the index.")
+        start_time = time.perf_counter()
+        results = {args.course: index.similar(args.record_id, args.course, args.k)} if args.course \
+            else index.pairings(args.record_id, args.k)
+        elapsed = time.perf_counter() - start_time
+        for course, matches in results.items():
+            print(f"\n{course.title()}:")
+            for match in matches:
+                print(f"  {match.score:.3f}  {match.title}  ({match.record_id})")
+        print(f"\nLooked up in {elapsed * 1000:.3f} ms")
@@ -1,55 +1,39 @@
 import re
+from .records import Recipe
 
 class RawDataFormatter:
     def __init__(self):
         pass
 
-    def format_for_airtable(self, scraped_recipe_data):
+    def format_for_airtable(self, scraped_recipe_data, tags=None):
         """
         Formats the data obtained from the EnhancedScraper (including custom scrapes)
         into the structure required for Airtable, focusing on raw data and
         setting a "Tagging Status".
+
+        If `tags` (from recipe_tagging.tag_scraped_recipes) are given, they are merged
+        in and the record is created already tagged.
         """
         if not scraped_recipe_data:
             return None
 
-        # Use keys from the new unified scrape_recipe output
-        title = scraped_recipe_data.get("title")
-        source_url = scraped_recipe_data.get("url") # Key is now 'url'
-        image_url_str = scraped_recipe_data.get("image") # Key is now 'image'
-        ingredients_list = scraped_recipe_data.get("ingredients", []) # Key is now 'ingredients'
-        instructions_list = scraped_recipe_data.get("instructions", []) # New: Get instructions
-        yields = scraped_recipe_data.get("yields") # New: Get yields
-        total_time_raw = scraped_recipe_data.get("total_time") # New: Get total_time (raw string)
-        host = scraped_recipe_data.get("host") # New: Get host/domain
-
-        # NOTE: Parsing time strings (like '1 hour 30 minutes') into minutes
-        # can be complex and is not implemented here. We store the raw string.
-        # Similar logic applies to yields (e.g., 'Serves 4-6')
-
-        # Format Image URL for Airtable attachment field
-        airtable_image_field = None
-        if image_url_str:
-            airtable_image_field = [{"url": image_url_str}]
+        # Accept a Recipe or the dict from the unified scrape_recipe output
+        recipe = scraped_recipe_data if isinstance(scraped_recipe_data, Recipe) else Recipe.from_scraped(scraped_recipe_data)
 
-        # Format Ingredients (raw)
-        ingredients_raw_string = "\n".join(ingredients_list) if ingredients_list else None # Use newline separator
+        # Map to Airtable field names (see records.py): Title, Source URL, Image URL as an
+        # attachment, newline-joined Ingredients (raw), Tagging Status and Approved, plus
+        # Total Time (min) and Servings (min/max) parsed from the scraped time and yields
+        # ('1 hour 30 minutes' -> 90, 'Serves 4-6' -> 4 and 6) when they could be parsed
+        raw_record = recipe.to_airtable_fields()
+        # New records start Pending and unapproved; set here, not on the caller's Recipe
+        raw_record["Tagging Status"] = "Pending"
+        raw_record["Approved"] = False
 
-        # Format Instructions (raw)
-        instructions_raw_string = "\n".join(instructions_list) if instructions_list else None # Use newline separator
+        if tags:
+            raw_record.update(tags)
 
-        # Map to Airtable field names (Update these keys if your Airtable fields differ)
-        raw_record = {
-            "Title": title,
-            "Source URL": source_url,
-            "Image URL": airtable_image_field,
-            "Ingredients (raw)": ingredients_raw_string,
-            "Tagging Status": "Pending",  
-            "Approved": False
-        }
-        
         # Optional: Remove keys with None values before sending to Airtable
-        # raw_record = {k: v for k, v in raw_record.items() if v is not None}
+        # raw_record = recipe.to_airtable_fields(skip_empty=True)
 
         return raw_record
 
@@ -0,0 +1,243 @@
+import queue
+import socketserver
+import threading
+import time
+from typing import Optional
+
+from .airtable_client import get_airtable_client
+from .query import Query, eq, record_id_in
+from .recipe_tagging import (
+    PENDING_QUERY,
+    TAGGING_BATCH_SIZE,
+    TAGGING_INPUT_FIELDS,
+    get_classifier,
+    tag_records,
+    write_tagged_ids,
+)
+from .similar_recipes import update_similar_index
+
+DEFAULT_DAEMON_HOST = "127.0.0.1"
+DEFAULT_DAEMON_PORT = 8765
+DEFAULT_POLL_INTERVAL_SECONDS = 30
+# Longest a queued record waits for its batch to fill before being classified anyway
+DEFAULT_MAX_LATENCY_SECONDS = 0.25
+
+
+class _SubmitHandler(socketserver.StreamRequestHandler):
+    """One record ID per line; answers 'queued' or 'skipped' for each."""
+
+    def handle(self):
+        for line in self.rfile:
+            record_id = line.decode("utf-8", "replace").strip()
+            if not record_id:
+                continue
+            queued = self.server.tagging_daemon.submit(record_id)
+            self.wfile.write(b"queued\n" if queued else b"skipped\n")
+
+
+class _SubmitServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class TaggingDaemon:
+    """
+    Long-running tagger that keeps the classifier loaded.
+
+    Records arrive from two sources: a poll of Airtable for 'Pending' records every
+    `poll_interval` seconds, and record IDs sent over a local TCP socket (e.g. by the
+    ingestion pipeline right after it creates a record). Queued records are tagged in
+    micro-batches of up to `batch_size`, with a batch closing after at most
+    `max_latency` seconds, and written back with batched updates.
+    """
+
+    def __init__(self, airtable_client=None, poll_interval: float = DEFAULT_POLL_INTERVAL_SECONDS,
+                 batch_size: int = TAGGING_BATCH_SIZE, max_latency: float = DEFAULT_MAX_LATENCY_SECONDS,
+                 host: str = DEFAULT_DAEMON_HOST, port: Optional[int] = DEFAULT_DAEMON_PORT):
+        self.airtable_client = airtable_client or get_airtable_client()
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.max_latency = max_latency
+        self.host = host
+        self.port = port
+        self.queue = queue.Queue()
+        self._queued_ids = set() # queued or being tagged, so a poll doesn't enqueue them twice
+        self._queued_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._server = None
+        self.tagged_count = 0
+        self.failed_count = 0
+
+    def submit(self, record_id: str, record: Optional[dict] = None) -> bool:
+        """
+        Queues a record for tagging. Pass the record itself if it's already loaded,
+        otherwise it's fetched with its batch. Returns False if it's already queued.
+        """
+        with self._queued_lock:
+            if record_id in self._queued_ids:
+                return False
+            self._queued_ids.add(record_id)
+        self.queue.put((record_id, record))
+        return True
+
+    # --- Sources ---
+
+    def poll_pending(self) -> int:
+        """Queues every 'Pending' record; returns how many were new."""
+        records = self.airtable_client.query(PENDING_QUERY)
+        return sum(1 for record in records if record.get("id") and self.submit(record["id"], record))
+
+    def _poll_loop(self):
+        while not self._stop.is_set():
+            try:
+                added = self.poll_pending()
+                if added:
+                    print(f"Queued {added} pending records from Airtable.")
+            except Exception as e:
+                print(f"Error polling Airtable for pending records: {e}")
+            self._stop.wait(self.poll_interval)
+
+    def start_server(self):
+        """Starts accepting record IDs on the local socket; returns the bound (host, port)."""
+        self._server = _SubmitServer((self.host, self.port), _SubmitHandler)
+        self._server.tagging_daemon = self
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self._server.server_address
+
+    # --- Batching ---
+
+    def _next_batch(self, timeout: float = 1.0):
+        """Waits up to `timeout` for a first record, then collects more until the batch is full or its deadline passes."""
+        try:
+            batch = [self.queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.max_latency
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _load_missing(self, batch):
+        """
+        Fetches the records that were submitted by ID only, in one request. Only
+        'Pending' records are fetched, so an ID sent for a record that is already
+        Tagged (or approved by a human) doesn't get its tags overwritten.
+        """
+        missing = [record_id for record_id, record in batch if record is None]
+        loaded = {}
+        if missing:
+            query = Query(where=record_id_in(missing) & eq("Tagging Status", "Pending"), fields=TAGGING_INPUT_FIELDS)
+            for record in self.airtable_client.query(query):
+                loaded[record["id"]] = record
+        records = []
+        skipped = []
+        for record_id, record in batch:
+            record = record or loaded.get(record_id)
+            if record is None:
+                skipped.append(record_id)
+            else:
+                records.append(record)
+        if skipped:
+            print(f"Skipping {len(skipped)} records that are missing or not 'Pending': {', '.join(skipped)}")
+        return records
+
+    def _index_tagged(self, tagged_ids):
+        """Adds newly tagged records to the similar-recipes index, as the batch tagger does."""
+        try:
+            update_similar_index(self.airtable_client, record_ids=tagged_ids)
+        except Exception as e:
+            print(f"Error adding {len(tagged_ids)} tagged records to the similar-recipes index: {e}")
+
+    def process_batch(self, batch):
+        """Tags one batch of (record_id, record) pairs and writes the results back."""
+        start = time.monotonic()
+        try:
+            records = self._load_missing(batch)
+            if records:
+                tagged = tag_records(records)
+                tagged_ids = write_tagged_ids(self.airtable_client, tagged)
+                failed = len(tagged) - len(tagged_ids)
+                self.tagged_count += len(tagged_ids)
+                self.failed_count += failed
+                print(f"Tagged {len(tagged_ids)} records ({failed} failed) in {time.monotonic() - start:.2f}s.")
+                if tagged_ids:
+                    self._index_tagged(tagged_ids)
+        except Exception as e:
+            print(f"Error tagging batch of {len(batch)} records: {e}")
+        finally:
+            with self._queued_lock:
+                self._queued_ids.difference_update(record_id for record_id, _ in batch)
+
+    # --- Lifecycle ---
+
+    def stop(self):
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def run(self):
+        """Loads the model, starts the sources and tags batches until interrupted."""
+        get_classifier() # Pay the model load once, up front
+        if self.port is not None:
+            host, port = self.start_server()
+            print(f"Accepting record IDs on {host}:{port}")
+        if self.poll_interval:
+            threading.Thread(target=self._poll_loop, daemon=True).start()
+        print("Tagging daemon running. Press Ctrl+C to stop.")
+        try:
+            while not self._stop.is_set():
+                batch = self._next_batch()
+                if batch:
+                    self.process_batch(batch)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+            print(f"\nTagging daemon stopped. Successfully tagged: {self.tagged_count}, Failed: {self.failed_count}")
+
+
+def submit_record_ids(record_ids, host: str = DEFAULT_DAEMON_HOST, port: int = DEFAULT_DAEMON_PORT,
+                      timeout: float = 5.0) -> bool:
+    """
+    Sends record IDs to a running TaggingDaemon. Returns False if no daemon is
+    listening, so callers can leave the records to the next poll.
+    """
+    import socket
+
+    try:
+        with socket.create_connection((host, port), timeout=timeout) as conn:
+            conn.sendall("".join(f"{record_id}\n" for record_id in record_ids).encode("utf-8"))
+            conn.shutdown(socket.SHUT_WR)
+            while conn.recv(4096):
+                pass
+        return True
+    except OSError:
+        return False
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Keep the tagging model warm and tag new recipes continuously.")
+    parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL_SECONDS,
+                        help="Seconds between polls for Pending records (0 disables polling).")
+    parser.add_argument("--batch-size", type=int, default=TAGGING_BATCH_SIZE)
+    parser.add_argument("--max-latency", type=float, default=DEFAULT_MAX_LATENCY_SECONDS,
+                        help="Longest a record waits for its batch to fill, in seconds.")
+    parser.add_argument("--port", type=int, default=DEFAULT_DAEMON_PORT, help="Local port for submitted record IDs.")
+    parser.add_argument("--submit", nargs="+", metavar="RECORD_ID", help="Send record IDs to a running daemon and exit.")
+    args = parser.parse_args()
+
+    if args.submit:
+        if not submit_record_ids(args.submit, port=args.port):
+            raise SystemExit(f"No tagging daemon listening on port {args.port}")
+    else:
+        TaggingDaemon(poll_interval=args.poll_interval, batch_size=args.batch_size,
+                      max_latency=args.max_latency, port=args.port).run()
@@ -0,0 +1,68 @@
+import pytest
+
+from recipe_ingestion import main
+from recipe_ingestion.query import LocalTable
+from recipe_ingestion.records import SERVINGS_MAX, SERVINGS_MIN, SOURCE_URL, TOTAL_TIME_MINUTES
+
+
+class FakeClient(LocalTable):
+    def __init__(self, records):
+        super().__init__(records)
+        self.updates = []
+
+    def batch_update_records(self, updates):
+        self.updates += updates
+        return updates
+
+
+class FakeScraper:
+    pages = {
+        "https://a.com/no-time": {"total_time": "45 minutes", "yields": "4 servings"},
+        "https://a.com/no-yield": {"total_time": "1 hour", "yields": "6 to 8 servings"},
+        "https://a.com/unparsed": {"total_time": "a while", "yields": "a crowd"},
+    }
+
+    def __init__(self):
+        self.scraped = []
+
+    def scrape_recipe(self, url):
+        self.scraped.append(url)
+        return self.pages[url]
+
+
+@pytest.fixture
+def backfill(tmp_path, monkeypatch):
+    monkeypatch.setenv("RECIPE_DATA_DIR", str(tmp_path))
+    client = FakeClient([
+        {"id": "no-time", "fields": {SOURCE_URL: "https://a.com/no-time", SERVINGS_MIN: 2, SERVINGS_MAX: 2}},
+        {"id": "no-yield", "fields": {SOURCE_URL: "https://a.com/no-yield", TOTAL_TIME_MINUTES: 50}},
+        {"id": "unparsed", "fields": {SOURCE_URL: "https://a.com/unparsed"}},
+        {"id": "complete", "fields": {SOURCE_URL: "https://a.com/complete", TOTAL_TIME_MINUTES: 5, SERVINGS_MIN: 1}},
+    ])
+    scrapers = []
+    monkeypatch.setattr(main, "get_airtable_client", lambda: client)
+    monkeypatch.setattr(main, "EnhancedScraper", lambda: scrapers.append(FakeScraper()) or scrapers[-1])
+
+    def run(**kwargs):
+        main.backfill_times_and_yields(**kwargs)
+        return client.updates, scrapers[-1].scraped
+    return run
+
+
+def test_backfill_writes_only_the_missing_fields(backfill):
+    updates, scraped = backfill()
+
+    assert scraped == ["https://a.com/no-time", "https://a.com/no-yield", "https://a.com/unparsed"]
+    assert updates == [
+        {"id": "no-time", "fields": {TOTAL_TIME_MINUTES: 45}},
+        {"id": "no-yield", "fields": {SERVINGS_MIN: 6, SERVINGS_MAX: 8}},
+    ]
+
+
+def test_unparsed_pages_are_not_scraped_again(backfill):
+    backfill()
+    _, scraped = backfill()
+    assert "https://a.com/unparsed" not in scraped
+
+    _, scraped = backfill(retry_unparsed=True)
+    assert "https://a.com/unparsed" in scraped
@@ -0,0 +1,28 @@
+from recipe_ingestion import airtable_client, main
+from recipe_ingestion.dedup import RecipeDeduplicator
+
+
+class FakeClient:
+    def get_all_records(self, fields=None):
+        return [{"id": "rec1", "fields": {"Title": "Lemon Tart", "Source URL": "https://www.a.com/tart/",
+                                          "Ingredients (raw)": "2 lemons\n1 cup flour\n1 cup sugar"}}]
+
+
+def test_missing_index_is_bootstrapped_from_airtable(tmp_path, monkeypatch):
+    monkeypatch.setattr(airtable_client, "get_airtable_client", lambda *args: FakeClient())
+    path = str(tmp_path / "dedup_index.json")
+
+    assert len(RecipeDeduplicator.load(path)) == 0
+    assert RecipeDeduplicator.load(path, bootstrap=True).has_url("https://a.com/tart?utm_source=x")
+    assert len(RecipeDeduplicator.load(path)) == 1  # saved
+
+
+def test_known_urls_are_not_scraped(tmp_path):
+    class Scraper:
+        def scrape_recipe(self, url):
+            raise AssertionError(f"fetched {url}")
+
+    dedup = RecipeDeduplicator(str(tmp_path / "dedup_index.json"))
+    dedup.add("rec1", "Lemon Tart", ["2 lemons"], "https://a.com/tart")
+
+    assert main.scrape_new_recipe("https://www.a.com/tart/", Scraper(), dedup) == (None, main.DUPLICATE)
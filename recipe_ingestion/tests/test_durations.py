@@ -0,0 +1,68 @@
+import pytest
+
+from recipe_ingestion.durations import looks_like_duration_label, parse_duration_minutes, parse_servings
+
+
+@pytest.mark.parametrize("value, minutes", [
+    # ISO 8601
+    ("PT1H30M", 90),
+    ("PT45M", 45),
+    ("P1DT2H", 26 * 60),
+    ("PT90S", 2),
+    # hours:minutes
+    ("1:30", 90),
+    ("0:45", 45),
+    # text and mixed fractions
+    ("1 hour 30 minutes", 90),
+    ("1 1/2 hours", 90),
+    ("1½ hrs", 90),
+    ("1 hr 15 mins", 75),
+    ("45 min", 45),
+    # only the total counts when prep/cook times are listed too
+    ("Prep Time 15 mins Cook Time 30 mins Total Time 45 mins", 45),
+    ("Prep: 10 minutes, Total: 1 hour", 60),
+    # ranges give the upper bound
+    ("45-60 minutes", 60),
+    ("30 to 40 mins", 40),
+    # numbers as recipe-scrapers returns them
+    (90, 90),
+    (12.6, 13),
+])
+def test_parse_duration_minutes(value, minutes):
+    assert parse_duration_minutes(value) == minutes
+
+
+@pytest.mark.parametrize("value", [None, "", "   ", "PT", "overnight", 0, -5, True, "0:00"])
+def test_parse_duration_minutes_without_a_duration(value):
+    assert parse_duration_minutes(value) is None
+
+
+@pytest.mark.parametrize("value, servings", [
+    ("Serves 4–6", (4, 6)),
+    ("serves 4 to 6", (4, 6)),
+    ("Serves 4", (4, 4)),
+    ("4 servings", (4, 4)),
+    ("Yield: 6", (6, 6)),
+    ("8", (8, 8)),
+    (4, (4, 4)),
+])
+def test_parse_servings(value, servings):
+    assert parse_servings(value) == servings
+
+
+@pytest.mark.parametrize("value", [
+    None, "", 0, True,
+    "Serves 6-4",
+    # Counts of items aren't servings; pinned until yields like these are handled
+    "Makes 24 cookies",
+    "2 dozen",
+    "1 loaf",
+])
+def test_parse_servings_without_servings(value):
+    assert parse_servings(value) is None
+
+
+def test_looks_like_duration_label():
+    assert looks_like_duration_label("Total Time: 45 minutes")
+    assert not looks_like_duration_label("45 minutes")
+    assert not looks_like_duration_label("Take your time with this one: " + "slowly " * 20 + "for 45 minutes")
@@ -0,0 +1,75 @@
+import pytest
+from bs4 import BeautifulSoup
+
+from recipe_ingestion.images import SAME_IMAGE_DISTANCE, ImagePipeline, ImageStore, _Fetched
+from recipe_ingestion.scraper import _img_url
+
+BASE_URL = "https://example.com/recipe/"
+
+
+def _img(attrs):
+    return BeautifulSoup(f"<img {attrs}>", "html.parser").img
+
+
+@pytest.mark.parametrize("attrs, url", [
+    ('srcset="a.jpg 300w, b.jpg 800w, c.jpg 1600w"', "https://example.com/recipe/b.jpg"),
+    ('srcset="a.jpg 300w,b.jpg 800w,c.jpg 1600w"', "https://example.com/recipe/b.jpg"),
+    ('srcset="a.jpg 300w,b.jpg 600w"', "https://example.com/recipe/b.jpg"),
+    ('srcset="/img/w_300,h_200/a.jpg 300w, /img/w_900,h_600/a.jpg 900w"', "https://example.com/img/w_900,h_600/a.jpg"),
+    ('data-srcset="a.jpg 1200w" src="data:image/gif;base64,R0lG"', "https://example.com/recipe/a.jpg"),
+    ('src="data:image/gif;base64,R0lG" data-lazy-src="/photo.jpg"', "https://example.com/photo.jpg"),
+    ('src="/logo.svg"', None),
+])
+def test_img_url(attrs, url):
+    assert _img_url(_img(attrs), BASE_URL) == url
+
+
+def _fetched(url, hash_value):
+    return _Fetched(url, b"x" * 1000, (1200, 800), f"p:{hash_value:016x}", hash_value, None)
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    pipeline = ImagePipeline(store=ImageStore(str(tmp_path)), max_workers=2, public_base_url="https://cdn.example/")
+    fetched = {
+        "https://a.com/tart.jpg": _fetched("https://a.com/tart.jpg", 0b1010),
+        "https://b.com/pie.jpg": _fetched("https://b.com/pie.jpg", 0b1011),  # 1 bit from the tart
+    }
+    monkeypatch.setattr(pipeline, "_fetch", fetched.__getitem__)
+    return pipeline
+
+
+def test_near_duplicate_hash_attaches_the_recipes_own_image(pipeline):
+    tart, pie = pipeline.process_many([
+        ("https://a.com/tart", ["https://a.com/tart.jpg"]),
+        ("https://b.com/pie", ["https://b.com/pie.jpg"]),
+    ])
+
+    assert tart.url == "https://a.com/tart.jpg"
+    assert pie.key == tart.key  # deduplicated against the stored photo...
+    assert pie.source_url == pie.url == "https://b.com/pie.jpg"  # ...but not given its URL
+    assert pipeline.store.images[tart.key]["recipes"] == ["https://a.com/tart", "https://b.com/pie"]
+
+
+def test_identical_image_reuses_the_stored_thumbnail(pipeline):
+    first = pipeline.process("https://a.com/tart", ["https://a.com/tart.jpg"])
+    pipeline.store.images[first.key]["thumbnail"] = "ab/cdef.webp"
+
+    again = pipeline.process("https://a.com/tart-2", ["https://a.com/tart.jpg"])
+
+    assert again.url == "https://cdn.example/ab/cdef.webp"
+
+
+def test_store_finds_hashes_within_the_same_image_distance(tmp_path):
+    store = ImageStore(str(tmp_path))
+    stored = 0x0123456789ABCDEF
+    store.record(f"p:{stored:016x}", stored, {})
+    far = stored ^ ((1 << (SAME_IMAGE_DISTANCE + 1)) - 1)
+
+    for bits in range(SAME_IMAGE_DISTANCE + 1):
+        # Flipped bits spread over the whole hash, so no bit range stays intact by chance
+        near = stored
+        for bit in range(bits):
+            near ^= 1 << (bit * 64 // SAME_IMAGE_DISTANCE)
+        assert store.find("p:other", near) == f"p:{stored:016x}"
+    assert store.find("p:other", far) is None
@@ -0,0 +1,70 @@
+import os
+
+import pytest
+
+from recipe_ingestion.scraper import (
+    JS_LINK_RULES,
+    SK_LINK_RULES,
+    EnhancedScraper,
+    find_js_links,
+    find_js_next_page,
+    find_sk_links,
+    find_sk_next_page,
+    scan_index_page,
+)
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+SK_URL = "https://smittenkitchen.com/recipes/"
+JS_URL = "https://justinesnacks.com/recipes/"
+
+PAGES = [
+    ("sk_index_main.html", SK_URL, SK_LINK_RULES, find_sk_links, find_sk_next_page),
+    ("sk_index_no_main.html", SK_URL, SK_LINK_RULES, find_sk_links, find_sk_next_page),
+    ("js_index_site_content.html", JS_URL, JS_LINK_RULES, find_js_links, find_js_next_page),
+]
+
+
+def _read(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("name, url, rules, find_links, find_next", PAGES)
+@pytest.mark.parametrize("targeted_parsing", [False, True])
+def test_scan_matches_soup_finders(name, url, rules, find_links, find_next, targeted_parsing):
+    html_content = _read(name)
+    soup = EnhancedScraper(targeted_parsing=targeted_parsing)._parse_html(html_content, url, page_type="index")
+
+    assert scan_index_page(html_content, url, rules) == (find_links(soup), find_next(soup, url))
+
+
+def test_scan_uses_main_and_ignores_comments_and_scripts():
+    links, next_url = scan_index_page(_read("sk_index_main.html"), SK_URL, SK_LINK_RULES)
+
+    assert links == {
+        "https://smittenkitchen.com/2024/03/lemon-ricotta-pancakes/",
+        "https://smittenkitchen.com/2024/02/braised-short-ribs/",
+        "https://smittenkitchen.com/2024/01/chocolate-olive-oil-cake/",
+    }
+    assert next_url == "https://smittenkitchen.com/page/2/"
+
+
+def test_scan_falls_back_to_nested_content_div():
+    links, next_url = scan_index_page(_read("sk_index_no_main.html"), SK_URL, SK_LINK_RULES)
+
+    assert links == {
+        "https://smittenkitchen.com/2012/05/strawberry-summer-cake/",
+        "https://smittenkitchen.com/2012/04/asparagus-tart/",
+    }
+    assert next_url == "https://smittenkitchen.com/page/2/"
+
+
+def test_scan_falls_back_to_site_content_div():
+    links, next_url = scan_index_page(_read("js_index_site_content.html"), JS_URL, JS_LINK_RULES)
+
+    assert links == {
+        "https://justinesnacks.com/spicy-crunchy-tofu/",
+        "https://justinesnacks.com/cacio-e-pepe-beans/",
+    }
+    assert next_url == "https://justinesnacks.com/recipes/page/2/"
@@ -0,0 +1,41 @@
+from recipe_ingestion.menu_generator import MenuEngine
+from recipe_ingestion.query import LocalTable
+from recipe_ingestion.records import Recipe
+from recipe_ingestion.similar_recipes import SimilarRecipe
+
+
+class FewNeighbours:
+    """Every main's only neighbour is the first starter/dessert, so most courses fall back."""
+
+    def similar(self, record_id, group):
+        return [SimilarRecipe(f"{group}0", f"{group}0", group, 1.0)] if group in ("starter", "dessert") else []
+
+
+def _engine(menus, hosts):
+    recipes = []
+    for i in range(menus):
+        for group, course in (("starter", "Starter"), ("main", "Main Course"), ("dessert", "Dessert")):
+            host = hosts[(i + len(course)) % len(hosts)]
+            recipes.append(Recipe(title=f"{group}{i}", url=f"https://{host}/{group}{i}", course=course,
+                                  seasons=["Winter"], tagging_status="Tagged", record_id=f"{group}{i}"))
+    return MenuEngine(LocalTable(recipes), seed=1, similar_index=FewNeighbours())
+
+
+def _hosts(menu):
+    return {fields["Source URL"].split("/")[2] for fields in menu.values()}
+
+
+def test_paired_pool_uses_every_recipe_once():
+    pool = _engine(40, ["a.com", "b.com"]).generate_pool(40, season="Winter", paired=True)
+
+    titles = [fields["Title"] for menu in pool for fields in menu.values()]
+    assert len(pool) == 40
+    assert len(titles) == len(set(titles))
+
+
+def test_paired_pool_falls_back_to_new_hosts_first():
+    pool = _engine(30, ["a.com", "b.com", "c.com"]).generate_pool(30, season="Winter", paired=True,
+                                                                   distinct_hosts=True)
+
+    assert len(pool) == 30
+    assert sum(len(_hosts(menu)) == 3 for menu in pool) >= 25
@@ -0,0 +1,27 @@
+import pytest
+
+from recipe_ingestion.menu_retriever import SeasonMenuCache, fetch_all_curated_menus, fetch_curated_menus_by_season
+from recipe_ingestion.query import LocalTable
+
+MENUS = LocalTable([
+    {"id": "m1", "fields": {"Menu Name": "Picnic", "Season": ["Spring", "Summer"]}},
+    {"id": "m2", "fields": {"Menu Name": "Asparagus Supper", "Season": ["Spring"]}},
+    {"id": "m3", "fields": {"Menu Name": "Harvest", "Season": "Fall"}},
+    {"id": "m4", "fields": {"Menu Name": "Late Spring Feast", "Season": ["Summer"]}},
+])
+
+
+@pytest.mark.parametrize("season", ["Spring", "Summer", "Fall", "Winter"])
+def test_multi_season_menus_match_the_same_way_live_and_primed(season):
+    live = SeasonMenuCache(lambda s: fetch_curated_menus_by_season(s, client=MENUS))
+    primed = SeasonMenuCache(lambda s: [])
+    for primed_season, records in fetch_all_curated_menus(client=MENUS).items():
+        primed.put(primed_season, [record["fields"] for record in records])
+
+    assert live.get(season) == primed.get(season)
+
+
+def test_multi_season_menu_is_listed_under_each_season():
+    names = [menu["Menu Name"] for menu in fetch_curated_menus_by_season("Spring", client=MENUS)]
+
+    assert names == ["Asparagus Supper", "Picnic"]
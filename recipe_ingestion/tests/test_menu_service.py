@@ -0,0 +1,46 @@
+import asyncio
+
+from recipe_ingestion.menu_service import MAX_BODY_BYTES, MenuService
+
+
+class FakeWriter:
+    def __init__(self):
+        self.data = b""
+        self.closed = False
+
+    def write(self, data):
+        self.data += data
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def _serve(request: bytes) -> FakeWriter:
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(request)
+        reader.feed_eof()
+        writer = FakeWriter()
+        await MenuService(engine=object()).handle_connection(reader, writer)
+        return writer
+    return asyncio.run(run())
+
+
+def test_oversized_body_is_refused_without_reading_it():
+    writer = _serve(f"POST /menus HTTP/1.1\r\nContent-Length: {10 ** 10}\r\n\r\n".encode("latin-1"))
+
+    assert writer.data.startswith(b"HTTP/1.1 413 Payload Too Large\r\n")
+    assert b"Connection: close" in writer.data
+    assert writer.closed
+
+
+def test_small_body_is_skipped_before_the_next_request():
+    body = b"x" * MAX_BODY_BYTES
+    writer = _serve(b"POST /menus HTTP/1.1\r\nContent-Length: %d\r\n\r\n" % len(body) + body
+                    + b"GET /healthz HTTP/1.1\r\nConnection: close\r\n\r\n")
+
+    assert writer.data.startswith(b"HTTP/1.1 405 Method Not Allowed\r\n")
+    assert b"HTTP/1.1 503 Service Unavailable\r\n" in writer.data  # no snapshot loaded
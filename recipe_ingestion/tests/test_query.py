@@ -0,0 +1,113 @@
+import pytest
+
+from recipe_ingestion.query import (
+    LocalTable,
+    Query,
+    all_of,
+    compile_formula,
+    eq,
+    field_ref,
+    has,
+    is_blank,
+    is_in,
+    negate,
+    quote_string,
+    record_id_in,
+)
+from recipe_ingestion.records import Recipe
+
+
+@pytest.mark.parametrize("value, literal", [
+    ("Winter", "'Winter'"),
+    ("Winter's End", "'Winter\\'s End'"),
+    ("back\\slash", "'back\\\\slash'"),
+    ("\\'", "'\\\\\\''"),
+    ("'); DELETE", "'\\'); DELETE'"),
+    ('say "hi"', "'say \"hi\"'"),
+    ("", "''"),
+])
+def test_quote_string(value, literal):
+    assert quote_string(value) == literal
+
+
+@pytest.mark.parametrize("field, reference", [
+    ("Tagging Status", "{Tagging Status}"),
+    ("Odd}Name", "{Odd\\}Name}"),
+    ("Back\\slash", "{Back\\\\slash}"),
+])
+def test_field_ref(field, reference):
+    assert field_ref(field) == reference
+
+
+def test_compile_formula():
+    where = all_of(is_in("Course", ["Starter", "Snack"]), eq("Tagging Status", "Tagged"))
+    assert compile_formula(where) == "AND(OR({Course}='Starter', {Course}='Snack'), {Tagging Status}='Tagged')"
+    assert compile_formula(record_id_in(["rec1"]) & ~is_blank("Approved")) == \
+        "AND(RECORD_ID()='rec1', NOT({Approved}=BLANK()))"
+    assert compile_formula(is_in("Course", [])) == "FALSE()"
+    assert compile_formula(None) is None
+
+
+def test_values_of_different_types_compile_separately():
+    assert compile_formula(eq("X", 1)) == "{X}=1"
+    assert compile_formula(eq("X", True)) == "{X}=TRUE()"
+    assert compile_formula(eq("X", 1.0)) == "{X}=1.0"
+    assert eq("X", True) != eq("X", 1)
+
+
+def test_unsupported_values_are_rejected():
+    with pytest.raises(TypeError):
+        eq("Season", ["Winter"])
+
+
+def test_params_push_down_fields_sort_and_limit():
+    query = Query(where=eq("Season", "Fall"), fields=["Menu Name"], sort=["-Season", "Menu Name"], max_records=5)
+
+    assert query.params() == {
+        "max_records": 5,
+        "fields": ["Menu Name"],
+        "sort": [("Season", "desc"), ("Menu Name", "asc")],
+        "filterByFormula": "{Season}='Fall'",
+    }
+
+
+RECORDS = [
+    {"id": "r1", "fields": {"Title": "Beta", "Course": "Starter", "Season": ["Winter", "Fall"], "Approved": True}},
+    {"id": "r2", "fields": {"Title": "alpha", "Course": "Snack"}},
+    {"id": "r3", "fields": {"Title": "Gamma", "Course": "Main Course", "Season": ["Winter"]}},
+]
+
+
+def test_apply_filters_sorts_and_projects():
+    query = Query(where=is_in("Course", ["Starter", "Snack"]), fields=["Title"], sort=["Title"])
+
+    assert query.apply(RECORDS) == [{"id": "r2", "fields": {"Title": "alpha"}},
+                                    {"id": "r1", "fields": {"Title": "Beta"}}]
+
+
+@pytest.mark.parametrize("where, ids", [
+    (eq("Season", "Winter"), ["r3"]),           # multi-selects compare as their joined text
+    (eq("Season", "Winter, Fall"), ["r1"]),
+    (is_blank("Season"), ["r2"]),
+    (eq("Approved", False), ["r2", "r3"]),      # unchecked boxes are empty
+    (negate(record_id_in(["r1", "r3"])), ["r2"]),
+])
+def test_local_evaluation_follows_airtable(where, ids):
+    assert [record["id"] for record in Query(where=where).apply(RECORDS)] == ids
+
+
+def test_local_table_answers_queries_on_recipes():
+    table = LocalTable(Recipe.from_airtable_records(RECORDS))
+    query = Query(where=eq("Course", "Main Course"), fields=["Title", "Season"])
+
+    assert table.query(query) == [{"id": "r3", "fields": {"Title": "Gamma", "Season": ["Winter"]}}]
+
+
+def test_has_matches_whole_options_of_multi_selects():
+    assert compile_formula(has("Season", "Spring")) == "FIND(', Spring, ', ', ' & {Season} & ', ')>0"
+    assert compile_formula(has("Season", "Winter's")) == "FIND(', Winter\\'s, ', ', ' & {Season} & ', ')>0"
+
+    records = [{"id": "a", "fields": {"Season": ["Spring", "Summer"]}},
+               {"id": "b", "fields": {"Season": "Spring"}},
+               {"id": "c", "fields": {"Season": ["Late Spring"]}}]
+    assert [record["id"] for record in Query(where=has("Season", "Spring")).apply(records)] == ["a", "b"]
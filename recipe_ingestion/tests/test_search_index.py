@@ -0,0 +1,131 @@
+import pytest
+
+from recipe_ingestion.search_index import SearchIndex, _append_varint, _decode_postings, recipe_terms
+
+
+def _encode(docs, freqs):
+    buf = bytearray()
+    last = 0
+    for doc, freq in zip(docs, freqs):
+        _append_varint(buf, doc - last)
+        _append_varint(buf, freq)
+        last = doc
+    return bytes(buf)
+
+
+@pytest.mark.parametrize("value, encoded", [
+    (0, b"\x00"),
+    (1, b"\x01"),
+    (127, b"\x7f"),
+    (128, b"\x80\x01"),
+    (300, b"\xac\x02"),
+    (16384, b"\x80\x80\x01"),
+])
+def test_varint_encoding(value, encoded):
+    buf = bytearray()
+    _append_varint(buf, value)
+    assert bytes(buf) == encoded
+
+
+def test_postings_round_trip_with_delta_encoded_doc_ids():
+    docs = [0, 1, 5, 200, 201, 20000, 3000000]
+    freqs = [1, 3, 1, 130, 2, 1, 70000]
+    data = _encode(docs, freqs)
+
+    assert _decode_postings(data) == (docs, freqs)
+    # Deltas keep close doc ids to a byte each
+    assert data[:6] == b"\x00\x01\x01\x03\x04\x01"
+
+
+def test_index_postings_decode_to_added_docs(tmp_path):
+    index = SearchIndex(str(tmp_path / "index.json"))
+    for i in range(300):
+        index.add(f"rec{i}", f"Recipe {i}", ["2 lemons"] if i % 3 == 0 else ["1 cup rice"])
+
+    docs, freqs = index._decode_term("lemon")
+    assert docs == list(range(0, 300, 3))
+    assert set(freqs) == {1}
+
+
+def _index(tmp_path, recipes):
+    index = SearchIndex(str(tmp_path / "index.json"))
+    for record_id, title, ingredients in recipes:
+        index.add(record_id, title, ingredients)
+    return index
+
+
+def test_bm25_ranks_more_occurrences_first(tmp_path):
+    index = _index(tmp_path, [
+        ("once", "Tart", ["2 lemons", "1 cup flour", "1 cup sugar"]),
+        ("twice", "Lemon Tart", ["2 lemons", "1 cup flour", "1 cup sugar"]),
+        ("none", "Apple Pie", ["3 apples", "1 cup flour"]),
+    ])
+
+    assert [hit.record_id for hit in index.search("lemon")] == ["twice", "once"]
+
+
+def test_bm25_ranks_shorter_recipes_first_for_equal_counts(tmp_path):
+    index = _index(tmp_path, [
+        ("long", "Stew", ["1 onion", "2 carrots", "3 potatoes", "1 leek", "2 parsnips", "1 rhubarb stalk"]),
+        ("short", "Compote", ["1 rhubarb stalk", "1 cup sugar"]),
+        ("other", "Toast", ["1 slice bread"]),
+    ])
+
+    assert [hit.record_id for hit in index.search("rhubarb")] == ["short", "long"]
+
+
+def test_bm25_weights_rare_terms_higher(tmp_path):
+    recipes = [(f"sugar{i}", "Cake", ["1 cup sugar", "1 cup flour"]) for i in range(5)]
+    recipes += [
+        ("common", "Cake", ["2 cups sugar", "1 cup flour"]),
+        ("rare", "Cake", ["1 cup sugar", "1 tsp saffron"]),
+    ]
+    index = _index(tmp_path, recipes)
+
+    assert index.search("sugar|saffron")[0].record_id == "rare"
+
+
+def test_dairy_category_ignores_plant_milks_and_nut_butters(tmp_path):
+    index = _index(tmp_path, [
+        ("satay", "Vegan Tofu Satay", ["200 g tofu", "2 tbsp soy sauce", "1/2 cup peanut butter",
+                                       "1 can coconut milk"]),
+        ("creamy", "Creamy Soy Noodles", ["2 tbsp soy sauce", "1/2 cup heavy cream", "2 tbsp butter"]),
+    ])
+
+    assert [hit.record_id for hit in index.search("soy -dairy")] == ["satay"]
+    assert [hit.record_id for hit in index.search("soy dairy")] == ["creamy"]
+    assert "@dairy" not in recipe_terms("Satay", ["1/2 cup creamy peanut butter", "1 tsp cream of tartar"])
+
+
+def test_replaced_recipes_are_compacted_on_save(tmp_path):
+    index = _index(tmp_path, [(f"rec{i}", "Tart", ["2 lemons", "1 cup flour"]) for i in range(5)])
+    for _ in range(20):
+        index.add("rec0", "Lemon Tart", ["3 lemons", "1 cup flour"])
+    index.save()
+
+    loaded = SearchIndex.load(index.path)
+    assert loaded.deleted == set()
+    assert loaded.record_ids == ["rec1", "rec2", "rec3", "rec4", "rec0"]
+    assert loaded._decode_term("lemon") == ([0, 1, 2, 3, 4], [1, 1, 1, 1, 2])
+    assert [hit.record_id for hit in loaded.search("lemon")][0] == "rec0"
+
+
+def test_replaced_recipes_do_not_count_towards_idf(tmp_path):
+    recipes = [("a", "Tart", ["2 lemons"]), ("b", "Pie", ["3 apples"]), ("c", "Cake", ["1 cup flour"])]
+    fresh = _index(tmp_path, recipes)
+    replaced = _index(tmp_path, recipes)
+    for _ in range(5):
+        replaced.add("a", "Tart", ["2 lemons"])
+
+    assert replaced.search("lemon") == fresh.search("lemon")
+
+
+def test_exclusion_only_queries_list_recipes_without_the_terms(tmp_path):
+    index = _index(tmp_path, [
+        ("quiche", "Quiche", ["3 eggs", "1 cup cream"]),
+        ("salad", "Salad", ["1 head lettuce"]),
+        ("sorbet", "Sorbet", ["2 lemons"]),
+    ])
+
+    assert [hit.record_id for hit in index.search("not egg")] == ["salad", "sorbet"]
+    assert [hit.record_id for hit in index.search("-egg -lemon")] == ["salad"]
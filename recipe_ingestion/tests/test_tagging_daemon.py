@@ -0,0 +1,46 @@
+import pytest
+
+from recipe_ingestion import tagging_daemon
+from recipe_ingestion.query import LocalTable
+from recipe_ingestion.tagging_daemon import TaggingDaemon
+
+
+class FakeClient(LocalTable):
+    def __init__(self, records):
+        super().__init__(records)
+        self.updates = []
+
+    def batch_update_records(self, updates):
+        self.updates += updates
+        return [{"id": update["id"]} for update in updates]
+
+
+@pytest.fixture
+def daemon(monkeypatch):
+    client = FakeClient([
+        {"id": "pending", "fields": {"Title": "Tart", "Tagging Status": "Pending"}},
+        {"id": "approved", "fields": {"Title": "Pie", "Tagging Status": "Tagged", "Approved": True}},
+        {"id": "broken", "fields": {"Title": "Stew", "Tagging Status": "Pending"}},
+    ])
+    indexed = []
+    monkeypatch.setattr(tagging_daemon, "tag_records", lambda records: [
+        (r["id"], {"Tagging Status": "Failed" if r["id"] == "broken" else "Tagged"}) for r in records])
+    monkeypatch.setattr(tagging_daemon, "update_similar_index",
+                        lambda client, record_ids: indexed.extend(record_ids))
+    daemon = TaggingDaemon(client, port=None)
+    daemon.indexed = indexed
+    return daemon
+
+
+def test_submitted_ids_only_tag_pending_records(daemon):
+    daemon.process_batch([("pending", None), ("approved", None), ("missing", None)])
+
+    assert [update["id"] for update in daemon.airtable_client.updates] == ["pending"]
+    assert (daemon.tagged_count, daemon.failed_count) == (1, 0)
+
+
+def test_tagged_records_are_added_to_the_similar_recipes_index(daemon):
+    daemon.process_batch([("pending", None), ("broken", None)])
+
+    assert daemon.indexed == ["pending"]
+    assert (daemon.tagged_count, daemon.failed_count) == (1, 1)
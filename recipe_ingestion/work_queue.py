@@ -0,0 +1,187 @@
+import os
+import socket
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional
+
+from .config import get_data_dir
+from .dedup import canonicalize_url
+
+DEFAULT_QUEUE_FILE = "crawl_queue.sqlite3"
+DEFAULT_VISIBILITY_TIMEOUT_SECONDS = 5 * 60
+DEFAULT_MAX_ATTEMPTS = 3
+
+# Requests per second shared by every worker on the queue, per host
+DEFAULT_SHARED_RATES = {
+    "api.airtable.com": 5.0,
+}
+DEFAULT_SHARED_HOST_RATE = 2.0
+
+
+def default_queue_path() -> str:
+    return os.path.join(get_data_dir(), DEFAULT_QUEUE_FILE)
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    # Autocommit mode; writes take an explicit BEGIN IMMEDIATE so claims are atomic
+    # across processes. Several nodes can share the file over a network filesystem
+    # that supports file locking, so this uses the rollback journal: WAL keeps its
+    # index in shared memory (the -shm file), which only works between processes on
+    # one host. A queue file left in WAL mode is switched back on open.
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=DELETE")
+    conn.execute("PRAGMA synchronous=FULL")
+    return conn
+
+
+class WorkQueue:
+    """
+    Crawl queue of recipe URLs in a SQLite file, shared by any number of worker processes.
+
+    Workers claim URLs under a lease; a claimed URL is invisible to other workers until
+    the lease's visibility timeout expires, after which it is handed out again (the
+    worker is assumed dead). Each claim counts as an attempt, and URLs that fail
+    `max_attempts` times are parked as 'dead'. URLs are keyed by canonical form, so
+    re-discovering a URL never queues it twice.
+    """
+
+    def __init__(self, path: Optional[str] = None, visibility_timeout: float = DEFAULT_VISIBILITY_TIMEOUT_SECONDS,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        self.path = path or default_queue_path()
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.conn = _connect(self.path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS urls (
+                canonical_url TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_owner TEXT,
+                lease_expires REAL,
+                last_error TEXT,
+                updated_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS urls_status ON urls (status, lease_expires);
+        """)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def enqueue(self, urls: Iterable[str]) -> int:
+        """Adds URLs that aren't queued yet; returns how many were new."""
+        now = time.time()
+        rows = [(canonicalize_url(url), url, now) for url in urls]
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO urls (canonical_url, url, updated_at) VALUES (?, ?, ?)", rows)
+            added = self.conn.total_changes - before
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return added
+
+    def claim(self, worker_id: str, limit: int = 1) -> List[str]:
+        """Leases up to `limit` URLs that are pending or whose lease has expired."""
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Expired leases that already used up their attempts are given up on
+            self.conn.execute(
+                "UPDATE urls SET status = 'dead', lease_owner = NULL, last_error = 'lease expired', updated_at = ? "
+                "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, now, self.max_attempts))
+            rows = self.conn.execute(
+                "SELECT canonical_url, url FROM urls "
+                "WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?) "
+                "ORDER BY rowid LIMIT ?",
+                (now, limit)).fetchall()
+            self.conn.executemany(
+                "UPDATE urls SET status = 'leased', lease_owner = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE canonical_url = ?",
+                [(worker_id, now + self.visibility_timeout, now, key) for key, _ in rows])
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return [url for _, url in rows]
+
+    def _update_leased(self, url: str, worker_id: str, sql: str, params: tuple) -> bool:
+        """Runs `sql` for `url` only if `worker_id` still holds its lease."""
+        cursor = self.conn.execute(
+            sql + " WHERE canonical_url = ? AND status = 'leased' AND lease_owner = ?",
+            params + (canonicalize_url(url), worker_id))
+        return cursor.rowcount == 1
+
+    def extend_lease(self, url: str, worker_id: str) -> bool:
+        now = time.time()
+        return self._update_leased(url, worker_id, "UPDATE urls SET lease_expires = ?, updated_at = ?",
+                                   (now + self.visibility_timeout, now))
+
+    def complete(self, url: str, worker_id: str) -> bool:
+        return self._update_leased(url, worker_id,
+                                   "UPDATE urls SET status = 'done', lease_owner = NULL, updated_at = ?",
+                                   (time.time(),))
+
+    def fail(self, url: str, worker_id: str, error: str) -> bool:
+        """Returns the URL to the queue for another attempt, or parks it as 'dead' once out of attempts."""
+        return self._update_leased(
+            url, worker_id,
+            "UPDATE urls SET status = CASE WHEN attempts >= ? THEN 'dead' ELSE 'pending' END, "
+            "lease_owner = NULL, last_error = ?, updated_at = ?",
+            (self.max_attempts, error[:500], time.time()))
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self.conn.execute("SELECT status, COUNT(*) FROM urls GROUP BY status").fetchall())
+
+
+class SharedRateBudget:
+    """
+    Token-bucket request budget stored in SQLite, so every worker process and node
+    sharing the file stays under one per-host rate (e.g. Airtable's 5 requests/second
+    per base) instead of each process getting its own.
+    """
+
+    def __init__(self, path: Optional[str] = None, rates: Optional[Dict[str, float]] = None,
+                 default_rate: float = DEFAULT_SHARED_HOST_RATE, burst_seconds: float = 1.0):
+        self.path = path or default_queue_path()
+        self.rates = dict(DEFAULT_SHARED_RATES)
+        self.rates.update(rates or {})
+        self.default_rate = default_rate
+        self.burst_seconds = burst_seconds
+        self.conn = _connect(self.path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_budget (name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)")
+
+    def acquire(self, name: str) -> None:
+        """Blocks until one request to `name` fits in the shared budget, then spends it."""
+        rate = self.rates.get(name, self.default_rate)
+        capacity = max(1.0, rate * self.burst_seconds)
+        while True:
+            now = time.time()
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute("SELECT tokens, updated_at FROM rate_budget WHERE name = ?", (name,)).fetchone()
+                tokens = capacity if row is None else min(capacity, row[0] + (now - row[1]) * rate)
+                if tokens >= 1.0:
+                    tokens -= 1.0
+                    wait = 0.0
+                else:
+                    wait = (1.0 - tokens) / rate
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO rate_budget (name, tokens, updated_at) VALUES (?, ?, ?)",
+                    (name, tokens, now))
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            if wait == 0.0:
+                return
+            time.sleep(wait)